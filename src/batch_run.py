@@ -0,0 +1,74 @@
+import argparse
+import ast
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from core import constants
+from core.batch import MatchResult, run_match
+
+# Runs many headless matches in parallel and prints their results, used to evaluate balance changes
+
+
+def parse_override(text: str) -> tuple:
+    name, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError(f"Expected NAME=VALUE, got '{text}'")
+    try:
+        return name.strip(), ast.literal_eval(value.strip())
+    except (ValueError, SyntaxError):
+        raise argparse.ArgumentTypeError(f"Invalid value of {name}: '{value}'")
+
+
+def print_table(results: list) -> None:
+    rows = [MatchResult.COLUMNS] + [tuple(str(value) for value in result.to_row()) for result in results]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(MatchResult.COLUMNS))]
+    for row in rows:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
+
+
+def print_summary(results: list) -> None:
+    count = len(results)
+    for outcome in ("win", "loss", "timeout"):
+        matches = sum(1 for result in results if result.outcome == outcome)
+        print(f"{outcome}:".ljust(22) + f"{matches} ({matches / count:.0%})")
+    print("Mean ticks:".ljust(22) + f"{sum(result.ticks for result in results) / count:.1f}")
+    print("Mean tanks killed:".ljust(22) + f"{sum(result.tanks_killed for result in results) / count:.2f}")
+    print("Mean walls destroyed:".ljust(22) + f"{sum(result.walls_destroyed for result in results) / count:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs headless Battle City matches in parallel")
+    parser.add_argument("--stage", type=int, default=0, help="index of the stage to play")
+    parser.add_argument("--matches", type=int, default=32, help="number of matches")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first match, following matches count up")
+    parser.add_argument("--max-ticks", type=int, default=constants.FPS * 60 * 10,
+                        help="ticks after which a match is stopped as a timeout")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--set", type=parse_override, action="append", default=[], metavar="NAME=VALUE",
+                        help="override a value in core/constants.py, can be repeated")
+    parser.add_argument("--csv", default=None, metavar="PATH", help="also write the results into a csv file")
+    args = parser.parse_args()
+
+    working_dir = os.path.dirname(os.path.realpath(__file__))
+    overrides = dict(args.set)
+    seeds = range(args.seed, args.seed + args.matches)
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(run_match, working_dir, args.stage, seed, args.max_ticks, overrides)
+                   for seed in seeds]
+        results = [future.result() for future in futures]
+
+    print_table(results)
+    print()
+    print_summary(results)
+
+    if args.csv is not None:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(MatchResult.COLUMNS)
+            writer.writerows(result.to_row() for result in results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core.game import Game
+    from core.entities.tank.computer import Computer
+
+from core import constants
+from core.vectorized_ai import VectorizedAI
+
+
+class AIScheduler:
+    """
+    Decides when AI tanks make their decisions (Computer.ai_update).
+
+    Every tank counts down its logic_cooldown and becomes due when it runs out. At most
+    constants.AI_DECISIONS_PER_TICK due tanks decide in a tick, the ones waiting the longest first, the rest stay due
+    for the next tick. Tanks that became due together therefore end up in different tick phases and the cost of the
+    AI per tick stays flat no matter how many tanks are alive.
+
+    A decision only changes anything when the tank stands still or is close to being aligned with the tiles, where
+    it may turn at a junction. Tanks moving down a corridor are scheduled for the tick they reach the next aligned
+    position (at most constants.AI_MAX_DECISION_INTERVAL ticks) instead of every constants.AI_LOGIC_TIME_STEP + 1
+    ticks. A tank that gets stopped meanwhile is due again within the regular interval.
+
+    When self.vectorized is set, all due tanks decide together in a few array operations of VectorizedAI, which
+    also takes over the shooting of the tanks. There is no decision budget then, so stages with hundreds of tanks
+    can be played.
+    """
+
+    def __init__(self):
+        self.decisions = 0  # Number of decisions made in the last update
+        self.vectorized = constants.AI_VECTORIZED
+        self.vectorized_ai = VectorizedAI()
+
+    def update(self, game: Game) -> None:
+        """
+        Counts down the tank cooldowns and runs the decisions of this tick. Called before the entities are updated.
+        """
+        due = []
+        for tank in game.game_director.spawned_tanks:
+            if tank.health <= 0:
+                continue
+            tank.logic_cooldown -= 1
+            if tank.logic_cooldown > constants.AI_LOGIC_TIME_STEP and not tank.is_moving():
+                tank.logic_cooldown = constants.AI_LOGIC_TIME_STEP
+            if tank.logic_cooldown < 0:
+                due.append(tank)
+
+        if self.vectorized:
+            self._update_vectorized(game, due)
+            return
+
+        due.sort(key=lambda tank: tank.logic_cooldown)  # Stable, ties keep the spawn order
+        due = due[:constants.AI_DECISIONS_PER_TICK]
+        for tank in due:
+            tank.ai_update(game)
+            tank.logic_cooldown = self.decision_interval(tank)
+        self.decisions = len(due)
+
+    def _update_vectorized(self, game: Game, due: list) -> None:
+        tanks = [tank for tank in game.game_director.spawned_tanks if tank.health > 0]
+        if not tanks:
+            self.decisions = 0
+            return
+        self.vectorized_ai.begin_tick(game)
+        if due:
+            intervals = self.vectorized_ai.decide(game, due)
+            for tank, interval in zip(due, intervals.tolist()):
+                tank.logic_cooldown = interval
+        self.vectorized_ai.shoot(game, tanks)
+        self.decisions = len(due)
+
+    @staticmethod
+    def decision_interval(tank: Computer) -> int:
+        """
+        :return: Number of ticks the tank can wait before its next decision.
+        """
+        interval = constants.AI_LOGIC_TIME_STEP
+        if not tank.is_moving():
+            return interval
+
+        axis = 0 if tank.move_dir[0] != 0 else 1
+        position = (tank.rect.x, tank.rect.y)
+        window = constants.AI_JUNCTION_ALIGNMENT
+        if window < position[1 - axis] % constants.TILE_SIZE < constants.TILE_SIZE - window:
+            # Not aligned across the movement, the tank can't reach a junction before it stops
+            return constants.AI_MAX_DECISION_INTERVAL
+
+        offset = position[axis] % constants.TILE_SIZE
+        if offset <= window or offset >= constants.TILE_SIZE - window:
+            return interval
+        if tank.move_dir[axis] > 0:
+            distance = constants.TILE_SIZE - window - offset
+        else:
+            distance = offset - window
+        # Tanks skip some ticks, assuming a move every tick never schedules the decision too late
+        return max(interval, min(constants.AI_MAX_DECISION_INTERVAL, distance // tank.speed - 1))
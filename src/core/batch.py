@@ -0,0 +1,120 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core.map import Map
+
+from core import constants
+from core.game import Game
+from core.game_state import GameState
+
+
+class MatchResult:
+    """
+    Outcome of a single headless match.
+    """
+
+    COLUMNS = ("seed", "outcome", "ticks", "tanks_killed", "walls_destroyed")
+
+    def __init__(self, seed: int, outcome: str, ticks: int, tanks_killed: int, walls_destroyed: int):
+        """
+        :param seed: Seed the match was played with.
+        :param outcome: "win" when the stage was cleared, "loss" on game over and "timeout" when the tick limit
+        was reached first.
+        :param ticks: Number of ticks the match lasted.
+        :param tanks_killed: Number of enemy tanks destroyed.
+        :param walls_destroyed: Number of destructible wall tiles destroyed.
+        """
+        self.seed = seed
+        self.outcome = outcome
+        self.ticks = ticks
+        self.tanks_killed = tanks_killed
+        self.walls_destroyed = walls_destroyed
+
+    def to_row(self) -> tuple:
+        return tuple(getattr(self, column) for column in MatchResult.COLUMNS)
+
+
+def apply_overrides(overrides: dict) -> dict:
+    """
+    Overrides values in the constants module, used to try out balance changes.
+    :param overrides: Constant name -> new value.
+    :return: Constant name -> previous value, pass it to apply_overrides again to undo the overrides.
+    """
+    for name in overrides:
+        if not hasattr(constants, name):
+            raise ValueError(f"Unknown constant {name}")
+    previous = {name: getattr(constants, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(constants, name, value)
+    return previous
+
+
+def run_match(working_dir: str, stage_index: int, seed: int, max_ticks: int, overrides: dict = None) -> MatchResult:
+    """
+    Plays a single stage in a headless game until it is won, lost or max_ticks pass.
+    The player gets no input. Meant to be run in a worker process, constants overrides are only applied for the
+    duration of the match so matches with different overrides can share a process.
+    :param working_dir: Directory containing the res and stages directories.
+    :param stage_index: Index of the stage to play.
+    :param seed: Seed of the game random number generator.
+    :param max_ticks: Tick limit of the match.
+    :param overrides: Constant name -> value overrides applied before the game is created.
+    """
+    previous = apply_overrides(overrides) if overrides else None
+    try:
+        return _play_match(working_dir, stage_index, seed, max_ticks)
+    finally:
+        if previous:
+            apply_overrides(previous)
+
+
+def _play_match(working_dir: str, stage_index: int, seed: int, max_ticks: int) -> MatchResult:
+    game = Game(working_dir, headless=True)
+    game.start_stage(stage_index, seed)
+    director = game.game_director
+    stage = director.stage
+    walls = _WallCounter(game)
+    game.game_map.tile_listeners.append(walls)
+    walls_at_start = walls.count
+
+    outcome = "timeout"
+    ticks = 0
+    while ticks < max_ticks:
+        game.update(0)
+        ticks += 1
+        # A cleared stage immediately loads the next one (or finishes the game after the last one)
+        if director.stage is not stage or game.game_state == GameState.GAME_FINISHED:
+            outcome = "win"
+            break
+        if game.game_state == GameState.GAME_OVER:
+            outcome = "loss"
+            break
+
+    if outcome == "win":
+        tanks_killed = stage.tanks
+    else:
+        tanks_killed = stage.tanks - stage.active_tanks - len(director.spawned_tanks) - len(director.spawned_blings)
+    return MatchResult(seed, outcome, ticks, tanks_killed, walls_at_start - walls.count)
+
+
+class _WallCounter:
+    """
+    Counts the destructible walls left on the map of the played stage. The count is updated whenever a tile is
+    removed, so walls destroyed on the tick that clears the stage are counted before the next stage is loaded.
+    """
+
+    def __init__(self, game: Game):
+        self.map_data = game.game_map.map_data
+        self.count = _count_walls(game.game_map)
+
+    def map_loaded(self, game_map: Map) -> None:
+        pass
+
+    def tile_removed(self, game_map: Map, cells: list) -> None:
+        if game_map.map_data is self.map_data:
+            self.count = _count_walls(game_map)
+
+
+def _count_walls(game_map: Map) -> int:
+    return int((game_map.tile_types == constants.TILE_TYPE_DESTRUCTIBLE_WALL).sum())
@@ -0,0 +1,122 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, List, Union
+
+if TYPE_CHECKING:
+    from core.entities.entity import Entity
+
+
+class Broadphase:
+    """
+    Sweep and prune broadphase that runs once per tick over the entity manager entities.
+
+    Every entity bounding box is expanded by the distance the entity can travel during a single tick, the boxes
+    are then sorted along the x axis and swept to find pairs that overlap on both axes and have matching collision
+    layers and masks. Those candidate pairs are cached for the rest of the tick so that collision checks of moving
+    entities don't have to gather their candidates over and over again for every movement step.
+
+    The sorted entity list is kept between ticks. Entities barely move from tick to tick so the list stays nearly
+    sorted and re-sorting it is close to linear.
+
+    Entities added during the tick (new projectiles, spawned tanks) were not part of the sweep. They are reported
+    as candidates to every entity until the next sweep.
+    """
+
+    def __init__(self):
+        self.active = False  # Whether the cached pairs are valid for the current tick
+        self.candidates = {}  # Entity -> list of entities it can collide with this tick
+        self.late_entities = []  # Entities added after the sweep
+        self._sorted = []  # Entries [min_x, max_x, min_y, max_y, order, entity] sorted by min_x
+
+    def update(self, entities: List[Entity]) -> None:
+        """
+        Runs the sweep over the passed entities and caches the candidate pairs.
+        :param entities: Entities to consider, in the entity manager order.
+        """
+        self.candidates.clear()
+        self.late_entities.clear()
+
+        included = {}  # Entity -> index in the entity list
+        for i in range(len(entities)):
+            entity = entities[i]
+            if entity.collidable or getattr(entity, "collision", False):
+                included[entity] = i
+
+        # Reuse the order from the last tick, then append newly added entities
+        entries = []
+        for entry in self._sorted:
+            i = included.pop(entry[5], None)
+            if i is not None:
+                entries.append(self._update_entry(entry, i))
+        for entity, i in included.items():
+            entries.append(self._update_entry([0, 0, 0, 0, 0, entity], i))
+        entries.sort(key=lambda entry: entry[0])
+        self._sorted = entries
+
+        for entry in entries:
+            self.candidates[entry[5]] = []
+
+        pairs = self.candidates
+        active = []
+        for entry in entries:
+            min_x = entry[0]
+            # Drop entries that end before this one starts, they can't overlap anything further along the axis
+            active = [other for other in active if other[1] > min_x]
+            for other in active:
+                if entry[2] < other[3] and entry[3] > other[2]:
+                    entity = entry[5]
+                    other_entity = other[5]
+                    if other_entity.collidable and other_entity.collision_layer & entity.collision_mask:
+                        pairs[entity].append(other)
+                    if entity.collidable and entity.collision_layer & other_entity.collision_mask:
+                        pairs[other_entity].append(entry)
+            active.append(entry)
+
+        # Keep the candidates in entity manager order so results match iterating the entity list
+        for entity, candidate_entries in pairs.items():
+            candidate_entries.sort(key=lambda entry: entry[4])
+            pairs[entity] = [entry[5] for entry in candidate_entries]
+
+        self.active = True
+
+    @staticmethod
+    def _update_entry(entry: list, order: int) -> list:
+        """
+        Refreshes the expanded bounding box of a sweep entry.
+        """
+        entity = entry[5]
+        margin = getattr(entity, "speed", 0)
+        if margin > 0:
+            margin += 1  # Wall corner sliding can shift the entity by an extra unit sideways
+        rect = entity.rect
+        entry[0] = rect.x - margin
+        entry[1] = rect.x + rect.width + margin
+        entry[2] = rect.y - margin
+        entry[3] = rect.y + rect.height + margin
+        entry[4] = order
+        return entry
+
+    def get_candidates(self, entity: Entity) -> Union[List[Entity], None]:
+        """
+        Returns the cached collision candidates of an entity for this tick.
+        :return: List of entities or None if the entity was not part of the last sweep.
+        """
+        if not self.active:
+            return None
+        candidates = self.candidates.get(entity)
+        if candidates is None:
+            return None
+        if self.late_entities:
+            return candidates + self.late_entities
+        return candidates
+
+    def entity_added(self, entity: Entity) -> None:
+        if self.active:
+            self.late_entities.append(entity)
+
+    def invalidate(self) -> None:
+        """
+        Marks the cached pairs as outdated. Called at the end of a tick.
+        """
+        self.active = False
+        self.candidates.clear()
+        self.late_entities.clear()
@@ -7,23 +7,26 @@ if TYPE_CHECKING:
 
 from typing import Union
 import itertools
-from pyglet.shapes import Rectangle
 
 from core import utils
+from core.utils import Rect
 from core import constants
 from core.entities import entity
 
 
-def check_collision(calling_entity: entity.Entity, new_position: Rectangle,
+def check_collision(calling_entity: entity.Entity, new_position: Rect,
                     ignored_entities: Union[list, None],
                     colliding_entities: Union[list, None],
                     entity_manager: EntityManager,
                     map: Map):
     """
     Checks whether an entities bounding box intersects any other entities.
+    Only entities on a collision layer included in the calling entities collision mask are checked.
+    The owner of the calling entity is ignored.
     Entities are split into ones managed exclusively by a map and an entity_manager.
     For entities managed by a map this function attempts to only check those entities that
-    are around the calling entity to improve performance.
+    are around the calling entity to improve performance. Entities managed by the entity_manager are
+    narrowed down using its per tick broadphase candidates or its spatial hash.
 
     :param calling_entity: Entity invoking this collision check.
     :param new_position: The collision detection rectangle. Future position of an entity for example.
@@ -31,7 +34,7 @@ def check_collision(calling_entity: entity.Entity, new_position: Rectangle,
     :param colliding_entities: A list of entities that will get cleared and filled with a list of entities
     that are colliding in this calculation. Can be None.
     :param entity_manager: An entity manager for checking dynamic entities.
-    :param map: Map for checking static entities.
+    :param map: Map for checking static entities. Can be None to only check the entity_manager entities.
     :return: True if a collision was detected. False otherwise.
     """
     if colliding_entities is not None:
@@ -53,17 +56,23 @@ def check_collision(calling_entity: entity.Entity, new_position: Rectangle,
     if necessary_check_range < 1:
         necessary_check_range = 1
 
-    entity_map_pos = map.entity_map_position(calling_entity)
+    entity_map_pos = map.entity_map_position(calling_entity) if map is not None else None
     if entity_map_pos is not None:
         map_entities = map.get_tiles_around_tile(entity_map_pos, necessary_check_range, full_tile=check_full_tile)
         map_entities = map_entities.ravel()
     else:
         map_entities = []
 
+    managed_entities = entity_manager.get_collision_candidates(calling_entity, new_position)
+
     # Iterating through entities from both the entity_manager and those nearby in the map.
+    collision_mask = calling_entity.collision_mask
+    owner = calling_entity.owner
     collision_detected = False
-    for other_entity in itertools.chain(map_entities, entity_manager.entities):
-        if other_entity is not None and other_entity != calling_entity and other_entity.collidable:
+    for other_entity in itertools.chain(map_entities, managed_entities):
+        if other_entity is None or not other_entity.collision_layer & collision_mask:
+            continue
+        if other_entity is not calling_entity and other_entity is not owner and other_entity.collidable:
             if other_entity not in ignored_entities:
                 if aabb(other_entity.rect, new_position):
                     collision_detected = True
@@ -75,7 +84,107 @@ def check_collision(calling_entity: entity.Entity, new_position: Rectangle,
     return collision_detected
 
 
-def aabb(a: Rectangle, b: Rectangle) -> bool:
+def gather_collision_candidates(calling_entity: entity.Entity, reach: int,
+                                entity_manager: EntityManager, map: Map) -> list:
+    """
+    Gathers all collidable entities that an entity could touch when moving up to a certain distance in any direction.
+    Collision layers and the owner are filtered the same way as in check_collision.
+    Map tiles come first, followed by entities of the entity_manager (same order as check_collision uses).
+
+    :param calling_entity: Entity invoking this query. It is not included in the result.
+    :param reach: Maximum distance the entity can move.
+    :param entity_manager: An entity manager for checking dynamic entities.
+    :param map: Map for checking static entities.
+    :return: List of collidable entities.
+    """
+    rect = calling_entity.rect
+    # Some map tiles are bigger than a single tile (the flag) and reach into the tiles to their top and right
+    # so the area is extended by a tile to the bottom and left.
+    map_entities = map.get_collidable_tiles_in_area(int(rect.x - reach - constants.TILE_SIZE),
+                                                    int(rect.y - reach - constants.TILE_SIZE),
+                                                    int(rect.width + reach * 2 + constants.TILE_SIZE),
+                                                    int(rect.height + reach * 2 + constants.TILE_SIZE))
+
+    collision_mask = calling_entity.collision_mask
+    owner = calling_entity.owner
+    candidates = []
+    for other_entity in itertools.chain(map_entities,
+                                        entity_manager.get_collision_candidates(calling_entity, rect)):
+        if other_entity is None or not other_entity.collision_layer & collision_mask:
+            continue
+        if other_entity is not calling_entity and other_entity is not owner and other_entity.collidable:
+            candidates.append(other_entity)
+    return candidates
+
+
+def sweep(rect: Rect, axis: int, direction: int, distance: int, candidates: list,
+          ignored_entities: Union[list, None] = None) -> tuple:
+    """
+    Sweeps a rectangle along a single axis and finds how far it can travel before touching any of the candidates.
+    Candidates that the rectangle already overlaps block it completely.
+    Candidates that are behind the rectangle or that do not overlap it on the other axis are ignored.
+
+    :param rect: The rectangle to sweep.
+    :param axis: 0 for the x axis, 1 for the y axis.
+    :param direction: 1 or -1, the direction along the axis.
+    :param distance: Maximum travel distance.
+    :param candidates: Entities to sweep against.
+    :param ignored_entities: Entities from the candidates that should be ignored. Can be None.
+    :return: A tuple (free_distance, blocking_entities). free_distance is the distance the rectangle can travel
+    (at most distance). blocking_entities is a list of entities the rectangle touches after travelling that distance.
+    """
+    if axis == 0:
+        start = rect.x
+        end = rect.x + rect.width
+        side_start = rect.y
+        side_end = rect.y + rect.height
+    else:
+        start = rect.y
+        end = rect.y + rect.height
+        side_start = rect.x
+        side_end = rect.x + rect.width
+
+    free = distance
+    blocking_entities = []
+    for other_entity in candidates:
+        if ignored_entities is not None and other_entity in ignored_entities:
+            continue
+        other_rect = other_entity.rect
+        if axis == 0:
+            other_start = other_rect.x
+            other_end = other_rect.x + other_rect.width
+            other_side_start = other_rect.y
+            other_side_end = other_rect.y + other_rect.height
+        else:
+            other_start = other_rect.y
+            other_end = other_rect.y + other_rect.height
+            other_side_start = other_rect.x
+            other_side_end = other_rect.x + other_rect.width
+
+        if other_side_start >= side_end or other_side_end <= side_start:
+            continue
+
+        if direction > 0:
+            gap = other_start - end
+            if other_end <= start:
+                continue
+        else:
+            gap = start - other_end
+            if other_start >= end:
+                continue
+        if gap < 0:
+            gap = 0  # Already overlapping
+
+        if gap < free:
+            free = gap
+            blocking_entities = [other_entity]
+        elif gap == free:
+            blocking_entities.append(other_entity)
+
+    return free, blocking_entities
+
+
+def aabb(a: Rect, b: Rect) -> bool:
     """
     Does Axis Aligned Bounding Box collision detection between two rectangles a and b.
     :return: True if collision between them was detected. False otherwise.
@@ -86,7 +195,7 @@ def aabb(a: Rectangle, b: Rectangle) -> bool:
             a.y + a.height > b.y)
 
 
-def aabb_with_result(a: Rectangle, b: Rectangle, result: Rectangle) -> bool:
+def aabb_with_result(a: Rect, b: Rect, result: Rect) -> bool:
     """
     Does Axis Aligned Bounding Box collision detection between two rectangles a and b.
     Also calculates the intersection rectangle.
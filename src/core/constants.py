@@ -1,12 +1,41 @@
 # Application
-FPS = 64
+FPS = 64  # Logic ticks per second
+RENDER_FPS = 144  # Frames rendered per second at most, sprites are interpolated between ticks
+TICK_TIME = 1 / FPS
+MAX_CATCH_UP_TICKS = 8  # Most ticks a late frame runs to catch up, time beyond that is dropped
 DEBUG_INFO_INTERVAL = FPS * 1
+TURBO_TICKS_PER_FRAME = 8  # Ticks per frame when turbo mode is toggled on in game
+
+# Frame pacer
+PACER_INITIAL_SPIN_MARGIN = 0.002  # Seconds before a frame deadline at which the pacer stops sleeping and spins
+PACER_CALIBRATION_SAMPLES = 120  # Recent sleeps the spin margin is derived from
+PACER_MARGIN_PERCENTILE = 95  # Percentile of the sleep overshoots covered by the spin margin
+PACER_MARGIN_SAFETY = 1.5  # Multiplier of the measured sleep overshoot used as the spin margin
+PACER_HISTORY = 600  # Frames kept for the jitter statistics
 
 # Tiles
 TILE_SIZE = 24
 MOVABLE_SPEED = 2
 MOVABLE_MOVE_SKIP = 0
 
+SPATIAL_HASH_CELL_SIZE = TILE_SIZE * 2
+
+# Collision layers (bit flags)
+COLLISION_LAYER_TANK = 1
+COLLISION_LAYER_PROJECTILE = 2
+COLLISION_LAYER_WALL = 4
+COLLISION_LAYER_BOUNDARY = 8
+COLLISION_LAYER_FLAG = 16
+COLLISION_LAYER_OTHER = 32
+COLLISION_MASK_ALL = 63
+
+# Map tile types (values of the Map.tile_types array)
+TILE_TYPE_EMPTY = 0
+TILE_TYPE_DESTRUCTIBLE_WALL = 1
+TILE_TYPE_WALL = 2
+TILE_TYPE_BUSH = 3
+TILE_TYPE_FLAG = 4
+
 WALL_SLIDE_FACTOR = 2
 WALL_HEALTH = 2
 
@@ -17,6 +46,24 @@ NEW_TANK_SPAWN_MAX_COOLDOWN = 160
 PLAYER_LIVES = 3
 GAME_OVER_COOLDOWN = FPS * 4
 
+# Training environment
+ENV_TICKS_PER_STEP = 4  # Game ticks simulated per environment step, the action is repeated for all of them
+ENV_REWARD_KILL = 1.0  # Reward for every destroyed enemy tank
+ENV_REWARD_LIFE_LOST = -1.0
+ENV_REWARD_WIN = 5.0  # Stage cleared
+ENV_REWARD_LOSS = -5.0  # Game over
+
+# Shared memory world state
+SHARED_STATE_MAX_MAP_SIZE = 64  # Largest published map side in tiles
+SHARED_STATE_MAX_ENTITIES = 512  # Published tank and projectile records, further ones are left out
+
+# Player input bits, one byte per tick is recorded in replays
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_UP = 4
+INPUT_DOWN = 8
+INPUT_SHOOT = 16
+
 # Tanks
 PLAYER_SPEED = 2
 PLAYER_MOVE_SKIP = 0
@@ -42,11 +89,16 @@ BULLET_SPEED = 5
 BULLET_LIFESPAN = FPS * 10
 
 # AI
-AI_LOGIC_TIME_STEP = 1
+AI_LOGIC_TIME_STEP = 1  # Ticks skipped between AI decisions
+AI_DECISIONS_PER_TICK = 2  # Maximum AI decisions per tick, further due tanks wait for the next tick
+AI_MAX_DECISION_INTERVAL = 16  # Ticks skipped at most between decisions of a tank moving down a corridor
+AI_JUNCTION_ALIGNMENT = 2  # Pixels from tile alignment within which tanks may turn at junctions
+AI_VECTORIZED = False  # Decide for all AI tanks together with numpy (see VectorizedAI)
 AI_VISION_TILE_RANGE = 3
 AI_JUNCTION_TURN_CHANCE = .25
 AI_SHOOT_PERIOD = 60
 AI_FLAG_DIRECTION_BIAS = 2.
+FLOW_FIELD_WALL_COST = 4  # Extra path cost of every destructible wall cell, in cells of movement
 
 # UI
 UI_SIDE_PANEL_SIZE = 90
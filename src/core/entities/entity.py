@@ -1,22 +1,181 @@
-import pyglet as pyg
-
+from core import constants
 from core import utils
 
 
-class Entity(pyg.sprite.Sprite):
+class Entity:
     """
     Entity resembles an object in the game world.
+
+    Entities only hold simulation state (position, image dimensions, orientation). An entity created with a batch
+    is bound to a pyglet sprite that renders it. Entities without a batch never touch pyglet graphics, which allows
+    the simulation to run without an OpenGL context.
+    Orientation and image changes are passed to the bound sprite immediately. Position changes happen every tick
+    so they are only copied to the sprite by sync_sprite() before rendering.
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, img=None, x=0, y=0, batch=None, group=None):
         self.rect = None  # Position and dimension information that should be used by all game systems.
-        super().__init__(*args, **kwargs)
+        self.entity_manager = None  # Set by the entity manager this entity is added to
+        self.sprite = None  # Optional render binding
+        self._image = img
+        self._x = x
+        self._y = y
+        self._prev_x = x  # Position before the last tick, used for render interpolation
+        self._prev_y = y
+        self._rotation = 0
+        self._scale = 1
+        self._scale_x = 1
+        self._scale_y = 1
+        self._sprite_dirty = False
+        if batch is not None:
+            self._bind_sprite(batch, group)
 
         self.collidable = True  # Whether other entities can collide with this one
+        self.collision_layer = constants.COLLISION_LAYER_OTHER  # Layer bit this entity is on
+        self.collision_mask = constants.COLLISION_MASK_ALL  # Layer bits of entities this one collides with
+        self.owner = None  # Entity that created this one, it is ignored by this entities collision checks
         self.facing_direction = (0, 1)
         self.to_remove = False
         self._create_rect()
 
+    def _bind_sprite(self, batch, group) -> None:
+        from pyglet.sprite import Sprite  # Imported here so that headless games never load pyglet graphics
+        self.sprite = Sprite(self._image, x=self._x, y=self._y, batch=batch, group=group)
+
+    def store_position(self) -> None:
+        """
+        Remembers the current position as the one to interpolate the sprite from. Called at the start of a tick.
+        """
+        self._prev_x = self._x
+        self._prev_y = self._y
+
+    def sync_sprite(self, alpha: float = 1.0) -> None:
+        """
+        Copies the entity position to its sprite if it changed since the last sync.
+        :param alpha: Fraction of the way from the position stored before the last tick to the current position
+        the sprite should be placed at.
+        """
+        if not self._sprite_dirty:
+            return
+        if alpha >= 1 or (self._prev_x == self._x and self._prev_y == self._y):
+            self._sprite_dirty = False
+            self.sprite.position = (self._x, self._y)
+        else:
+            # Stays dirty so that the next frame moves the sprite further along
+            self.sprite.position = (self._prev_x + (self._x - self._prev_x) * alpha,
+                                    self._prev_y + (self._y - self._prev_y) * alpha)
+
+    def delete(self) -> None:
+        """
+        Releases the render binding of the entity.
+        """
+        if self.sprite is not None:
+            self.sprite.delete()
+            self.sprite = None
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, x):
+        self._x = x
+        self._update_position()
+
+    @property
+    def y(self):
+        return self._y
+
+    @y.setter
+    def y(self, y):
+        self._y = y
+        self._update_position()
+
+    @property
+    def position(self) -> tuple:
+        return self._x, self._y
+
+    @position.setter
+    def position(self, position: tuple):
+        self._x, self._y = position
+        self._update_position()
+
+    @property
+    def image(self):
+        return self._image
+
+    @image.setter
+    def image(self, img):
+        self._image = img
+        if self.sprite is not None:
+            self.sprite.image = img
+        self._update_position()
+
+    @property
+    def rotation(self):
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, rotation):
+        self._rotation = rotation
+        if self.sprite is not None:
+            self.sprite.rotation = rotation
+
+    @property
+    def scale(self):
+        return self._scale
+
+    @scale.setter
+    def scale(self, scale):
+        self._scale = scale
+        if self.sprite is not None:
+            self.sprite.scale = scale
+        self._update_position()
+
+    @property
+    def scale_x(self):
+        return self._scale_x
+
+    @scale_x.setter
+    def scale_x(self, scale_x):
+        self._scale_x = scale_x
+        if self.sprite is not None:
+            self.sprite.scale_x = scale_x
+        self._update_position()
+
+    @property
+    def scale_y(self):
+        return self._scale_y
+
+    @scale_y.setter
+    def scale_y(self, scale_y):
+        self._scale_y = scale_y
+        if self.sprite is not None:
+            self.sprite.scale_y = scale_y
+        self._update_position()
+
+    @property
+    def width(self) -> int:
+        """
+        Scaled width of the entity image (same as the width of a pyglet sprite).
+        """
+        return int(self._image_frame().width * abs(self._scale_x) * abs(self._scale))
+
+    @property
+    def height(self) -> int:
+        """
+        Scaled height of the entity image (same as the height of a pyglet sprite).
+        """
+        return int(self._image_frame().height * abs(self._scale_y) * abs(self._scale))
+
+    def _image_frame(self):
+        """
+        Returns the image, or the first frame of an animation.
+        """
+        if hasattr(self._image, "frames"):
+            return self._image.frames[0].image
+        return self._image
+
     def logic_update(self, game, tick: int):
         """
         Calls an update on the entity. The entity can do game logic here.
@@ -35,8 +194,11 @@ class Entity(pyg.sprite.Sprite):
         self._update_position()
 
     def _update_position(self):
-        super()._update_position()
+        if self.sprite is not None:
+            self._sprite_dirty = True
         self._create_rect()
+        if self.entity_manager is not None:
+            self.entity_manager.entity_moved(self)
 
     def _create_rect(self):
         """
@@ -49,7 +211,7 @@ class Entity(pyg.sprite.Sprite):
         anchor point. This rectangle is recalculated everytime the entities position changes.
         """
         if self.rect is None:
-            self.rect = pyg.shapes.Rectangle(self.x, self.y, self.width, self.height)
+            self.rect = utils.Rect(self.x, self.y, self.width, self.height)
         else:
             utils.set_rect(self.rect, self.x, self.y, self.width, self.height)
 
@@ -1,12 +1,14 @@
-from pyglet.shapes import Rectangle
+from core import constants
 from core.entities.entity import Entity
+from core.utils import Rect
 from core.texture_manager import TextureManager
 
 
 class Collider(Entity):
     def __init__(self, x, y, w, h):
         super().__init__(img=TextureManager.error, x=x, y=y)
-        self.rect = Rectangle(x, y, w, h)
+        self.rect = Rect(x, y, w, h)
+        self.collision_layer = constants.COLLISION_LAYER_BOUNDARY
 
     def _create_rect(self):
         pass
@@ -54,6 +54,13 @@ class DestructibleWall(Wall):
                 else:
                     self.image = TextureManager.wall_tr_damaged
 
+    def set_health(self, health: int) -> None:
+        """
+        Sets the wall health and the matching texture.
+        """
+        self.health = health
+        self._resolve_texture(health < constants.WALL_HEALTH)
+
     def damage(self, game: Game, other_entity=None) -> bool:
         """
         Applies damage to this wall or destroying it completely, deleting the entity.
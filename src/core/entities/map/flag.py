@@ -1,3 +1,4 @@
+from core import constants
 from core.entities.entity import Entity
 from core.texture_manager import TextureManager
 
@@ -11,6 +12,7 @@ class Flag(Entity):
         self.destroyed = False
         super().__init__(img=TextureManager.flag, **kwargs)
         self.scale = 3
+        self.collision_layer = constants.COLLISION_LAYER_FLAG
 
     def damage(self, game, other_entity=None) -> bool:
         self.image = TextureManager.flag_damaged
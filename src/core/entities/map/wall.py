@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from core.game import Game
 
+from core import constants
 from core.entities import entity
 from core.texture_manager import TextureManager
 
@@ -15,6 +16,7 @@ class Wall(entity.Entity):
     def __init__(self, **kwargs):
         super().__init__(img=TextureManager.inwall, **kwargs)
         self.collidable = True
+        self.collision_layer = constants.COLLISION_LAYER_WALL
 
     def projectile_hit(self, quadrant: int, facing_direction: tuple, game: Game) -> None:
         """
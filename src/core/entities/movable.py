@@ -1,11 +1,10 @@
 import numpy as np
 
-from pyglet.shapes import Rectangle
-
 from core import entities
 from core import constants
 from core import collision
 from core import utils
+from core.utils import Rect
 
 
 class Movable(entities.entity.Entity):
@@ -38,124 +37,140 @@ class Movable(entities.entity.Entity):
         if not skip_move:
             if self.collision:
                 self.resolve_collision(game, tick)
-            else:
+            elif self.move_dir[0] != 0 or self.move_dir[1] != 0:
                 self.move(self.move_dir[0] * self.speed, self.move_dir[1] * self.speed)
 
             self.last_move = (last_pos[0] - self.rect.x, last_pos[1] - self.rect.y)
 
     def resolve_collision(self, game, tick):
-        # For speeds >1 the entity moves by multiple units.
-        # To simulate how the movement would play out each 1 unit step the collision handling is executed everytime.
-        # This way if an entity has a high speed it still reacts to collision as if it was moving slowly.
-        for step in range(0, self.speed):
-            movement_vector = np.copy(self.move_dir)
-
-            # Collision detection (separated into 3 directions)
-            diagonal_collision = False
-            horizontal_collision = False
-            vertical_collision = False
-
-            new_d_pos = self.rect
-            new_h_pos = self.rect
-            new_v_pos = self.rect
-
-            horizontal_colliding_entities = []
-            vertical_colliding_entities = []
-
-            if movement_vector[0] != 0 and movement_vector[1] != 0:
-                utils.add_vector_to_rect(new_d_pos, movement_vector)
-                diagonal_collision = collision.check_collision(self, new_d_pos,
-                                                               self.colliding_entities, None,
-                                                               game.entity_manager, game.game_map)
-            if movement_vector[0] != 0:
-                new_h_pos.x += movement_vector[0]
-                horizontal_collision = collision.check_collision(self, new_h_pos,
-                                                                 self.colliding_entities, horizontal_colliding_entities,
-                                                                 game.entity_manager, game.game_map)
-            if movement_vector[1] != 0:
-                new_v_pos.y += movement_vector[1]
-                vertical_collision = collision.check_collision(self, new_v_pos,
-                                                               self.colliding_entities, vertical_colliding_entities,
-                                                               game.entity_manager, game.game_map)
-
-            # Wall corner evasion to improve player controls
-            vertical_corner = False
-            corner_entity = None
-            if (len(vertical_colliding_entities) == 1 and
-                    movement_vector[0] == 0 and
-                    len(horizontal_colliding_entities) != 1):
-                corner_entity = vertical_colliding_entities[0]
-                vertical_corner = True
-
-            if (len(horizontal_colliding_entities) == 1 and
-                    movement_vector[1] == 0 and
-                    len(vertical_colliding_entities) != 1):
-                corner_entity = horizontal_colliding_entities[0]
-                vertical_corner = False
-
-            if corner_entity is not None:
-                if isinstance(corner_entity, entities.map.wall.Wall):
-                    corner_w = corner_entity.rect.width / constants.WALL_SLIDE_FACTOR
-                    corner_w_remainder = corner_entity.rect.width - corner_w
-                    corner_h = corner_entity.rect.height / constants.WALL_SLIDE_FACTOR
-                    corner_h_remainder = corner_entity.rect.height - corner_h
-
-                    # Corner zones
-                    bottomLeftCorner = Rectangle(corner_entity.rect.x, corner_entity.rect.y,
-                                                 corner_w, corner_h)
-                    topLeftCorner = Rectangle(corner_entity.rect.x, corner_entity.rect.y + corner_h_remainder,
-                                              corner_w, corner_h)
-                    bottomRightCorner = Rectangle(corner_entity.rect.x + corner_w_remainder, corner_entity.rect.y,
-                                                  corner_w, corner_h)
-                    topRightCorner = Rectangle(corner_entity.rect.x + corner_w_remainder,
-                                               corner_entity.rect.y + corner_h_remainder,
-                                               corner_w, corner_h)
-
-                    new_position_rect = new_v_pos if vertical_corner else new_h_pos
-                    intersection_rect = Rectangle(0, 0, 0, 0)
-                    if collision.aabb_with_result(new_position_rect, corner_entity.rect, intersection_rect):
-                        if utils.rect_in_rect(intersection_rect, bottomLeftCorner):
-                            if vertical_corner:
-                                movement_vector[0] = -1
-                            else:
-                                movement_vector[1] = -1
-                        if utils.rect_in_rect(intersection_rect, topLeftCorner):
-                            if vertical_corner:
-                                movement_vector[0] = -1
-                            else:
-                                movement_vector[1] = 1
-                        if utils.rect_in_rect(intersection_rect, topRightCorner):
-                            if vertical_corner:
-                                movement_vector[0] = 1
-                            else:
-                                movement_vector[1] = 1
-                        if utils.rect_in_rect(intersection_rect, bottomRightCorner):
-                            if vertical_corner:
-                                movement_vector[0] = 1
-                            else:
-                                movement_vector[1] = -1
-
-            # Movement / Collision response
-            movement_occurred = False
-
-            if diagonal_collision and not horizontal_collision and not vertical_collision:
-                self.move(movement_vector[0], 0)  # Force horizontal movement
-                movement_occurred = True
-            else:
-                if not horizontal_collision:
-                    self.move(movement_vector[0], 0)
-                    movement_occurred = True
-                if not vertical_collision:
-                    self.move(0, movement_vector[1])
-                    movement_occurred = True
-
-            # Final collision check to update the colliding entities list.
-            # TODO: Probably not necessary, should be covered by one of the initial checks
-            collision.check_collision(self, self.rect, None, self.colliding_entities,
-                                      game.entity_manager, game.game_map)
-
-            if not movement_occurred:
-                break
+        """
+        Moves the entity by its speed in the movement direction while resolving collisions with other entities.
+
+        Instead of checking collisions after every 1 unit step, the entity bounding box is swept along the movement
+        axis to find the distance to the first obstacle and moved by it at once. If the entity gets stopped by a
+        single wall close to its corner it slides sideways around it (see WALL_SLIDE_FACTOR) and continues moving
+        with the remaining distance. Entities that the entity already intersects are ignored so that it can move
+        out of them.
+        """
+        candidates = collision.gather_collision_candidates(self, self.speed + 1,
+                                                           game.entity_manager, game.game_map)
+        ignored_entities = [other_entity for other_entity in candidates
+                            if collision.aabb(other_entity.rect, self.rect)]
+
+        if self.move_dir[0] != 0 and self.move_dir[1] != 0:
+            # Diagonal movement, axes are resolved separately and without wall sliding
+            free, _ = collision.sweep(self.rect, 0, self.move_dir[0], self.speed, candidates, ignored_entities)
+            self.move(self.move_dir[0] * free, 0)
+            free, _ = collision.sweep(self.rect, 1, self.move_dir[1], self.speed, candidates, ignored_entities)
+            self.move(0, self.move_dir[1] * free)
+        elif self.move_dir[0] != 0 or self.move_dir[1] != 0:
+            axis = 0 if self.move_dir[0] != 0 else 1
+            direction = self.move_dir[axis]
+            remaining = self.speed
+
+            while remaining > 0:
+                free, blocking_entities = collision.sweep(self.rect, axis, direction, remaining,
+                                                          candidates, ignored_entities)
+                if free > 0:
+                    self._move_along_axis(axis, direction * free)
+                    remaining -= free
+                if remaining <= 0:
+                    break
+
+                # Wall corner evasion to improve player controls
+                slide_distance = self._wall_slide_distance(axis, direction, blocking_entities, remaining,
+                                                           candidates, ignored_entities)
+                if slide_distance == 0:
+                    break
+                self._move_along_axis(1 - axis, slide_distance)
+                remaining -= abs(slide_distance)
+
+        # Update the colliding entities list.
+        self.colliding_entities.clear()
+        for other_entity in candidates:
+            if collision.aabb(other_entity.rect, self.rect):
+                self.colliding_entities.append(other_entity)
+
+    def _move_along_axis(self, axis: int, distance: int) -> None:
+        if axis == 0:
+            self.move(distance, 0)
+        else:
+            self.move(0, distance)
+
+    def _wall_slide_distance(self, axis: int, direction: int, blocking_entities: list, max_distance: int,
+                             candidates: list, ignored_entities: list) -> int:
+        """
+        Determines how far the entity should slide sideways around a corner of a wall that is blocking it.
+        The entity slides only if it is blocked by a single wall and it hits it close to its corner.
+        :param axis: Movement axis, 0 for x, 1 for y.
+        :param direction: Movement direction along the axis.
+        :param blocking_entities: Entities the entity touches in the movement direction.
+        :param max_distance: Maximum slide distance.
+        :return: The signed slide distance along the other axis. Zero if no sliding should occur.
+        """
+        if len(blocking_entities) != 1 or not isinstance(blocking_entities[0], entities.map.wall.Wall):
+            return 0
+        corner_entity = blocking_entities[0]
+        vertical_corner = axis == 1
+
+        corner_w = corner_entity.rect.width / constants.WALL_SLIDE_FACTOR
+        corner_w_remainder = corner_entity.rect.width - corner_w
+        corner_h = corner_entity.rect.height / constants.WALL_SLIDE_FACTOR
+        corner_h_remainder = corner_entity.rect.height - corner_h
+
+        # Corner zones
+        bottomLeftCorner = Rect(corner_entity.rect.x, corner_entity.rect.y,
+                                corner_w, corner_h)
+        topLeftCorner = Rect(corner_entity.rect.x, corner_entity.rect.y + corner_h_remainder,
+                             corner_w, corner_h)
+        bottomRightCorner = Rect(corner_entity.rect.x + corner_w_remainder, corner_entity.rect.y,
+                                 corner_w, corner_h)
+        topRightCorner = Rect(corner_entity.rect.x + corner_w_remainder,
+                              corner_entity.rect.y + corner_h_remainder,
+                              corner_w, corner_h)
+
+        # Position one unit further in the movement direction, where the entity would hit the wall
+        new_position_rect = Rect(self.rect.x, self.rect.y, self.rect.width, self.rect.height)
+        if vertical_corner:
+            new_position_rect.y += direction
+        else:
+            new_position_rect.x += direction
+
+        slide_direction = 0
+        intersection_rect = Rect(0, 0, 0, 0)
+        if collision.aabb_with_result(new_position_rect, corner_entity.rect, intersection_rect):
+            if utils.rect_in_rect(intersection_rect, bottomLeftCorner):
+                slide_direction = -1
+            if utils.rect_in_rect(intersection_rect, topLeftCorner):
+                slide_direction = -1 if vertical_corner else 1
+            if utils.rect_in_rect(intersection_rect, topRightCorner):
+                slide_direction = 1
+            if utils.rect_in_rect(intersection_rect, bottomRightCorner):
+                slide_direction = 1 if vertical_corner else -1
+        if slide_direction == 0:
+            return 0
+
+        # Slide until the wall is cleared, the entity bumps into something else or another entity
+        # would start blocking the movement direction as well.
+        side_axis = 1 - axis
+        if side_axis == 0:
+            side_start, side_length = self.rect.x, self.rect.width
+            wall_start, wall_length = corner_entity.rect.x, corner_entity.rect.width
+        else:
+            side_start, side_length = self.rect.y, self.rect.height
+            wall_start, wall_length = corner_entity.rect.y, corner_entity.rect.height
+        if slide_direction > 0:
+            distance_to_clear = wall_start + wall_length - side_start
+        else:
+            distance_to_clear = side_start + side_length - wall_start
+
+        other_candidates = [ent for ent in candidates if ent is not corner_entity]
+        side_free, _ = collision.sweep(self.rect, side_axis, slide_direction, max_distance,
+                                       candidates, ignored_entities)
+        next_blocker_free, _ = collision.sweep(new_position_rect, side_axis, slide_direction, max_distance,
+                                               other_candidates, ignored_entities)
+
+        return slide_direction * int(min(max_distance, distance_to_clear, side_free, next_blocker_free + 1))
 
     def resolve_rotation_4_axis(self):
         """
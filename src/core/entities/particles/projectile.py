@@ -1,8 +1,4 @@
 from core import constants
-from core import utils
-from core import collision
-from core.entities import map
-from core.entities.particles.explosion import Explosion
 from core.entities.particles.particle import Particle
 from core.texture_manager import TextureManager
 
@@ -10,6 +6,8 @@ from core.texture_manager import TextureManager
 class Projectile(Particle):
     """
     A projectile that damages tanks.
+    Projectiles added to an entity manager are simulated by its ProjectileSystem, the object itself only holds
+    the projectile properties and renders it.
     """
 
     def __init__(self, owner, **kwargs):
@@ -20,44 +18,23 @@ class Projectile(Particle):
         super().__init__(img=TextureManager.bullet, **kwargs)
         self.speed = constants.BULLET_SPEED
         self.collidable = True
-        self.potential_targets = []
-        self.ignored_targets = [owner]
+        self.collision_layer = constants.COLLISION_LAYER_PROJECTILE
         self.owner = owner
         self.player_owned = False
         self.lifespan = constants.BULLET_LIFESPAN
+        self.system_index = -1  # Index of the projectile in the ProjectileSystem arrays
 
-    def logic_update(self, game, tick):
-        super().logic_update(game, tick)
-        super().resolve_rotation_4_axis()
-
-        collision.check_collision(self, self.rect, self.ignored_targets, self.potential_targets,
-                                  game.entity_manager, game.game_map)
-        if len(self.potential_targets) > 0:
-            destroy_bullet = False
-            bullet_hit_point = (self.rect.x + self.rect.width // 2,
-                                self.rect.y + self.rect.height)
-
-            no_explosion = False
-            for target in self.potential_targets:
-                if hasattr(target, "damage"):
-                    destroy_bullet = True
-                    if isinstance(target, map.wall.Wall):
-                        wall_center = utils.get_center_of_rect(target.rect)
-                        wall_hit_quadrant = utils.determine_point_quadrant(bullet_hit_point, wall_center)
-                        target.projectile_hit(wall_hit_quadrant, self.facing_direction, game)
-                    else:
-                        if isinstance(target, Projectile):
-                            no_explosion = True
-                        destroy_bullet = not target.damage(game, other_entity=self)
-                    break
-
-            if destroy_bullet:
-                if not no_explosion:
-                    exp = Explosion(x=bullet_hit_point[0] - constants.EXPLOSION_SIZE // 2,
-                                    y=bullet_hit_point[1] - constants.EXPLOSION_SIZE // 2,
-                                    batch=game.foreground_batch)
-                    game.entity_manager.add_entity(exp)
-                game.entity_manager.remove_entity(self)
+    def set_simulated_position(self, x: int, y: int, rect_x: int, rect_y: int) -> None:
+        """
+        Sets the position computed by the ProjectileSystem. The bounding box position is computed by the system
+        as well, so it isn't recreated and the entity manager isn't notified.
+        """
+        self._x = x
+        self._y = y
+        self.rect.x = rect_x
+        self.rect.y = rect_y
+        if self.sprite is not None:
+            self._sprite_dirty = True
 
     def damage(self, game, other_entity=None) -> bool:
         if other_entity.player_owned or self.player_owned:
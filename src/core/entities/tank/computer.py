@@ -7,12 +7,10 @@ if TYPE_CHECKING:
     from core.map import Map
     from core.game import Game
 
-import random
 
 from core import constants
-from core.entities.map.flag import Flag
-from core.entities.map.wall import Wall
 from core.entities.tank import tank
+from core.flow_field import NEIGHBOURS, UNREACHABLE
 from core.texture_manager import TextureManager
 
 
@@ -26,11 +24,13 @@ class Computer(tank.Tank):
     Additionally there is a chance that it will turn at random to the sides specified by AI_JUNCTION_TURN_CHANCE
 
     Every turn has a bias that points the tank towards the FLAG so that the tank eventually reaches it.
-    The bias is controlled by AI_FLAG_DIRECTION_BIAS.
+    The favoured direction is the one leading along the shortest path of the directors flow field, when the tank
+    has no free way to the flag it falls back to the direction of the flag. The bias is controlled by
+    AI_FLAG_DIRECTION_BIAS.
 
     If there is a flag within its AI_VISION_TILE_RANGE, it stops turning.
 
-    It shoots at random intervals, the max shoot interval is AI_SHOOT_PERIOD.
+    It shoots at random intervals, the max shoot interval is AI_SHOOT_PERIOD logic steps.
     """
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -39,37 +39,24 @@ class Computer(tank.Tank):
         self.image = self.texture1
         # self.color = (50, 100, 255)
 
-        self.logic_cooldown = 0
+        self.logic_cooldown = 0  # Ticks until the next decision, counted down by the AI scheduler
         self.shoot_cooldown = 0
 
     def logic_update(self, game: Game, tick):
-        if self.logic_cooldown <= 0:
-            self._ai_update(game, tick)
-            self.logic_cooldown = constants.AI_LOGIC_TIME_STEP
-        else:
-            self.logic_cooldown -= 1
-
+        if not game.game_director.ai_scheduler.vectorized:
+            self._shoot_logic(game)
         super().logic_update(game, tick)
 
         # self.color = (self.color[0] + 1, self.color[1] + 1, self.color[2] + 1)
         # if any(c > 255 for c in self.color):
         #     self.color = tuple(c % 255 for c in self.color)
 
-    def _ai_update(self, game: Game, tick):
+    def ai_update(self, game: Game):
         """
-        Logic update to the ai decision making.
+        Logic update to the ai decision making. Scheduled by the AIScheduler of the game director.
         """
         map_pos = game.game_map.entity_map_position(self)
-
-        flag_detected = False
-        ray_tiles = game.game_map.get_tile_ray(map_pos, self.facing_direction, constants.AI_VISION_TILE_RANGE, True)
-        for tiles in ray_tiles:
-            for tile in tiles:
-                if type(tile) is Wall:
-                    break
-                if isinstance(tile, Flag):
-                    flag_detected = True
-                    break
+        flag_detected = game.game_map.flag_visible_from(map_pos, self.facing_direction)
 
         if not flag_detected:
             if not self.is_moving():
@@ -78,21 +65,21 @@ class Computer(tank.Tank):
                 # print(f"X: {self.rect.x} Y: {self.rect.y}")
                 # print(f"Aligned: {game.game_map.entity_map_position_aligned_with_tiles(self)}")
                 # print(f"Junctions: {self._junction_path_count(game.game_map)}")
-                if (game.game_map.entity_map_position_aligned_with_tiles(self, aprox=2) and
-                        self._junction_path_count(game.game_map) > 2):
-                    if random.random() < constants.AI_JUNCTION_TURN_CHANCE:
+                aligned = game.game_map.entity_map_position_aligned_with_tiles(
+                    self, aprox=constants.AI_JUNCTION_ALIGNMENT)
+                if aligned and self._junction_path_count(game.game_map) > 2:
+                    if game.rng.random() < constants.AI_JUNCTION_TURN_CHANCE:
                         for i in range(0, 5):
                             random_dir = self._get_random_direction(game)
                             if random_dir[0] != self.move_dir[0] and random_dir[1] != self.move_dir[1]:
                                 self.move_dir = random_dir
                                 break
 
-        self._shoot_logic(game)
-
     def _shoot_logic(self, game):
         if self.can_shoot() and self.shoot_cooldown <= 0:
             self.shoot(game)
-            self.shoot_cooldown = random.random() * constants.AI_SHOOT_PERIOD
+            # The period is counted in AI logic steps
+            self.shoot_cooldown = game.rng.random() * constants.AI_SHOOT_PERIOD * (constants.AI_LOGIC_TIME_STEP + 1)
         else:
             self.shoot_cooldown -= 1
 
@@ -100,29 +87,11 @@ class Computer(tank.Tank):
         """
         Counts the number of directions without obstacles.
         """
-        directions = {
-            0: (-1, 0),
-            1: (1, 0),
-            2: (0, -1),
-            3: (0, 1),
-        }
+        map_pos = game_map.entity_map_position(self)
         path_count = 0
-
-        for i in range(0, 4):
-            direction = directions[i]
-
-            try:
-                tiles = game_map.get_tile_next_to_entity(self, direction, True, True)
-            except IndexError:
-                continue
-            tiles_free = True
-            for tile in tiles:
-                if tile is not None and tile.collidable:
-                    tiles_free = False
-                    break
-            if tiles_free:
+        for direction in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            if game_map.walkable_next_to_indexes(map_pos, direction):
                 path_count += 1
-
         return path_count
 
     def _get_random_direction(self, game: Game) -> tuple:
@@ -137,27 +106,35 @@ class Computer(tank.Tank):
         }
 
         dir_bias = self._get_flag_biased_weights(game)
+        map_pos = game.game_map.entity_map_position(self)
+        free = [game.game_map.walkable_next_to_indexes(map_pos, directions[i]) for i in range(0, 4)]
+        if not any(free):
+            # Draws as many random numbers as the search below would
+            return directions[game.rng.choices(range(0, 4), weights=dir_bias, k=100)[-1]]
 
         # Find a direction where there is free space to move towards.
         for i in range(0, 100):
-            direction = random.choices(directions, weights=dir_bias)[0]
-            try:
-                tiles = game.game_map.get_tile_next_to_entity(self, direction, True, True)
-            except IndexError:
-                continue
-            tiles_free = True
-            for tile in tiles:
-                if tile is not None and tile.collidable:
-                    tiles_free = False
-                    break
-            if tiles_free:
+            index = game.rng.choices(range(0, 4), weights=dir_bias)[0]
+            if free[index]:
                 break
 
-        return direction
+        return directions[index]
 
     def _get_flag_biased_weights(self, game: Game) -> List[float]:
         direction_biases = [1., 1., 1., 1.]  # 0 = U, 1 = L, 2 = D, 3 = R
 
+        # Follow the flow field to the free neighbouring position closest to the flag
+        game_map = game.game_map
+        flow_field = game.game_director.flow_field
+        map_pos = game_map.entity_map_position(self)
+        if map_pos is not None and flow_field.distances is not None:
+            distances = [flow_field.distance(map_pos[0] + dx, map_pos[1] + dy)
+                         if game_map.walkable_next_to_indexes(map_pos, (dx, dy)) else UNREACHABLE
+                         for dx, dy in NEIGHBOURS]
+            best = min(distances)
+            if best < UNREACHABLE:
+                return [constants.AI_FLAG_DIRECTION_BIAS if distance == best else 1. for distance in distances]
+
         if game.game_director.flag.center_x() > self.center_x():
             direction_biases[3] = direction_biases[3] * constants.AI_FLAG_DIRECTION_BIAS
         else:
@@ -1,5 +1,4 @@
 import numpy as np
-from pyglet.window import key
 
 from core import constants
 from core.entities.tank import tank
@@ -8,21 +7,28 @@ from core.entities.tank import tank
 class Player(tank.Tank):
     """
     A tank taking input from the keyboard and representing a play in-game.
+    The input of every tick is reduced to a few bits (constants.INPUT_*) so that it can be recorded into
+    and played back from a replay.
     """
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.speed = constants.PLAYER_SPEED
         self.move_skip = constants.PLAYER_MOVE_SKIP
-        self.key_handler = key.KeyStateHandler()
+        self.key_handler = None  # Keyboard state, set by Game.register_player when the game has a window
         self.raw_movement_direction = np.zeros(2, int)
         self.health = constants.PLAYER_HEALTH
         self.shoot_now = False
+        self.scripted_input = None  # Input bits used instead of the keyboard when set
 
     def logic_update(self, game, tick):
-        self.handle_movement_controls()
-        if self.shoot_now:
-            self.shoot(game, player_invoked=True)
-            self.shoot_now = False
+        replay = game.replay
+        if replay is not None and replay.playing:
+            inputs = replay.next_input()
+        else:
+            inputs = self.read_input()
+            if replay is not None:
+                replay.record(inputs)
+        self.apply_input(inputs, game)
         super().logic_update(game, tick)
 
         # Just a quick test for one of the map methods. Perpetually destroys tiles around the player tank.
@@ -34,26 +40,61 @@ class Player(tank.Tank):
         #             tile.damage(game)
 
     def on_key_press(self, symbol, modifiers):
+        from pyglet.window import key
         if symbol == key.SPACE:
             self.shoot_now = True
 
-    def handle_movement_controls(self):
+    def read_input(self) -> int:
         """
-        Handles movement input from the keyboard. Player Tank's movement is restricted to only 4 axis
-        with the last pressed key taking priority over movement direction.
+        Reads the input of the current tick.
+        :return: Combination of the constants.INPUT_* bits.
         """
-        dx = dy = 0
+        if self.scripted_input is not None:
+            return self.scripted_input
+
+        inputs = 0
+        if self.key_handler is not None:
+            from pyglet.window import key  # Imported here so that headless games never load pyglet.window
+            if self.key_handler[key.A]:
+                inputs |= constants.INPUT_LEFT
+            if self.key_handler[key.D]:
+                inputs |= constants.INPUT_RIGHT
+            if self.key_handler[key.W]:
+                inputs |= constants.INPUT_UP
+            if self.key_handler[key.S]:
+                inputs |= constants.INPUT_DOWN
+        if self.shoot_now:
+            inputs |= constants.INPUT_SHOOT
+            self.shoot_now = False
+        return inputs
 
-        if self.key_handler[key.A]:
+    def apply_input(self, inputs: int, game) -> None:
+        """
+        Moves and shoots according to the input of a tick.
+        :param inputs: Combination of the constants.INPUT_* bits.
+        """
+        dx = dy = 0
+        if inputs & constants.INPUT_LEFT:
             dx -= 1
-        if self.key_handler[key.D]:
+        if inputs & constants.INPUT_RIGHT:
             dx += 1
-        if self.key_handler[key.W]:
+        if inputs & constants.INPUT_UP:
             dy += 1
-        if self.key_handler[key.S]:
+        if inputs & constants.INPUT_DOWN:
             dy -= 1
+        self.handle_movement_controls(dx, dy)
+
+        if inputs & constants.INPUT_SHOOT:
+            self.shoot(game, player_invoked=True)
 
-        change = not np.array_equal(self.raw_movement_direction, np.array([dx, dy]))
+    def handle_movement_controls(self, dx: int, dy: int):
+        """
+        Handles movement input. Player Tank's movement is restricted to only 4 axis
+        with the last pressed key taking priority over movement direction.
+        :param dx: Horizontal input direction, -1, 0 or 1.
+        :param dy: Vertical input direction, -1, 0 or 1.
+        """
+        change = self.raw_movement_direction[0] != dx or self.raw_movement_direction[1] != dy
 
         if change:
             if dx != 0 and dy != 0:
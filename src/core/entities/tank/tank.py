@@ -17,6 +17,9 @@ class Tank(Movable):
         self.move_skip = constants.TANK_MOVE_SKIP
         self.scale = constants.TANK_SCALE  # For 16x16 pixel textures
         self.health = constants.TANK_HEALTH
+        self.collision_layer = constants.COLLISION_LAYER_TANK
+        # Projectiles resolve hits on their own, tanks don't get blocked by them
+        self.collision_mask = constants.COLLISION_MASK_ALL & ~constants.COLLISION_LAYER_PROJECTILE
         self.fire_cooldown = 0
         self.last_fired_bullet = None
         self.bullet_spawn_position = {
@@ -58,6 +61,7 @@ class Tank(Movable):
             new_bullet = Projectile(self, x=self.rect.x + spawn_position[0], y=self.rect.y + spawn_position[1],
                                     batch=game.batch)
             new_bullet.move_dir = self.facing_direction
+            new_bullet.resolve_rotation_4_axis()
             new_bullet.player_owned = player_invoked
             game.entity_manager.add_entity(new_bullet)
 
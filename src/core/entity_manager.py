@@ -1,17 +1,44 @@
 import pyglet as pyg
 
 from core import constants
+from core import utils
+from core.broadphase import Broadphase
 from core.entities.entity import Entity
+from core.entities.map.collider import Collider
+from core.entities.particles.particle import Particle
+from core.entities.particles.projectile import Projectile
+from core.entities.tank.tank import Tank
+from core.projectile_system import ProjectileSystem
+from core.spatial_hash import SpatialHash
 
 
 class EntityManager():
     """
     Manages logic updates of game entities.
+    Also keeps the entities in a spatial hash so that collision detection can only look at nearby ones.
+    At the start of each update a broadphase pass caches collision candidates of every entity for the whole tick.
+
+    Entities are kept in buckets by their type and updated system by system. Static colliders are never updated,
+    tanks and other entities are updated in the order they were added. Projectiles are handed over to a
+    ProjectileSystem that updates them all at once after that, followed by visual particles.
+    Only static colliders, tanks and other entities can collide, so only those are put into the spatial hash
+    and the broadphase.
     """
 
     def __init__(self):
-        self.entities = []
+        self.colliders = []  # Static map boundaries
+        self.tanks = []
+        self.particles = []  # Visual particles, they don't take part in collisions
+        self.others = []
+        self.collision_entities = []  # Colliders, tanks and other entities in the order they were added
+        self.projectile_targets = []  # Collision entities projectiles can damage, in the order they were added
+        self.spatial_hash = SpatialHash()
+        self.broadphase = Broadphase()
+        self.projectile_system = ProjectileSystem()
         self.last_debug_tick = 0
+        # Objects notified by entity_added(entity), entity_moved(entity), entity_removed(entity),
+        # entities_cleared() and projectiles_updated(projectile_system)
+        self.listeners = []
 
     def update_entities(self, game, tick) -> None:
         """
@@ -19,20 +46,49 @@ class EntityManager():
         :param game: The game object
         :param tick: Game tick
         """
-        count = len(self.entities)
-        for i in range(count):
-            self.entities[i].logic_update(game, tick)
+        if game.interpolate:
+            self.store_positions()
+        self.broadphase.update(self.collision_entities)
+
+        # Entities added during the update are first updated in the next tick
+        projectile_count = self.projectile_system.count
+        particle_count = len(self.particles)
+        for bucket in (self.tanks, self.others):
+            count = len(bucket)
+            for i in range(count):
+                bucket[i].logic_update(game, tick)
+
+        self.broadphase.invalidate()
+
+        self.projectile_system.update(game, projectile_count, self.projectile_targets)
 
-        for entity_to_remove in [ent for ent in self.entities if ent.to_remove]:
-            self.entities.remove(entity_to_remove)
+        for i in range(particle_count):
+            self.particles[i].logic_update(game, tick)
+
+        def to_remove(ent):
+            return ent.to_remove
+
+        for entity_to_remove in utils.compact_list(self.collision_entities, to_remove):
+            self.spatial_hash.remove(entity_to_remove)
+            entity_to_remove.entity_manager = None
             entity_to_remove.delete()
+            for listener in self.listeners:
+                listener.entity_removed(entity_to_remove)
+        for bucket in (self.colliders, self.tanks, self.others, self.projectile_targets):
+            utils.compact_list(bucket, to_remove)
+        for entity_to_remove in utils.compact_list(self.particles, to_remove):
+            entity_to_remove.entity_manager = None
+            entity_to_remove.delete()
+
+        for listener in self.listeners:
+            listener.projectiles_updated(self.projectile_system)
 
         if game.debug:
             self.last_debug_tick -= 1
             if self.last_debug_tick <= 0:
                 self.last_debug_tick = constants.DEBUG_INFO_INTERVAL
 
-                entity_manager_entities = len(self.entities)
+                entity_manager_entities = len(self.entities) + self.projectile_system.count
                 map_entities = 0
                 view = game.game_map.map.ravel()
                 for t in view:
@@ -43,13 +99,35 @@ class EntityManager():
                 print("Entity manager:".ljust(25) + str(entity_manager_entities))
                 print("Map:".ljust(25) + str(map_entities) + f" ({game.game_map.map.size})")
 
+    def store_positions(self) -> None:
+        """
+        Remembers the positions of rendered entities before they get updated, sprites are interpolated from them.
+        """
+        for bucket in (self.tanks, self.others, self.particles):
+            for entity in bucket:
+                if entity.sprite is not None:
+                    entity.store_position()
+
+    def sync_sprites(self, alpha: float = 1.0) -> None:
+        """
+        Copies positions of entities to their sprites. Called before rendering.
+        :param alpha: Interpolation factor between the positions before the last tick (0) and the current ones (1).
+        """
+        for entity in self.collision_entities:
+            if entity.sprite is not None:
+                entity.sync_sprite(alpha)
+        for entity in self.particles:
+            if entity.sprite is not None:
+                entity.sync_sprite(alpha)
+        self.projectile_system.sync_sprites(alpha)
+
     def render_entity_debug_boxes(self):
-        count = len(self.entities)
-        for i in range(count):
-            x = self.entities[i].rect.x
-            y = self.entities[i].rect.y
-            w = self.entities[i].rect.width
-            h = self.entities[i].rect.height
+        rects = [entity.rect for entity in self.entities] + self.projectile_system.get_rects()
+        for rect in rects:
+            x = rect.x
+            y = rect.y
+            w = rect.width
+            h = rect.height
 
             pyg.gl.glColor3f(1.0, 1.0, 0.0)
             pyg.graphics.draw(4, pyg.gl.GL_LINE_LOOP, ('v2f',
@@ -58,17 +136,91 @@ class EntityManager():
                                                         x + w, y + h,
                                                         x, y + h]))
 
+    @property
+    def entities(self) -> list:
+        """
+        All entities except projectiles, collidable ones first.
+        """
+        return self.collision_entities + self.particles
+
     def add_entity(self, entity: Entity) -> None:
-        self.entities.append(entity)
+        entity.entity_manager = self
+        for listener in self.listeners:
+            listener.entity_added(entity)
+        if isinstance(entity, Projectile):
+            self.projectile_system.add(entity)
+            return
+        if isinstance(entity, Particle):
+            self.particles.append(entity)
+            return
+
+        if isinstance(entity, Collider):
+            self.colliders.append(entity)
+        elif isinstance(entity, Tank):
+            self.tanks.append(entity)
+        else:
+            self.others.append(entity)
+        self.collision_entities.append(entity)
+        if entity.collidable and hasattr(entity, "damage"):
+            self.projectile_targets.append(entity)
+        self.spatial_hash.insert(entity)
+        self.broadphase.entity_added(entity)
 
     def remove_entity(self, entity: Entity) -> None:
         entity.to_remove = True
+        if isinstance(entity, Projectile):
+            self.projectile_system.remove(entity)
+
+    def entity_moved(self, entity: Entity) -> None:
+        """
+        Called by entities whenever their bounding box changes.
+        """
+        self.spatial_hash.update(entity)
+        for listener in self.listeners:
+            listener.entity_moved(entity)
+
+    def get_entities_near(self, rect) -> list:
+        """
+        Returns entities that are potentially intersecting the rectangle.
+        The list is a superset of the actually intersecting entities and is ordered the same way as the entity list.
+        """
+        return self.spatial_hash.query(rect)
+
+    def get_collision_candidates(self, entity: Entity, rect) -> list:
+        """
+        Returns entities that an entity can collide with when placed at the rectangle.
+        During an update the candidates cached by the broadphase are used. Otherwise, or for entities that were
+        added after the broadphase pass, the spatial hash is queried.
+        :param entity: The entity doing the collision check.
+        :param rect: Tested position of the entity, expected to be within a single tick of movement from it.
+        """
+        candidates = self.broadphase.get_candidates(entity)
+        if candidates is None:
+            return self.spatial_hash.query(rect)
+        return candidates
+
+    def detach_all(self) -> list:
+        """
+        Removes all entities from the entity manager without disposing of them.
+        :return: The removed entities in the entity list order followed by projectiles.
+        """
+        detached = self.entities
+        for ent in detached:
+            ent.entity_manager = None
+        detached += self.projectile_system.detach_all()
+
+        for bucket in (self.colliders, self.tanks, self.particles, self.others, self.collision_entities,
+                       self.projectile_targets):
+            bucket.clear()
+        self.spatial_hash.clear()
+        self.broadphase.invalidate()
+        for listener in self.listeners:
+            listener.entities_cleared()
+        return detached
 
     def reset(self) -> None:
         """
         Disposes of all entities in the entity manager.
         """
-        for ent in self.entities:
-            ent.delete()
-
-        self.entities.clear()
\ No newline at end of file
+        for ent in self.detach_all():
+            ent.delete()
\ No newline at end of file
@@ -0,0 +1,248 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, List, Union
+
+if TYPE_CHECKING:
+    from core.stage import Stage
+
+import copy
+
+import numpy as np
+
+from core import constants
+from core.entities.tank.player import Player
+from core.game import Game
+from core.game_state import GameState
+
+OBS_TILES = 0  # constants.TILE_TYPE_* of every cell
+OBS_PLAYER = 1  # Cells covered by the player tank
+OBS_ENEMIES = 2  # Cells covered by enemy tanks
+OBS_PLAYER_PROJECTILES = 3
+OBS_ENEMY_PROJECTILES = 4
+OBS_CHANNELS = 5
+
+
+class BattleCityEnv:
+    """
+    A reinforcement learning environment wrapping a headless game of a single stage.
+
+    The action of a step is a combination of the constants.INPUT_* bits that is fed to the player instead of
+    keyboard input for constants.ENV_TICKS_PER_STEP ticks. The observation is a uint8 array of shape
+    (OBS_CHANNELS, map width, map height) in the map array layout (indexed [x, y]). The first channel holds the tile
+    types, the other channels mark the cells covered by tanks and projectiles.
+
+    Rewards are given for destroyed enemy tanks, lost lives and for the end of the episode, which ends when
+    the stage is cleared, on game over or after max_steps steps.
+    """
+
+    def __init__(self, working_dir: str, stage_index: int = 0, max_steps: int = None,
+                 ticks_per_step: int = constants.ENV_TICKS_PER_STEP, stages: List[Stage] = None):
+        """
+        :param working_dir: Directory containing the res and stages directories.
+        :param stage_index: Index of the stage to play.
+        :param max_steps: Step limit of an episode, None for no limit.
+        :param ticks_per_step: Number of game ticks a step simulates.
+        :param stages: Already loaded stages, they are shallow copied so that the stage files don't have to be
+        parsed again. Their map data is shared, the game never modifies it.
+        """
+        if stages is None:
+            self.game = Game(working_dir, headless=True)
+        else:
+            self.game = Game(working_dir, test_only=True, headless=True)
+            self.game.game_director.stages = [copy.copy(stage) for stage in stages]
+        self.stage_index = stage_index
+        self.max_steps = max_steps
+        self.ticks_per_step = ticks_per_step
+        self.steps = 0
+        self._stage = None
+        self._tanks_left = 0
+        self._lives = 0
+
+    @property
+    def observation_shape(self) -> tuple:
+        stage = self.game.game_director.stages[self.stage_index]
+        return OBS_CHANNELS, stage.map_data["width"], stage.map_data["height"]
+
+    def reset(self, seed: int = None, out: np.ndarray = None) -> np.ndarray:
+        """
+        Starts a new episode.
+        :param seed: Seed of the game random number generator, None to draw one from the previous episode.
+        :param out: Array to write the observation into, a new one is created if None.
+        :return: The first observation.
+        """
+        self._start(seed)
+        return self.observe(out)
+
+    def _start(self, seed: Union[int, None]) -> None:
+        game = self.game
+        game.start_stage(self.stage_index, seed)
+        self.steps = 0
+        self._stage = game.game_director.stage
+        self._tanks_left = self._count_tanks_left()
+        self._lives = self._stage.active_player_lives
+
+    def step(self, action: int, out: np.ndarray = None) -> tuple:
+        """
+        Runs a step of the episode. The episode has to be reset again once it is done.
+        :param action: Combination of the constants.INPUT_* bits.
+        :param out: Array to write the observation into, a new one is created if None.
+        :return: (observation, reward, done, info), info holds the "outcome" ("win", "loss" or "timeout")
+        once the episode is done.
+        """
+        reward, outcome = self._advance(action)
+        info = {} if outcome is None else {"outcome": outcome}
+        return self.observe(out), reward, outcome is not None, info
+
+    def _advance(self, action: int) -> tuple:
+        """
+        Simulates the ticks of a step.
+        :return: (reward, outcome), outcome is None while the episode goes on.
+        """
+        game = self.game
+        director = game.game_director
+        stage = self._stage
+        action = int(action)
+
+        outcome = None
+        for i in range(self.ticks_per_step):
+            player = director.player
+            if player is not None:
+                player.scripted_input = action
+            game.update(0)
+            # A cleared stage immediately loads the next one (or finishes the game after the last one)
+            if director.stage is not stage or game.game_state == GameState.GAME_FINISHED:
+                outcome = "win"
+                break
+            if game.game_state != GameState.GAME:
+                outcome = "loss"
+                break
+        self.steps += 1
+
+        reward = 0.0
+        if outcome == "win":
+            reward += constants.ENV_REWARD_KILL * self._tanks_left + constants.ENV_REWARD_WIN
+        else:
+            tanks_left = self._count_tanks_left()
+            reward += constants.ENV_REWARD_KILL * (self._tanks_left - tanks_left)
+            reward += constants.ENV_REWARD_LIFE_LOST * (self._lives - stage.active_player_lives)
+            self._tanks_left = tanks_left
+            self._lives = stage.active_player_lives
+            if outcome == "loss":
+                reward += constants.ENV_REWARD_LOSS
+            elif self.max_steps is not None and self.steps >= self.max_steps:
+                outcome = "timeout"
+
+        return reward, outcome
+
+    def _count_tanks_left(self) -> int:
+        director = self.game.game_director
+        return self._stage.active_tanks + len(director.spawned_tanks) + len(director.spawned_blings)
+
+    def observe(self, out: np.ndarray = None) -> np.ndarray:
+        """
+        Writes the observation of the current state.
+        :param out: Array to write the observation into, a new one is created if None.
+        """
+        if out is None:
+            out = np.zeros((OBS_CHANNELS,) + self.game.game_map.tile_types.shape, dtype=np.uint8)
+        _observe_games([self.game], out[None])
+        return out
+
+
+def _observe_games(games: List[Game], out: np.ndarray) -> None:
+    """
+    Writes the observations of several games into a batch array. Tanks and projectiles of all the games are
+    gathered into arrays first and rasterized into the batch together.
+    :param games: Games with maps of the same size.
+    :param out: Array of shape (len(games), OBS_CHANNELS, map width, map height).
+    """
+    out[:, OBS_TILES + 1:] = 0
+    tanks = []  # Game index, channel, bounding box
+    projectiles = []  # Game index, projectile system
+    for i, game in enumerate(games):
+        out[i, OBS_TILES] = game.game_map.tile_types
+        for tank in game.entity_manager.tanks:
+            rect = tank.rect
+            tanks.append((i, OBS_PLAYER if isinstance(tank, Player) else OBS_ENEMIES,
+                          rect.x, rect.y, rect.width, rect.height))
+        if game.entity_manager.projectile_system.count > 0:
+            projectiles.append((i, game.entity_manager.projectile_system))
+    shape = np.array(out.shape[2:])
+
+    if tanks:
+        tanks = np.array(tanks)
+        min_cells = np.maximum(tanks[:, 2:4] // constants.TILE_SIZE, 0)
+        max_cells = np.minimum((tanks[:, 2:4] + tanks[:, 4:6] - 1) // constants.TILE_SIZE, shape - 1)
+        spans = max_cells - min_cells + 1
+        offsets_x = np.arange(max(1, spans[:, 0].max()))[None, :, None]
+        offsets_y = np.arange(max(1, spans[:, 1].max()))[None, None, :]
+        covered = (offsets_x < spans[:, 0, None, None]) & (offsets_y < spans[:, 1, None, None])
+        games_index, channels, cells_x, cells_y = np.broadcast_arrays(
+            tanks[:, 0, None, None], tanks[:, 1, None, None],
+            min_cells[:, 0, None, None] + offsets_x, min_cells[:, 1, None, None] + offsets_y)
+        out[games_index[covered], channels[covered], cells_x[covered], cells_y[covered]] = 1
+
+    if projectiles:
+        games_index = np.concatenate([np.full(system.count, i) for i, system in projectiles])
+        centers = np.concatenate([system.positions[:system.count] + system.sizes[:system.count] // 2
+                                  for i, system in projectiles])
+        player_owned = np.array([projectile.player_owned for i, system in projectiles
+                                 for projectile in system.projectiles[:system.count]], dtype=bool)
+        cells = np.clip(centers // constants.TILE_SIZE, 0, shape - 1)
+        channels = np.where(player_owned, OBS_PLAYER_PROJECTILES, OBS_ENEMY_PROJECTILES)
+        out[games_index, channels, cells[:, 0], cells[:, 1]] = 1
+
+
+class VectorEnv:
+    """
+    Steps several independent environments of the same stage in lockstep.
+
+    The games themselves are plain Python and are simulated one after the other, only the observations are built
+    for all environments together: their tanks and projectiles are rasterized in a single pass straight into one
+    preallocated batch array. Rewards and done flags are returned as arrays. Stage files are parsed only once and
+    shared by all environments. Environments that finish their episode are reset right away, the observation
+    returned for them is the first one of the new episode and the info of the finished episode holds its final
+    observation under "final_observation".
+    """
+
+    def __init__(self, working_dir: str, count: int, stage_index: int = 0, max_steps: int = None,
+                 ticks_per_step: int = constants.ENV_TICKS_PER_STEP):
+        first = BattleCityEnv(working_dir, stage_index, max_steps, ticks_per_step)
+        stages = first.game.game_director.stages
+        self.envs = [first] + [BattleCityEnv(working_dir, stage_index, max_steps, ticks_per_step, stages)
+                               for i in range(count - 1)]
+        self.games = [env.game for env in self.envs]
+        self.observations = np.zeros((count,) + first.observation_shape, dtype=np.uint8)
+        self.rewards = np.zeros(count, dtype=np.float32)
+        self.dones = np.zeros(count, dtype=bool)
+
+    def reset(self, seed: Union[int, None] = None) -> np.ndarray:
+        """
+        Resets all environments.
+        :param seed: Seed of the first environment, the following ones get consecutive seeds. None for random seeds.
+        :return: Batch of observations of shape (count, OBS_CHANNELS, width, height). The array is reused by
+        the following calls.
+        """
+        for i, env in enumerate(self.envs):
+            env._start(None if seed is None else seed + i)
+        _observe_games(self.games, self.observations)
+        return self.observations
+
+    def step(self, actions) -> tuple:
+        """
+        Steps all environments.
+        :param actions: One action per environment, combinations of the constants.INPUT_* bits.
+        :return: (observations, rewards, dones, infos). The arrays are reused by the following calls.
+        """
+        actions = np.asarray(actions).tolist()
+        infos = []
+        for i, env in enumerate(self.envs):
+            reward, outcome = env._advance(actions[i])
+            self.rewards[i] = reward
+            self.dones[i] = outcome is not None
+            infos.append({} if outcome is None else {"outcome": outcome})
+        _observe_games(self.games, self.observations)
+
+        for i in np.flatnonzero(self.dones).tolist():
+            infos[i]["final_observation"] = self.observations[i].copy()
+            self.envs[i].reset(out=self.observations[i])
+        return self.observations, self.rewards, self.dones, infos
@@ -0,0 +1,159 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    from core.map import Map
+
+import heapq
+
+import numpy as np
+
+from core import constants
+
+UNREACHABLE = 2 ** 30
+
+NEIGHBOURS = ((0, 1), (-1, 0), (0, -1), (1, 0))
+
+
+class FlowField:
+    """
+    Distances of tank positions to the flag shared by all AI tanks.
+
+    Positions are 2x2 blocks of cells identified by their bottom left cell, like Map.walkable. A block containing
+    an indestructible wall or a part of the flag, or reaching out of the map, can't be entered. Entering other blocks
+    costs 1 plus constants.FLOW_FIELD_WALL_COST for every destructible wall cell in them, as the walls have to be shot
+    through first. self.distances holds, in the map array layout, the cheapest cost of getting from every block next
+    to a block touching the flag, UNREACHABLE where there is no way. A tank moves towards the flag by stepping to
+    the neighbouring block with the lowest distance.
+
+    The field is computed with a single Dijkstra pass from the flag when a map is loaded. Removing tiles only ever
+    makes blocks cheaper, so when walls are destroyed only the blocks containing them are re-priced and the
+    improvement is propagated as far as it reaches instead of recomputing the whole field.
+    """
+
+    def __init__(self, game_map: Map):
+        self.game_map = game_map
+        self.costs: np.ndarray = None  # Cost of entering every block, UNREACHABLE for blocks that can't be entered
+        self.distances: np.ndarray = None
+        self._flag = None  # Bool array of cells covered by the flag
+        self._near_flag = None  # Bool array of blocks one step from overlapping the flag
+        game_map.tile_listeners.append(self)
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """
+        Recomputes the whole field from the map.
+        """
+        game_map = self.game_map
+        if game_map.tile_types is None:
+            self.costs = self.distances = self._flag = self._near_flag = None
+            return
+
+        shape = game_map.tile_types.shape
+        self._flag = game_map.tile_types == constants.TILE_TYPE_FLAG
+        flag_tiles = set(game_map.map[self._flag].tolist())
+        for cell, tile in game_map.covered_cells.items():
+            if tile in flag_tiles:
+                self._flag[cell] = True
+
+        overlaps_flag = np.zeros(shape, dtype=bool)
+        overlaps_flag[:-1, :-1] = self._block_sum(self._flag) > 0
+        self._near_flag = np.zeros(shape, dtype=bool)
+        self._near_flag[1:] |= overlaps_flag[:-1]
+        self._near_flag[:-1] |= overlaps_flag[1:]
+        self._near_flag[:, 1:] |= overlaps_flag[:, :-1]
+        self._near_flag[:, :-1] |= overlaps_flag[:, 1:]
+
+        self.costs = np.full(shape, UNREACHABLE, dtype=np.int32)
+        self._update_costs(0, shape[0], 0, shape[1])
+        self.distances = np.full(shape, UNREACHABLE, dtype=np.int32)
+        queue = []
+        for x, y in np.argwhere(self._near_flag & (self.costs < UNREACHABLE)).tolist():
+            self.distances[x, y] = self.costs[x, y]
+            queue.append((int(self.costs[x, y]), x, y))
+        heapq.heapify(queue)
+        self._propagate(queue)
+
+    def distance(self, x: int, y: int) -> int:
+        """
+        :return: Distance of the block with the bottom left cell at the given indexes, UNREACHABLE out of the map.
+        """
+        if self.distances is None or x < 0 or y < 0 or x >= self.distances.shape[0] or y >= self.distances.shape[1]:
+            return UNREACHABLE
+        return int(self.distances[x, y])
+
+    @staticmethod
+    def _block_sum(mask: np.ndarray) -> np.ndarray:
+        """
+        Counts the cells of mask in every block of 2x2 cells, the result is one cell smaller in both dimensions.
+        """
+        mask = mask.astype(np.int32)
+        return mask[:-1, :-1] + mask[1:, :-1] + mask[:-1, 1:] + mask[1:, 1:]
+
+    def _update_costs(self, x: int, x_end: int, y: int, y_end: int) -> None:
+        """
+        Recomputes the costs of the blocks in an area, the area is clipped to blocks within the map.
+        Only the cells of the area and one more row and column are looked at.
+        """
+        tile_types = self.game_map.tile_types
+        x_end = min(x_end, tile_types.shape[0] - 1)
+        y_end = min(y_end, tile_types.shape[1] - 1)
+        if x >= x_end or y >= y_end:
+            return
+        cells = tile_types[x:x_end + 1, y:y_end + 1]
+        blocked = self._block_sum((cells == constants.TILE_TYPE_WALL) | self._flag[x:x_end + 1, y:y_end + 1]) > 0
+        walls = self._block_sum(cells == constants.TILE_TYPE_DESTRUCTIBLE_WALL)
+        self.costs[x:x_end, y:y_end] = np.where(blocked, UNREACHABLE, 1 + walls * constants.FLOW_FIELD_WALL_COST)
+
+    def _propagate(self, queue: list) -> None:
+        """
+        Dijkstra from the blocks in the queue, whose distances are already set.
+        """
+        costs = self.costs
+        distances = self.distances
+        width, height = distances.shape
+        while queue:
+            distance, x, y = heapq.heappop(queue)
+            if distance > distances[x, y]:
+                continue
+            for dx, dy in NEIGHBOURS:
+                nx = x + dx
+                ny = y + dy
+                if nx < 0 or ny < 0 or nx >= width or ny >= height or costs[nx, ny] == UNREACHABLE:
+                    continue
+                new_distance = distance + int(costs[nx, ny])
+                if new_distance < distances[nx, ny]:
+                    distances[nx, ny] = new_distance
+                    heapq.heappush(queue, (new_distance, nx, ny))
+
+    # Map listener
+
+    def map_loaded(self, game_map: Map) -> None:
+        self.rebuild()
+
+    def tile_removed(self, game_map: Map, cells: List[tuple]) -> None:
+        if self.costs is None or any(self._flag[cell] for cell in cells):
+            self.rebuild()
+            return
+
+        queue = []
+        for x, y in cells:
+            # Blocks containing the cell start at most one cell to the left and below it
+            min_x, min_y = max(0, x - 1), max(0, y - 1)
+            old_costs = self.costs[min_x:x + 1, min_y:y + 1].copy()
+            self._update_costs(min_x, x + 1, min_y, y + 1)
+            for bx, by in np.argwhere(self.costs[min_x:x + 1, min_y:y + 1] < old_costs).tolist():
+                bx += min_x
+                by += min_y
+                if self._near_flag[bx, by]:
+                    best = 0
+                else:
+                    best = min(self.distance(bx + dx, by + dy) for dx, dy in NEIGHBOURS)
+                if best == UNREACHABLE:
+                    continue
+                distance = best + int(self.costs[bx, by])
+                if distance < self.distances[bx, by]:
+                    self.distances[bx, by] = distance
+                    queue.append((distance, bx, by))
+        heapq.heapify(queue)
+        self._propagate(queue)
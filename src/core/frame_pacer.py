@@ -0,0 +1,109 @@
+import time
+from collections import deque
+
+import numpy as np
+
+from core import constants
+
+
+class FramePacer:
+    """
+    Waits for frame deadlines with a hybrid sleep and spin.
+
+    time.sleep() alone wakes up too late by an unpredictable amount (often more than a millisecond) and a pure busy
+    loop keeps a whole cpu core occupied. The pacer sleeps until a margin before the deadline and spins only for
+    the rest. The margin is calibrated from how late recent sleeps actually woke up. A high percentile
+    of their overshoot is used instead of the maximum, so a rare scheduler hiccup costs one late frame instead of
+    turning the pacer into a busy loop.
+
+    Every wait records the wake-up error (how late the pacer returned after the deadline) and the resulting frame
+    time so that the pacing quality can be inspected with jitter_percentiles().
+    """
+
+    def __init__(self, frame_time: float = 1 / constants.RENDER_FPS,
+                 spin_margin: float = constants.PACER_INITIAL_SPIN_MARGIN,
+                 history: int = constants.PACER_HISTORY):
+        """
+        :param frame_time: Target frame time in seconds.
+        :param spin_margin: Initial time in seconds before the deadline at which sleeping stops.
+        :param history: Number of frames the statistics are kept for.
+        """
+        self.frame_time = frame_time
+        self.spin_margin = spin_margin
+        self.sleep_overshoots = deque(maxlen=constants.PACER_CALIBRATION_SAMPLES)  # Seconds sleeps woke up late
+        self.wake_errors = deque(maxlen=history)  # Seconds the pacer returned after the deadline
+        self.frame_times = deque(maxlen=history)  # Seconds between consecutive returns
+        self._deadline = None
+        self._last_frame = None
+
+    def calibrate(self, samples: int = 20, sleep_time: float = 0.001) -> float:
+        """
+        Measures how late short sleeps wake up and derives the spin margin from it.
+        :return: The new spin margin in seconds.
+        """
+        for i in range(samples):
+            start = time.perf_counter()
+            time.sleep(sleep_time)
+            self.sleep_overshoots.append(time.perf_counter() - start - sleep_time)
+        self._update_spin_margin()
+        return self.spin_margin
+
+    def _update_spin_margin(self) -> None:
+        overshoot = np.percentile(self.sleep_overshoots, constants.PACER_MARGIN_PERCENTILE)
+        self.spin_margin = min(max(overshoot, 0.0) * constants.PACER_MARGIN_SAFETY, self.frame_time)
+
+    def wait(self) -> float:
+        """
+        Blocks until the next frame deadline.
+        When the caller fell behind by more than a whole frame the missed deadlines are skipped instead of being
+        rushed through.
+        :return: Time since the previous wait() returned in seconds (the frame time of the frame that ends now).
+        """
+        now = time.perf_counter()
+        if self._deadline is None:
+            self._deadline = now
+            self._last_frame = now
+        elif now > self._deadline + self.frame_time:
+            self._deadline = now
+
+        sleep_until = self._deadline - self.spin_margin
+        if now < sleep_until:
+            time.sleep(sleep_until - now)
+            self.sleep_overshoots.append(time.perf_counter() - sleep_until)
+            self._update_spin_margin()
+
+        now = time.perf_counter()
+        while now < self._deadline:
+            now = time.perf_counter()
+
+        self.wake_errors.append(now - self._deadline)
+        dt = now - self._last_frame
+        self.frame_times.append(dt)
+        self._last_frame = now
+        self._deadline += self.frame_time
+        return dt
+
+    def jitter_percentiles(self, percentiles=(50, 90, 99)) -> dict:
+        """
+        Returns percentiles of the recorded wake-up errors and of the deviation of frame times from the target,
+        both in milliseconds.
+        :param percentiles: Percentiles to compute.
+        :return: {"wake_error": {percentile: ms}, "frame_jitter": {percentile: ms}}, empty if nothing was recorded.
+        """
+        if not self.wake_errors:
+            return {}
+        wake_errors = np.percentile(np.array(self.wake_errors) * 1000, percentiles)
+        # The first recorded frame time includes the time before pacing started
+        frame_jitter = np.percentile(np.abs(np.array(self.frame_times)[1:] - self.frame_time) * 1000
+                                     if len(self.frame_times) > 1 else [0.0], percentiles)
+        return {"wake_error": dict(zip(percentiles, wake_errors.tolist())),
+                "frame_jitter": dict(zip(percentiles, frame_jitter.tolist()))}
+
+    def reset(self) -> None:
+        """
+        Forgets the deadline and the statistics, the next wait() returns immediately.
+        """
+        self._deadline = None
+        self._last_frame = None
+        self.wake_errors.clear()
+        self.frame_times.clear()
@@ -1,28 +1,39 @@
+import random
 import time
 
 import pyglet as pyg
-from pyglet.gl import *
 
 from core import constants
+from core.frame_pacer import FramePacer
 from core.entities.tank.player import Player
 from core.game_director import GameDirector
 from core.game_state import GameState
-from core.game_window import GameWindow
 from core.map import Map
+from core.replay import Replay
+from core.shared_state import SharedStatePublisher
 from core.stage import Stage
 from core.texture_manager import TextureManager
 from core.entity_manager import EntityManager
-from core.ui import UI
 
 
 class Game:
     """
     Main game class. Houses game systems, handles the game window and the game-loop / game-state.
+
+    A headless game has no window, no rendering and no OpenGL context. Textures are only read for their dimensions
+    and entities are created without sprites. The caller drives the game by calling update() directly.
     """
 
-    def __init__(self, working_dir, test_only=False):
+    def __init__(self, working_dir, test_only=False, headless=False, seed=None):
+        """
+        :param working_dir: Directory containing the res and stages directories.
+        :param test_only: Only initialise the game systems, without loading stages or opening a window.
+        :param headless: Run the simulation without any rendering.
+        :param seed: Seed of the game random number generator, None for a random seed.
+        """
         self.debug = False
         self.test_only = test_only
+        self.headless = headless
         self.mouse_pos = (0, 0)
         self.tick = 0
         self.timer = -1
@@ -30,20 +41,41 @@ class Game:
         self._shutdown = False
         self.show_fps = False
         self.draw_bounding_boxes = False
+        self.ticks_per_frame = 1  # Turbo mode runs more than one tick per frame
+        self.frame_time_budget = None  # Seconds, when set a frame runs as many ticks as fit into it
+        self.accumulator = 0.0  # Elapsed time not yet simulated by ticks
+        self.render_alpha = 1.0  # How far the rendered frame is between the last two ticks
+        self.interpolate = not headless  # Whether entity positions before each tick are kept for rendering
+
+        # All game randomness comes from this generator so that a match can be reproduced from its seed
+        self.rng = random.Random(seed)
+        self.stage_seed = None  # Seed the rng was reset to when the current stage started
+        self.record_replays = False  # Whether matches started from the main menu get recorded
+        self.replay: Replay = None  # Replay being recorded or played back
+        self.state_publisher: SharedStatePublisher = None  # Publishes the world state to other processes every tick
 
         # Texture loading
-        glEnable(GL_TEXTURE_2D)  # just in case
+        if headless:
+            pyg.options['shadow_window'] = False
+        else:
+            pyg.gl.glEnable(pyg.gl.GL_TEXTURE_2D)  # just in case
         TextureManager.init(working_dir + "/res")
-        TextureManager.load()
+        TextureManager.load(headless)
 
-        # Game systems init
-        self.batch = pyg.graphics.Batch()
-        self.background_batch = pyg.graphics.Batch()
-        self.foreground_batch = pyg.graphics.Batch()
+        # Game systems init, entities created without a batch don't get a sprite
+        self.batch = None
+        self.background_batch = None
+        self.foreground_batch = None
+        self.ui = None
+        if not headless:
+            from core.ui import UI
+            self.batch = pyg.graphics.Batch()
+            self.background_batch = pyg.graphics.Batch()
+            self.foreground_batch = pyg.graphics.Batch()
+            self.ui = UI()
         self.entity_manager = EntityManager()
-        self.game_director = GameDirector(self)
         self.game_map = Map()
-        self.ui = UI()
+        self.game_director = GameDirector(self)
 
         self.game_state = GameState.MAIN_MENU
 
@@ -53,7 +85,11 @@ class Game:
         # Game director init
         self.game_director.init(working_dir)
 
+        if headless:
+            return
+
         # Game window
+        from core.game_window import GameWindow
         self.window = GameWindow(self,
                                  self.game_director.stage.map_data["pixel_width"]
                                  + constants.UI_SIDE_PANEL_SIZE,
@@ -63,19 +99,55 @@ class Game:
         # Map load
         # self.game_director.load_stage(1, self)
 
-        # Game start
-        pyg.clock.schedule_interval(self.update, 1 / constants.FPS)  # Was creating inconsistent fps
+    def run(self, pacer: FramePacer = None) -> None:
+        """
+        Runs the game until it is shut down.
+        :param pacer: When set the game runs its own loop paced by it instead of the pyglet event loop.
+        """
+        if pacer is None:
+            pyg.clock.schedule_interval(self.run_frame, 1 / constants.RENDER_FPS)
+            pyg.app.run()
+            return
+
+        pacer.reset()
+        while self.running:
+            dt = pacer.wait()
+            pyg.clock.tick()  # Other scheduled callbacks (sprite animations)
+            if not self.headless:
+                self.window.dispatch_events()
+                if not self.running:
+                    break
+            self.run_frame(dt)
+            if not self.headless:
+                self.window.switch_to()
+                self.window.dispatch_event("on_draw")
+                self.window.flip()
 
     def main_menu(self):
         self.game_state = GameState.MAIN_MENU
-        self.window.main_menu_label = pyglet.text.Label('Press <ENTER> to start',
-                                                        font_name='Monospaced',
-                                                        font_size=24,
-                                                        x=self.window.width // 2, y=self.window.height // 2,
-                                                        anchor_x='center', anchor_y='center')
+        if self.headless:
+            return
+        self.window.main_menu_label = pyg.text.Label('Press <ENTER> to start',
+                                                     font_name='Monospaced',
+                                                     font_size=24,
+                                                     x=self.window.width // 2, y=self.window.height // 2,
+                                                     anchor_x='center', anchor_y='center')
+
+    def start_stage(self, index: int, seed: int = None):
+        """
+        Starts a stage. The random number generator is reset to a new seed, either the passed one or one drawn
+        from the generator itself, so every stage can be reproduced on its own.
+        Seeds are stored in replays and snapshots as 32 bit unsigned integers, passed seeds are reduced to their
+        lowest 32 bits.
+        """
+        new_match = self.game_state != GameState.STAGE_CLEAR
+        self.stage_seed = seed & 0xFFFFFFFF if seed is not None else self.rng.getrandbits(32)
+        self.rng.seed(self.stage_seed)
+        if self.record_replays and new_match:
+            self.replay = Replay(self.stage_seed, index)
 
-    def start_stage(self, index: int):
         self.game_state = GameState.GAME
+        self.timer = -1
         self.entity_manager.reset()
         self.game_director.reset()
         self.game_director.load_stage(index, self)
@@ -86,7 +158,9 @@ class Game:
             self.start_stage(stage.index + 1)
         else:
             self.game_state = GameState.GAME_FINISHED
-            self.window.game_finished_label = pyglet.text.Label(
+            if self.headless:
+                return
+            self.window.game_finished_label = pyg.text.Label(
                 'All stages completed! <ENTER>',
                 font_name='Monospaced',
                 font_size=22,
@@ -103,23 +177,89 @@ class Game:
         else:
             self.timer -= 1
 
+    def run_frame(self, dt: float) -> int:
+        """
+        Runs the game ticks of a single frame.
+
+        Ticks have a fixed length of constants.TICK_TIME. The time of a frame is added to an accumulator and
+        as many ticks are run as fit into it, so late frames catch up with multiple ticks. Catching up is limited to
+        constants.MAX_CATCH_UP_TICKS, time beyond that is dropped so a slow machine doesn't fall further and further
+        behind. The remaining fraction of a tick decides how far sprites get interpolated between the last two ticks.
+
+        In turbo mode a frame runs either self.ticks_per_frame ticks or as many ticks as fit into
+        self.frame_time_budget regardless of the elapsed time, and is rendered without interpolation.
+
+        Frames are started either by the pyglet clock at constants.RENDER_FPS or by a FramePacer (see run()),
+        which sleeps for most of the frame and busy waits only for the last moment. The pyglet callbacks are only
+        used to measure the elapsed time, so late callbacks no longer slow the game down.
+        :param dt: Time since the last frame in seconds.
+        :return: Number of ticks ran.
+        """
+        if self.frame_time_budget is not None:
+            self.render_alpha = 1.0
+            deadline = time.perf_counter() + self.frame_time_budget
+            ticks = 0
+            while True:
+                self.update(constants.TICK_TIME)
+                ticks += 1
+                if time.perf_counter() >= deadline or not self._simulating():
+                    return ticks
+
+        if self.ticks_per_frame > 1:
+            self.render_alpha = 1.0
+            self.accumulator = 0.0
+            ticks = self.ticks_per_frame
+        else:
+            self.accumulator = min(self.accumulator + dt, constants.MAX_CATCH_UP_TICKS * constants.TICK_TIME)
+            ticks = int(self.accumulator / constants.TICK_TIME)
+            self.accumulator -= ticks * constants.TICK_TIME
+            self.render_alpha = self.accumulator / constants.TICK_TIME
+
+        for i in range(ticks):
+            self.update(constants.TICK_TIME)
+            if not self._simulating():
+                self.render_alpha = 1.0
+                return i + 1
+        return ticks
+
+    def _simulating(self) -> bool:
+        return self.game_state in [GameState.GAME, GameState.GAME_OVER]
+
+    def toggle_turbo(self) -> None:
+        """
+        Switches between running one tick per frame and constants.TURBO_TICKS_PER_FRAME ticks per frame.
+        """
+        self.frame_time_budget = None
+        if self.ticks_per_frame == 1:
+            self.ticks_per_frame = constants.TURBO_TICKS_PER_FRAME
+        else:
+            self.ticks_per_frame = 1
+
     def update(self, dt: float) -> None:
         """
         Game loop update method.
         """
-        if self.game_state in [GameState.GAME, GameState.GAME_OVER]:
+        if self._simulating():
             if self.game_state == GameState.GAME:
+                self.game_director.ai_scheduler.update(self)
                 self.entity_manager.update_entities(self, self.tick)
             self.game_director.update(self)
+            if self.replay is not None and not self.replay.playing:
+                self.replay.ticks += 1
+            if self.state_publisher is not None:
+                self.state_publisher.publish()
 
-        self.ui.update(self)
+        if self.ui is not None:
+            self.ui.update(self)
         self.tick += 1
 
     def register_player(self, player: Player) -> Player:
         """
         Registers players key handler to receive input.
         """
-        if not self.test_only:
+        if not self.test_only and not self.headless:
+            from pyglet.window import key
+            player.key_handler = key.KeyStateHandler()
             self.window.push_handlers(player)
             self.window.push_handlers(player.key_handler)
 
@@ -131,7 +271,8 @@ class Game:
         """
         self._shutdown = True
         self.running = False
-        self.window.close()
+        if not self.headless:
+            self.window.close()
 
     @staticmethod
     def system_millis() -> float:
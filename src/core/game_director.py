@@ -2,7 +2,6 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, List, Type
 
 import os
-import random
 
 from core import utils, constants
 from core.entities.particles.bling import Bling
@@ -12,6 +11,8 @@ from core.game_state import GameState
 from core.stage import Stage
 from core.entities.map.flag import Flag
 from core.entities.tank.player import Player
+from core.flow_field import FlowField
+from core.ai_scheduler import AIScheduler
 
 if TYPE_CHECKING:
     from core.game import Game
@@ -29,6 +30,8 @@ class GameDirector:
         self.player_spawn_point = None
         self.stage: Stage = None
         self.stages: List[Stage] = None
+        self.flow_field = FlowField(game.game_map)  # Paths to the flag shared by all AI tanks
+        self.ai_scheduler = AIScheduler()
 
         self.spawn_cooldown = 0
         self.spawned_tanks = []
@@ -43,6 +46,7 @@ class GameDirector:
         self.spawn_cooldown = 0
         self.spawned_tanks = []
         self.spawned_blings = []
+        self.player_bling = None
 
     def update(self, game: Game):
         # Tank spawning
@@ -72,7 +76,7 @@ class GameDirector:
         self.update_tank_spawns(game)
 
         if self.spawn_cooldown <= 0:
-            self.spawn_cooldown = random.random() * constants.NEW_TANK_SPAWN_MAX_COOLDOWN
+            self.spawn_cooldown = game.rng.random() * constants.NEW_TANK_SPAWN_MAX_COOLDOWN
         self.spawn_cooldown -= 1
 
         if self.player_bling is not None:
@@ -85,24 +89,14 @@ class GameDirector:
                 self.player_bling = None
 
     def update_tank_spawns(self, game: Game):
-        to_remove = []
-        for bling in self.spawned_blings:
-            if bling.dead:
-                to_remove.append(bling)
-                computer = Computer(x=bling.rect.x + constants.TANK_SIZE // 2,
-                                    y=bling.rect.y + constants.TANK_SIZE // 2,
-                                    batch=game.batch)
-                game.entity_manager.add_entity(computer)
-                self.spawned_tanks.append(computer)
-        for bling in to_remove:
-            self.spawned_blings.remove(bling)
-
-        to_remove.clear()
-        for tank in self.spawned_tanks:
-            if tank.health <= 0:
-                to_remove.append(tank)
-        for tank in to_remove:
-            self.spawned_tanks.remove(tank)
+        for bling in utils.compact_list(self.spawned_blings, lambda bling: bling.dead):
+            computer = Computer(x=bling.rect.x + constants.TANK_SIZE // 2,
+                                y=bling.rect.y + constants.TANK_SIZE // 2,
+                                batch=game.batch)
+            game.entity_manager.add_entity(computer)
+            self.spawned_tanks.append(computer)
+
+        utils.compact_list(self.spawned_tanks, lambda tank: tank.health <= 0)
 
     def trigger_tank_spawn(self, game: Game):
         map_width = game.game_map.map_data["width"]
@@ -119,22 +113,12 @@ class GameDirector:
                 potential_spawn_points.append((x, y))
 
         for i in range(0, 100):
-            spawn_pos = random.choice(potential_spawn_points)
+            spawn_pos = game.rng.choice(potential_spawn_points)
 
             if utils.manhattan_distance(flag_pos, spawn_pos) < (map_width + map_height)/2/1.8:
                 continue
 
-            tiles = []
-            tile = game.game_map.get_tile_at_indexes(spawn_pos[0], spawn_pos[1])
-            tiles.append(tile is None or tile.collidable == False)
-            tile = game.game_map.get_tile_at_indexes(spawn_pos[0] + 1, spawn_pos[1])
-            tiles.append(tile is None or tile.collidable == False)
-            tile = game.game_map.get_tile_at_indexes(spawn_pos[0] + 1, spawn_pos[1] + 1)
-            tiles.append(tile is None or tile.collidable == False)
-            tile = game.game_map.get_tile_at_indexes(spawn_pos[0], spawn_pos[1] + 1)
-            tiles.append(tile is None or tile.collidable == False)
-
-            if not all(tiles):
+            if not game.game_map.area_free(spawn_pos[0], spawn_pos[1], 2, 2):
                 continue
 
             self.stage.active_tanks -= 1
@@ -154,7 +138,8 @@ class GameDirector:
         if self.stages[index] is not None:
             self.stages[index].load(self.game)
             self.stage = self.stages[index]
-            self.adjust_game_window(self.stage, game)
+            if not game.headless:
+                self.adjust_game_window(self.stage, game)
         else:
             raise RuntimeError(f"Stage {index} failed to load!")
 
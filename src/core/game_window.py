@@ -53,6 +53,7 @@ class GameWindow(pyg.window.Window):
                 self.map_background_rect.height = self.game.game_map.map_data["pixel_height"]
                 self.map_background_rect.draw()
 
+            self.game.entity_manager.sync_sprites(self.game.render_alpha)
             self.game.background_batch.draw()
             self.game.batch.draw()
             self.game.foreground_batch.draw()
@@ -81,6 +82,8 @@ class GameWindow(pyg.window.Window):
             self.game.show_fps = not self.game.show_fps
         if symbol == key.F3:
             self.game.draw_bounding_boxes = not self.game.draw_bounding_boxes
+        if symbol == key.F4:
+            self.game.toggle_turbo()
 
         if symbol == key.ESCAPE:
             self.game.shutdown()
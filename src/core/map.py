@@ -19,6 +19,15 @@ from core.entities.map.wall import Wall
 from core.entities.map.collider import Collider
 from core.entities.tank.player import Player
 
+SYMBOL_TILE_TYPES = {
+    "#": constants.TILE_TYPE_DESTRUCTIBLE_WALL,
+    "$": constants.TILE_TYPE_WALL,
+    "+": constants.TILE_TYPE_BUSH,
+    "F": constants.TILE_TYPE_FLAG,
+}  # Stage file symbols of map tiles
+
+FLAG_VISIBILITY_DIRECTIONS = {(0, 1): 0, (-1, 0): 1, (0, -1): 2, (1, 0): 3}  # Direction -> index in Map.flag_visible
+
 
 class Map:
     """
@@ -28,22 +37,45 @@ class Map:
     Note: In self.map array, entities can be accessed with map[x, y] despite the the fact the numpy
     arrays are indexed [row, column]. This means the array itself doesn't look like the map on screen.
     Map slicing is inclusive from the BOTTOM_LEFT corner instead of TOP_LEFT.
+
+    Alongside the object array the map keeps compact arrays of the same shape. self.tile_types holds the
+    constants.TILE_TYPE_* of every cell and self.collidable marks cells occupied or covered by a collidable tile.
+    self.walkable marks cells where a tank sized 2x2 block of cells starting at the cell (extending to the right and up)
+    lies within the map and contains no collidable tile.
+    self.flag_visible tells for every tank position (the bottom left cell) and direction whether the flag is within
+    the full tile ray of constants.AI_VISION_TILE_RANGE the AI looks along (see flag_visible_from).
+    Queries that only need to know what is where should use those instead of unboxing the tile objects.
     """
 
     def __init__(self):
         self.map: np.ndarray = None
         self.map_data: dict = None
+        self.covered_cells = {}  # Cell indexes -> tile that is bigger than a single tile and reaches into the cell
+        self.tile_types: np.ndarray = None  # Uint8 array of tile types
+        self.collidable: np.ndarray = None  # Bool array, True for cells occupied or covered by a collidable tile
+        self.walkable: np.ndarray = None  # Bool array, True for cells a tank can occupy with its bottom left corner
+        self.flag_visible: np.ndarray = None  # Bool array of shape (4, width, height), see FLAG_VISIBILITY_DIRECTIONS
+        self._flag_cells = []  # Cells of the flag tiles the visibility was computed for
+        self.version = 0  # Incremented whenever tiles are removed, used to invalidate data derived from the map
+        self.tile_listeners = []  # Objects notified by map_loaded(map) and tile_removed(map, cells)
 
     def generate_map_from_map_data(self, map_data: dict, game: Game) -> None:
         self.clear()
         self.map = np.empty(shape=(map_data["width"], map_data["height"]), dtype=object)
+        self.tile_types = np.full(self.map.shape, constants.TILE_TYPE_EMPTY, dtype=np.uint8)
         self.map_data = map_data
+        self.covered_cells = {}
 
         for y in range(0, self.map.shape[1]):
             for x in range(0, self.map.shape[0]):
                 map_symbol = map_data["lines"][map_data['height'] - y - 1][x]
                 self._parse_map_symbol(map_symbol, x, y, game)
 
+        self._update_collidable()
+        self._update_flag_visibility()
+        self.version += 1
+        for listener in self.tile_listeners:
+            listener.map_loaded(self)
         self._create_bounds_colliders(map_data, game)
 
     def _create_bounds_colliders(self, map_data: dict, game: Game) -> None:
@@ -73,41 +105,153 @@ class Map:
         """
         Creates entities corresponding to the symbol.
         """
-        if symbol == "#":  # Destructible wall
+        tile_type = SYMBOL_TILE_TYPES.get(symbol)
+        if tile_type is not None:
+            self._create_tile(tile_type, x, y, game)
+
+        if symbol == "P":  # The player (not saved into the map array)
+            player = Player(x=x // 2 * constants.TANK_SIZE + constants.TANK_SIZE // 2,
+                            y=y // 2 * constants.TANK_SIZE + constants.TANK_SIZE // 2,
+                            batch=game.batch)
+            game.entity_manager.add_entity(game.register_player(player))
+            game.game_director.player = player
+            game.game_director.player_spawn_point = (x, y)
+
+    def _create_tile(self, tile_type: int, x: int, y: int, game: Game) -> Entity:
+        """
+        Creates a tile of one of the constants.TILE_TYPE_* types and places it into the map arrays.
+        The collidable array is not updated.
+        """
+        if tile_type == constants.TILE_TYPE_DESTRUCTIBLE_WALL:
             tile = DestructibleWall(x=x * constants.TILE_SIZE,
                                     y=y * constants.TILE_SIZE,
                                     batch=game.background_batch)
-            self.map[x, y] = tile
-
-        if symbol == "$":  # Indestructible wall
+        elif tile_type == constants.TILE_TYPE_WALL:
             tile = Wall(x=x * constants.TILE_SIZE,
                         y=y * constants.TILE_SIZE,
                         batch=game.background_batch)
-            self.map[x, y] = tile
-
-        if symbol == "+":  # Bush
+        elif tile_type == constants.TILE_TYPE_BUSH:
             tile = Bush(x=x * constants.TILE_SIZE,
                         y=y * constants.TILE_SIZE,
                         batch=game.foreground_batch)
-            self.map[x, y] = tile
-
-        if symbol == "F":  # The flag
+        elif tile_type == constants.TILE_TYPE_FLAG:
             tile = Flag(x=x * constants.TILE_SIZE,
                         y=y * constants.TILE_SIZE,
                         batch=game.batch)
-            self.map[x, y] = tile
-            game.game_director.flag = tile
+        else:
+            raise ValueError(f"Unknown tile type {tile_type}")
 
-        if symbol == "P":  # The player (not saved into the map array)
-            player = Player(x=x // 2 * constants.TANK_SIZE + constants.TANK_SIZE // 2,
-                            y=y // 2 * constants.TANK_SIZE + constants.TANK_SIZE // 2,
-                            batch=game.batch)
-            game.entity_manager.add_entity(game.register_player(player))
-            game.game_director.player = player
-            game.game_director.player_spawn_point = (x, y)
+        self.map[x, y] = tile
+        self.tile_types[x, y] = tile_type
+        if tile_type == constants.TILE_TYPE_FLAG:
+            self._register_covered_cells(tile, x, y)
+            game.game_director.flag = tile
+        return tile
 
-        else:
-            pass
+    def restore_tiles(self, map_data: dict, tile_types: np.ndarray, game: Game) -> None:
+        """
+        Makes the map contain the given tile types. Used to restore a snapshot.
+        When the map was generated from the same map data only the cells whose tile type differs are recreated,
+        other tiles (and their sprites) are kept. Otherwise all tiles are created from the tile types without
+        parsing the map data. Neither the player nor the map boundaries are created.
+        :param map_data: Map data of the stage the tiles belong to.
+        :param tile_types: Array of constants.TILE_TYPE_* in the map shape.
+        """
+        if self.map is None or self.map_data is not map_data:
+            self.clear()
+            self.map = np.empty(shape=(map_data["width"], map_data["height"]), dtype=object)
+            self.tile_types = np.full(self.map.shape, constants.TILE_TYPE_EMPTY, dtype=np.uint8)
+            self.map_data = map_data
+            self.covered_cells = {}
+
+        for x, y in np.argwhere(self.tile_types != tile_types).tolist():
+            tile = self.map[x, y]
+            if tile is not None:
+                self.remove_tile(tile)
+                tile.delete()
+            if tile_types[x, y] != constants.TILE_TYPE_EMPTY:
+                self._create_tile(int(tile_types[x, y]), x, y, game)
+
+        self._update_collidable()
+        self._update_flag_visibility()
+        self.version += 1
+        for listener in self.tile_listeners:
+            listener.map_loaded(self)
+
+    def _register_covered_cells(self, tile: Entity, x: int, y: int) -> None:
+        """
+        Remembers which cells other than its own a tile bigger than a single tile covers.
+        """
+        end_x = min(self.map.shape[0], (tile.rect.x + tile.rect.width - 1) // constants.TILE_SIZE + 1)
+        end_y = min(self.map.shape[1], (tile.rect.y + tile.rect.height - 1) // constants.TILE_SIZE + 1)
+        for cell_x in range(x, end_x):
+            for cell_y in range(y, end_y):
+                if (cell_x, cell_y) != (x, y):
+                    self.covered_cells[(cell_x, cell_y)] = tile
+
+    def _update_collidable(self) -> None:
+        """
+        Rebuilds the array of collidable cells from the map array.
+        """
+        self.collidable = np.zeros(self.map.shape, dtype=bool)
+        for x, y in np.argwhere(self.map != None):
+            self.collidable[x, y] = self.map[x, y].collidable
+        for cell, tile in self.covered_cells.items():
+            self.collidable[cell] = tile.collidable
+        self.walkable = np.zeros(self.map.shape, dtype=bool)
+        self._update_walkable(0, self.map.shape[0], 0, self.map.shape[1])
+
+    def _update_walkable(self, x: int, x_end: int, y: int, y_end: int) -> None:
+        """
+        Recomputes the walkable array in an area of cells from the collidable array.
+        The last column and row are never walkable as the block would reach out of the map.
+        """
+        x_end = min(x_end, self.map.shape[0] - 1)
+        y_end = min(y_end, self.map.shape[1] - 1)
+        if x >= x_end or y >= y_end:
+            return
+        c = self.collidable
+        self.walkable[x:x_end, y:y_end] = ~(c[x:x_end, y:y_end] | c[x + 1:x_end + 1, y:y_end] |
+                                            c[x:x_end, y + 1:y_end + 1] | c[x + 1:x_end + 1, y + 1:y_end + 1])
+
+    def _update_flag_visibility(self) -> None:
+        """
+        Rebuilds the flag_visible array.
+        A tank at cell t facing direction d sees the ray cell t + d * step + p * lane, where p is the perpendicular
+        direction towards the second lane of the tanks 2 cells wide ray, with the steps get_tile_ray covers.
+        Positions are derived backwards from the flag tile cells, so each flag is visible from at most a few dozen.
+        An indestructible wall in the first lane hides the flag in the second lane of the same step.
+        """
+        self.flag_visible = np.zeros((len(FLAG_VISIBILITY_DIRECTIONS),) + self.tile_types.shape, dtype=bool)
+        self._flag_cells = np.argwhere(self.tile_types == constants.TILE_TYPE_FLAG).tolist()
+        width, height = self.tile_types.shape
+        length = constants.AI_VISION_TILE_RANGE * 2
+        for flag_x, flag_y in self._flag_cells:
+            for (dx, dy), index in FLAG_VISIBILITY_DIRECTIONS.items():
+                px, py = (0, 1) if dx != 0 else (1, 0)
+                # Rays right and up start after the second cell of the tank
+                first_step = 2 if dx > 0 or dy > 0 else 1
+                for lane in (0, 1):
+                    if lane == 1 and (flag_x - px < 0 or flag_y - py < 0 or
+                                      self.tile_types[flag_x - px, flag_y - py] == constants.TILE_TYPE_WALL):
+                        continue
+                    for step in range(first_step, length + 1):
+                        x = flag_x - dx * step - px * lane
+                        y = flag_y - dy * step - py * lane
+                        if 0 <= x < width and 0 <= y < height:
+                            self.flag_visible[index, x, y] = True
+
+    def flag_visible_from(self, entity_pos: tuple, direction: tuple) -> bool:
+        """
+        Checks whether the flag can be seen by a tank within constants.AI_VISION_TILE_RANGE.
+        Same as looking for the flag in the tile types of get_tile_ray(entity_pos, direction, range, True), where an
+        indestructible wall hides the flag only from the tiles after it in the same row of the ray.
+        :param entity_pos: Cell of the tanks bottom left corner, None for tanks out of the map.
+        :param direction: One of the 4 major directions.
+        """
+        if entity_pos is None:
+            return False
+        return bool(self.flag_visible[FLAG_VISIBILITY_DIRECTIONS[direction], entity_pos[0], entity_pos[1]])
 
     def render_entity_debug_boxes(self):
         map_list = self.map.ravel()
@@ -134,6 +278,24 @@ class Map:
         """
         coords = self.get_tile_indexes_at_coordinates(tile.rect.x, tile.rect.y)
         self.map[coords] = None
+        self.tile_types[coords] = constants.TILE_TYPE_EMPTY
+        self.collidable[coords] = False
+        cells = [coords]
+        if self.covered_cells:
+            for cell in [cell for cell, covering_tile in self.covered_cells.items() if covering_tile is tile]:
+                del self.covered_cells[cell]
+                self.collidable[cell] = False
+                cells.append(cell)
+        for x, y in cells:
+            # Blocks containing the cell start at most one cell to the left and below it
+            self._update_walkable(max(0, x - 1), x + 1, max(0, y - 1), y + 1)
+        # Visibility depends only on the flag cells and the cells right next to them
+        if any(abs(x - flag_x) <= 1 and abs(y - flag_y) <= 1
+               for x, y in cells for flag_x, flag_y in self._flag_cells):
+            self._update_flag_visibility()
+        self.version += 1
+        for listener in self.tile_listeners:
+            listener.tile_removed(self, cells)
 
     def entity_map_position(self, entity: Entity) -> Union[tuple, None]:
         """
@@ -221,6 +383,57 @@ class Map:
         :return: Desired tile entity or None
         :raises ValueError or IndexError on out of bounds if check_bounds is True
         """
+        positions = self._indexes_next_to(entity_pos, direction, full_tile)
+        tiles = [self.get_tile_at_indexes(pos[0], pos[1], check_bounds=check_bounds) for pos in positions]
+        if len(tiles) == 2:
+            return tiles
+        else:
+            return tiles[0]
+
+    def collidable_next_to_entity(self, entity: Entity, direction: tuple, full_tile: bool = False,
+                                  check_bounds: bool = False) -> bool:
+        """
+        Checks whether the tiles returned by get_tile_next_to_entity for the same arguments contain a collidable tile.
+        Only the collidable array is used, tile objects aren't touched.
+        :return: True if any of the tiles is collidable. Tiles out of bounds are not collidable.
+        :raises IndexError on out of bounds if check_bounds is True
+        """
+        entity_pos = self.entity_map_position(entity)
+        if entity_pos is None:
+            raise IndexError("Entity has an invalid map position!")
+
+        for x, y in self._indexes_next_to(entity_pos, direction, full_tile):
+            if x < 0 or y < 0 or x >= self.collidable.shape[0] or y >= self.collidable.shape[1]:
+                if check_bounds:
+                    raise IndexError("Out of bounds!")
+                continue
+            if self.collidable[x, y]:
+                return True
+        return False
+
+    def walkable_next_to_indexes(self, entity_pos: tuple, direction: tuple) -> bool:
+        """
+        Checks whether a tank whose bottom left corner is in the cell entity_pos can move by a cell in one of the 4
+        major directions. This is a single lookup into the walkable array. For a tank that doesn't overlap
+        collidable tiles the result is the same as collidable_next_to_entity with full_tile and check_bounds
+        returning False.
+        :param entity_pos: Cell of the tanks bottom left corner, None for tanks out of the map.
+        :return: True if the 2x2 block of cells the tank moves into is within the map and free.
+        """
+        if entity_pos is None:
+            return False
+        x = entity_pos[0] + direction[0]
+        y = entity_pos[1] + direction[1]
+        if x < 0 or y < 0:
+            return False
+        return bool(self.walkable[x, y]) if x < self.walkable.shape[0] and y < self.walkable.shape[1] else False
+
+    @staticmethod
+    def _indexes_next_to(entity_pos: tuple, direction: tuple, full_tile: bool) -> List[tuple]:
+        """
+        Returns indexes of the tiles next to a tile in a certain direction, see get_tile_next_to_indexes.
+        :return: A list with one position or two positions for full tiles in one of the 4 major directions.
+        """
         switcher = {
             (0, 1): (1, 0),
             (0, -1): (1, 0),
@@ -238,14 +451,18 @@ class Map:
                 direction = (direction[0], direction[1] + 1)
 
         other_pos = utils.sum_tuples_elements(entity_pos, direction)
-        target_tile = self.get_tile_at_indexes(other_pos[0], other_pos[1], check_bounds=check_bounds)
-
         if major_direction and full_tile:
-            other_pos = utils.sum_tuples_elements(other_pos, second_tile_offset)
-            second_target_tile = self.get_tile_at_indexes(other_pos[0], other_pos[1], check_bounds=check_bounds)
-            return [target_tile, second_target_tile]
-        else:
-            return target_tile
+            return [other_pos, utils.sum_tuples_elements(other_pos, second_tile_offset)]
+        return [other_pos]
+
+    def area_free(self, x: int, y: int, width: int, height: int) -> bool:
+        """
+        Checks whether an area of the map given by tile indexes contains no collidable tiles.
+        Parts of the area outside of the map are considered free.
+        """
+        x_end = max(0, x + width)
+        y_end = max(0, y + height)
+        return not self.collidable[max(0, x):x_end, max(0, y):y_end].any()
 
     def get_tiles_around_tile(self, pos: tuple, radius: int, full_tile: bool = False) -> np.array:
         """
@@ -283,7 +500,109 @@ class Map:
 
         return self.map[start_x:end_x, start_y:end_y]
 
-    def get_tile_ray(self, pos: tuple, direction: tuple, length: int, full_tile: bool = False, return_tuples = False) -> np.array:
+    def get_tiles_in_area(self, x: int, y: int, width: int, height: int) -> np.array:
+        """
+        Returns a 2D numpy array slice of the map containing all tiles that a rectangle in world coordinates
+        overlaps. Parts of the rectangle outside of the map are ignored.
+        :return: A 2D numpy array (possibly empty)
+        """
+        start_x = max(0, x // constants.TILE_SIZE)
+        start_y = max(0, y // constants.TILE_SIZE)
+        end_x = max(0, (x + width - 1) // constants.TILE_SIZE + 1)
+        end_y = max(0, (y + height - 1) // constants.TILE_SIZE + 1)
+        return self.map[start_x:end_x, start_y:end_y]
+
+    def get_collidable_tiles_in_area(self, x: int, y: int, width: int, height: int) -> np.array:
+        """
+        Returns collidable tiles placed in cells that a rectangle in world coordinates overlaps.
+        Tiles are selected with the compact arrays so cells without collidable tiles are never touched.
+        :return: A 1D numpy array of tiles in the same order as get_tiles_in_area(...).ravel() would have them.
+        """
+        start_x = max(0, x // constants.TILE_SIZE)
+        start_y = max(0, y // constants.TILE_SIZE)
+        end_x = max(0, (x + width - 1) // constants.TILE_SIZE + 1)
+        end_y = max(0, (y + height - 1) // constants.TILE_SIZE + 1)
+        area = np.s_[start_x:end_x, start_y:end_y]
+        # Covered cells are collidable but don't hold the tile
+        return self.map[area][self.collidable[area] & (self.tile_types[area] != constants.TILE_TYPE_EMPTY)]
+
+    def raycast(self, rect, direction: tuple, distance: int) -> Union[tuple, None]:
+        """
+        Casts a rectangle through the tile grid in one of the 4 major directions and finds the first collidable
+        tiles it hits. Cells are walked one by one along the direction (grid DDA), so the cost only depends on the
+        number of cells the rectangle crosses.
+
+        The tested area spans from the back of the rectangle to its front moved by the distance. Tiles the rectangle
+        already overlaps are hit too (at the front of the rectangle).
+        Tiles that are bigger than a single tile (the flag) are hit in all the cells they cover.
+
+        :param rect: The cast rectangle, in world coordinates.
+        :param direction: Direction of the cast. (1,0) or (-1,0) or (0,1) or (0,-1)
+        :param distance: Cast distance in world units.
+        :return: None if nothing is hit. Otherwise a tuple (tiles, hit_point). tiles is a list of the collidable tiles
+        in the first hit row/column of cells, ordered by their distance from the center of the rectangle.
+        hit_point is a tuple with world coordinates of the hit on the front edge of the rectangle.
+        """
+        axis = 0 if direction[0] != 0 else 1
+        sign = direction[axis]
+        if axis == 0:
+            start, length = rect.x, rect.width
+            side_start, side_length = rect.y, rect.height
+        else:
+            start, length = rect.y, rect.height
+            side_start, side_length = rect.x, rect.width
+        side_center = side_start + side_length // 2
+
+        # Range of cells the rectangle spans across the cast direction
+        side_cells = self.map.shape[1 - axis]
+        first_side_cell = max(0, side_start // constants.TILE_SIZE)
+        last_side_cell = min(side_cells - 1, (side_start + side_length - 1) // constants.TILE_SIZE)
+        if first_side_cell > last_side_cell:
+            return None
+        center_side_cell = side_center // constants.TILE_SIZE
+
+        # Cells along the cast direction, starting from the back of the rectangle
+        cells = self.map.shape[axis]
+        if sign > 0:
+            front = start + length
+            cell = start // constants.TILE_SIZE
+            last_cell = (front + distance - 1) // constants.TILE_SIZE
+        else:
+            front = start
+            cell = (start + length - 1) // constants.TILE_SIZE
+            last_cell = (start - distance) // constants.TILE_SIZE
+
+        while (cell <= last_cell) if sign > 0 else (cell >= last_cell):
+            if 0 <= cell < cells:
+                hit_tiles = []
+                for side_cell in range(first_side_cell, last_side_cell + 1):
+                    index = (cell, side_cell) if axis == 0 else (side_cell, cell)
+                    if not self.collidable[index]:
+                        continue
+                    tile = self.map[index]
+                    if tile is None:
+                        tile = self.covered_cells.get(index)
+                    if tile not in hit_tiles:
+                        if side_cell == center_side_cell:
+                            hit_tiles.insert(0, tile)
+                        else:
+                            hit_tiles.append(tile)
+
+                if hit_tiles:
+                    if sign > 0:
+                        hit = max(cell * constants.TILE_SIZE, front)
+                    else:
+                        hit = min((cell + 1) * constants.TILE_SIZE, front)
+                    hit_point = (hit, side_center) if axis == 0 else (side_center, hit)
+                    return hit_tiles, hit_point
+            elif (cell >= cells) if sign > 0 else (cell < 0):
+                break  # Left the map
+            cell += sign
+
+        return None
+
+    def get_tile_ray(self, pos: tuple, direction: tuple, length: int, full_tile: bool = False, return_tuples = False,
+                     array: np.ndarray = None) -> np.array:
         """
         Returns a "ray" of tiles originating from the tile at the passed position. The starting tile IS NOT included.
 
@@ -307,6 +626,7 @@ class Map:
         :param length: Length of the ray.
         :param full_tile: Work with bigger tiles made out of 4. Tile at pos then represents the bottom left tile.
         :param return_tuples:
+        :param array: Map array to take the ray from (self.tile_types or self.collidable). Defaults to self.map.
         :return: A 1D (full_tile=False) or 2D numpy array containing a list of tile entities (or None references or
         tuples containing coordinate indexes if return_tuples is set to True)
         in ascending order based on position outwards from the starting position.
@@ -315,28 +635,29 @@ class Map:
         if pos is None:
             return np.zeros((1, 1), dtype=object)
 
+        source = self.map if array is None else array
         if full_tile:
             length = length * 2
 
         if direction == (-1, 0):
             if full_tile:
-                return np.flip(self.map[max(0, pos[0] - length):pos[0], pos[1]:pos[1]+2], 0)
+                return np.flip(source[max(0, pos[0] - length):pos[0], pos[1]:pos[1]+2], 0)
             else:
-                return np.flip(self.map[max(0, pos[0] - length):pos[0], pos[1]], 0)
+                return np.flip(source[max(0, pos[0] - length):pos[0], pos[1]], 0)
         if direction == (1, 0):
             if full_tile:
-                return self.map[pos[0]+2:pos[0] + length + 1, pos[1]:pos[1]+2]
+                return source[pos[0]+2:pos[0] + length + 1, pos[1]:pos[1]+2]
             else:
-                return self.map[pos[0]+1:pos[0] + length + 1, pos[1]]
+                return source[pos[0]+1:pos[0] + length + 1, pos[1]]
         if direction == (0, 1):
             if full_tile:
-                array = self.map[pos[0]:pos[0]+2, pos[1]+2:(pos[1] + length + 1)]
-                return np.stack((array[0, 0:], array[1, 0:]), axis=1)
+                ray = source[pos[0]:pos[0]+2, pos[1]+2:(pos[1] + length + 1)]
+                return np.stack((ray[0, 0:], ray[1, 0:]), axis=1)
             else:
-                return self.map[pos[0], pos[1]+1:(pos[1] + length + 1)]
+                return source[pos[0], pos[1]+1:(pos[1] + length + 1)]
         if direction == (0, -1):
             if full_tile:
-                array = np.flip(self.map[pos[0]:pos[0]+2, max(0, pos[1] - length):pos[1]], 1)
-                return np.stack((array[0, 0:], array[1, 0:]), axis=1)
+                ray = np.flip(source[pos[0]:pos[0]+2, max(0, pos[1] - length):pos[1]], 1)
+                return np.stack((ray[0, 0:], ray[1, 0:]), axis=1)
             else:
-                return np.flip(self.map[pos[0], max(0, pos[1] - length):pos[1]], 0)
\ No newline at end of file
+                return np.flip(source[pos[0], max(0, pos[1] - length):pos[1]], 0)
\ No newline at end of file
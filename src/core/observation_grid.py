@@ -0,0 +1,161 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    from core.game import Game
+    from core.map import Map
+    from core.entities.entity import Entity
+    from core.projectile_system import ProjectileSystem
+
+import numpy as np
+
+from core import constants
+from core.entities.map.flag import Flag
+from core.entities.particles.projectile import Projectile
+from core.entities.tank.player import Player
+from core.entities.tank.tank import Tank
+
+GRID_WALLS = 0
+GRID_DESTRUCTIBLE_WALLS = 1
+GRID_BUSHES = 2
+GRID_FLAG = 3
+GRID_ENEMY_TANKS = 4
+GRID_BULLETS = 5
+GRID_PLAYER = 6
+GRID_CHANNELS = 7
+
+GRID_TILE_CHANNELS = {
+    constants.TILE_TYPE_WALL: GRID_WALLS,
+    constants.TILE_TYPE_DESTRUCTIBLE_WALL: GRID_DESTRUCTIBLE_WALLS,
+    constants.TILE_TYPE_BUSH: GRID_BUSHES,
+    constants.TILE_TYPE_FLAG: GRID_FLAG,
+}
+
+
+class ObservationGrid:
+    """
+    A multi-channel uint8 grid of what occupies every map cell, kept up to date as the game changes.
+
+    self.array has the shape (GRID_CHANNELS, map width, map height) and uses the map array layout (indexed [x, y]).
+    Tile channels hold 1 for cells occupied by a tile of their type, the flag channel also covers all cells
+    the flag reaches into. Tank channels hold the number of tanks overlapping each cell and the bullet channel
+    marks cells containing a projectile center.
+
+    Instead of being rebuilt every tick the grid listens to the map and the entity manager. Removed tiles clear
+    their cells, tanks update their cells only when their bounding box crosses into other cells and projectiles,
+    which move every tick anyway, are refreshed in a single vectorized pass at the end of every update.
+    The array is only reallocated when a map of a different size is loaded, so it can be read without copying.
+    """
+
+    def __init__(self, game: Game):
+        self.game = game
+        self.array: np.ndarray = None
+        self._footprints = {}  # Tank -> (channel, min_x, max_x, min_y, max_y), the cell range marked for it
+        game.game_map.tile_listeners.append(self)
+        game.entity_manager.listeners.append(self)
+        self.rebuild()
+
+    def detach(self) -> None:
+        """
+        Stops listening to the game.
+        """
+        self.game.game_map.tile_listeners.remove(self)
+        self.game.entity_manager.listeners.remove(self)
+
+    def rebuild(self) -> None:
+        """
+        Rebuilds the whole grid from the map and the entity manager.
+        """
+        tile_types = self.game.game_map.tile_types
+        self._footprints.clear()
+        if tile_types is None:
+            self.array = None
+            return
+
+        shape = (GRID_CHANNELS,) + tile_types.shape
+        if self.array is None or self.array.shape != shape:
+            self.array = np.zeros(shape, dtype=np.uint8)
+        else:
+            self.array[:] = 0
+
+        self._rebuild_tiles()
+        manager = self.game.entity_manager
+        for tank in manager.tanks:
+            self._mark_tank(tank)
+        self.projectiles_updated(manager.projectile_system)
+
+    def _rebuild_tiles(self) -> None:
+        game_map = self.game.game_map
+        for tile_type, channel in GRID_TILE_CHANNELS.items():
+            np.equal(game_map.tile_types, tile_type, out=self.array[channel], casting="unsafe")
+        for cell, tile in game_map.covered_cells.items():
+            if isinstance(tile, Flag):
+                self.array[(GRID_FLAG,) + cell] = 1
+
+    # Map listener
+
+    def map_loaded(self, game_map: Map) -> None:
+        self.rebuild()
+
+    def tile_removed(self, game_map: Map, cells: List[tuple]) -> None:
+        for x, y in cells:
+            self.array[:GRID_ENEMY_TANKS, x, y] = 0
+
+    # Entity manager listener
+
+    def entity_added(self, entity: Entity) -> None:
+        if self.array is None:
+            return
+        if isinstance(entity, Tank):
+            self._mark_tank(entity)
+        elif isinstance(entity, Projectile):
+            x, y = self._cell(entity.rect.x + entity.rect.width // 2, entity.rect.y + entity.rect.height // 2)
+            self.array[GRID_BULLETS, x, y] = 1
+
+    def entity_moved(self, entity: Entity) -> None:
+        footprint = self._footprints.get(entity)
+        if footprint is None:
+            return
+        rect = entity.rect
+        min_x, min_y = self._cell(rect.x, rect.y)
+        max_x, max_y = self._cell(rect.x + rect.width - 1, rect.y + rect.height - 1)
+        if footprint[1:] != (min_x, max_x, min_y, max_y):
+            self._unmark_tank(entity)
+            self._mark_tank(entity)
+
+    def entity_removed(self, entity: Entity) -> None:
+        if entity in self._footprints:
+            self._unmark_tank(entity)
+
+    def entities_cleared(self) -> None:
+        self._footprints.clear()
+        if self.array is not None:
+            self.array[GRID_ENEMY_TANKS:] = 0
+
+    def projectiles_updated(self, system: ProjectileSystem) -> None:
+        if self.array is None:
+            return
+        bullets = self.array[GRID_BULLETS]
+        bullets[:] = 0
+        count = system.count
+        if count > 0:
+            centers = system.positions[:count] + system.sizes[:count] // 2
+            cells = np.clip(centers // constants.TILE_SIZE, 0, np.array(bullets.shape) - 1)
+            bullets[cells[:, 0], cells[:, 1]] = 1
+
+    def _cell(self, x: int, y: int) -> tuple:
+        shape = self.array.shape
+        return (min(max(int(x) // constants.TILE_SIZE, 0), shape[1] - 1),
+                min(max(int(y) // constants.TILE_SIZE, 0), shape[2] - 1))
+
+    def _mark_tank(self, tank: Tank) -> None:
+        rect = tank.rect
+        channel = GRID_PLAYER if isinstance(tank, Player) else GRID_ENEMY_TANKS
+        min_x, min_y = self._cell(rect.x, rect.y)
+        max_x, max_y = self._cell(rect.x + rect.width - 1, rect.y + rect.height - 1)
+        self.array[channel, min_x:max_x + 1, min_y:max_y + 1] += 1
+        self._footprints[tank] = (channel, min_x, max_x, min_y, max_y)
+
+    def _unmark_tank(self, tank: Tank) -> None:
+        channel, min_x, max_x, min_y, max_y = self._footprints.pop(tank)
+        self.array[channel, min_x:max_x + 1, min_y:max_y + 1] -= 1
@@ -0,0 +1,354 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    from core.game import Game
+    from core.map import Map
+
+import numpy as np
+
+from core import constants
+from core import utils
+from core.entities.map.wall import Wall
+from core.entities.particles.explosion import Explosion
+from core.entities.particles.projectile import Projectile
+
+
+def _overlapping_pairs(boxes: np.ndarray) -> tuple:
+    """
+    Sweep and prune over boxes given as rows of (min_x, min_y, max_x, max_y).
+    The boxes are sorted by min_x, every box is then only tested against the boxes that start before it ends.
+    :return: Two index arrays, every pair of overlapping boxes is in them once.
+    """
+    order = np.argsort(boxes[:, 0], kind="stable")
+    sorted_min_x = boxes[order, 0]
+    ends = np.searchsorted(sorted_min_x, boxes[order, 2], side="left")
+    starts = np.arange(1, len(boxes) + 1)
+    lengths = np.maximum(ends - starts, 0)
+    first = np.repeat(np.arange(len(boxes)), lengths)
+    second = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    first = order[first]
+    second = order[second]
+    overlap = ((boxes[first, 0] < boxes[second, 2]) & (boxes[first, 2] > boxes[second, 0]) &
+               (boxes[first, 1] < boxes[second, 3]) & (boxes[first, 3] > boxes[second, 1]))
+    return first[overlap], second[overlap]
+
+
+class ProjectileSystem:
+    """
+    Updates all projectiles at once.
+
+    Projectile state is kept in a structure of arrays (positions, directions, speeds, lifespans, owners) instead of
+    in the projectile objects. Every tick all projectiles are moved in a single vectorized step, tested against the
+    collidable tile grid in bulk and against tanks and other projectiles with a vectorized sweep and prune. Only
+    projectiles that actually hit something are then resolved one by one.
+
+    The Projectile objects only serve as handles that the rest of the game holds on to (tanks remember their last
+    fired bullet, damage methods inspect the projectile that hit them). Their positions and bounding boxes are
+    copied from the arrays at the end of every update, their sprites only when the game is about to be rendered.
+
+    Positions are bounding box (not sprite anchor) coordinates.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.count = 0
+        self.positions = np.zeros((capacity, 2), dtype=int)
+        self.previous_positions = np.zeros((capacity, 2), dtype=int)  # Positions before the last update
+        self.directions = np.zeros((capacity, 2), dtype=int)
+        self.sizes = np.zeros((capacity, 2), dtype=int)
+        self.anchors = np.zeros((capacity, 2), dtype=int)  # Offset of the sprite position from the bounding box
+        self.speeds = np.zeros(capacity, dtype=int)
+        self.lifespans = np.zeros(capacity, dtype=int)
+        self.removed = np.zeros(capacity, dtype=bool)
+        self.owners = np.empty(capacity, dtype=object)
+        self.projectiles = np.empty(capacity, dtype=object)
+
+        self._tile_sums = None  # Summed area table of the collidable tile grid
+        self._tile_sums_key = None  # Map array and version the table was built from
+
+    def add(self, projectile: Projectile) -> None:
+        """
+        Starts simulating a projectile. Its current position, movement direction, speed and lifespan are copied
+        into the arrays.
+        """
+        if self.count == len(self.speeds):
+            self._grow()
+
+        i = self.count
+        rect = projectile.rect
+        self.positions[i] = (rect.x, rect.y)
+        self.previous_positions[i] = self.positions[i]
+        self.directions[i] = projectile.move_dir
+        self.sizes[i] = (rect.width, rect.height)
+        self.anchors[i] = (projectile.x - rect.x, projectile.y - rect.y)
+        self.speeds[i] = projectile.speed
+        self.lifespans[i] = projectile.lifespan
+        self.removed[i] = False
+        self.owners[i] = projectile.owner
+        self.projectiles[i] = projectile
+        projectile.system_index = i
+        self.count += 1
+
+    def remove(self, projectile: Projectile) -> None:
+        """
+        Marks a projectile for removal, it is dropped from the arrays at the end of the update.
+        """
+        if projectile.system_index >= 0:
+            self.removed[projectile.system_index] = True
+
+    def _grow(self) -> None:
+        capacity = len(self.speeds) * 2
+        for name in ["positions", "previous_positions", "directions", "sizes", "anchors", "speeds", "lifespans",
+                     "removed", "owners", "projectiles"]:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype) if old.dtype != object \
+                else np.empty(capacity, dtype=object)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def update(self, game: Game, count: int, targets: List) -> None:
+        """
+        Moves projectiles and resolves their hits.
+        :param game: Game object
+        :param count: Number of projectiles to update. Projectiles fired during this tick are placed after the
+        already existing ones and aren't updated until the next tick.
+        :param targets: Entities other than projectiles that projectiles can hit, in the order the hits should be
+        preferred in.
+        """
+        self.previous_positions[:self.count] = self.positions[:self.count]
+        if count > 0:
+            resolved = self._hit_tiles(game, count)
+
+            self.positions[:count] += self.directions[:count] * self.speeds[:count, None]
+            expired = self.lifespans[:count] <= 0
+            self.lifespans[:count][~expired] -= 1
+
+            self._hit_entities(game, count, targets, resolved)
+
+            self.removed[:count] |= expired | self._outside_map(game, count)
+
+        self._compact()
+        self._sync_handles()
+
+    def _outside_map(self, game: Game, count: int) -> np.ndarray:
+        """
+        Finds projectiles that reach past the map edges, they are removed like when hitting the map boundaries.
+        :return: Bool array marking the projectiles outside the map.
+        """
+        map_data = game.game_map.map_data
+        if map_data is None:
+            return np.zeros(count, dtype=bool)
+        pos = self.positions[:count]
+        bounds = np.array([map_data["pixel_width"], map_data["pixel_height"]])
+        return ((pos < 0) | (pos + self.sizes[:count] > bounds)).any(axis=1)
+
+    def _hit_tiles(self, game: Game, count: int) -> np.ndarray:
+        """
+        Finds and resolves the tiles hit by projectiles during their move.
+        The areas swept by the projectiles are first tested against the collidable tile grid all at once,
+        only projectiles whose area contains a collidable tile are cast through the map one by one.
+        :return: Bool array marking the projectiles that hit a tile.
+        """
+        hits = np.zeros(count, dtype=bool)
+        game_map = game.game_map
+        if game_map.collidable is None:
+            return hits
+
+        sums = self._get_tile_sums(game_map)
+        move = self.directions[:count] * self.speeds[:count, None]
+        swept_min = self.positions[:count] + np.minimum(move, 0)
+        swept_max = self.positions[:count] + self.sizes[:count] + np.maximum(move, 0)
+
+        shape = np.array(game_map.collidable.shape)
+        cell_min = np.clip(swept_min // constants.TILE_SIZE, 0, shape)
+        cell_max = np.clip((swept_max - 1) // constants.TILE_SIZE + 1, 0, shape)
+        cell_max = np.maximum(cell_max, cell_min)
+        collidable_cells = (sums[cell_max[:, 0], cell_max[:, 1]] - sums[cell_min[:, 0], cell_max[:, 1]]
+                            - sums[cell_max[:, 0], cell_min[:, 1]] + sums[cell_min[:, 0], cell_min[:, 1]])
+
+        # Casting in order as hits destroy tiles that later projectiles could have hit
+        rect = utils.Rect()
+        for i in np.flatnonzero(collidable_cells > 0):
+            if not move[i].any():
+                continue
+            utils.set_rect(rect, *self.positions[i].tolist(), *self.sizes[i].tolist())
+            hit = game_map.raycast(rect, tuple(self.directions[i].tolist()), int(self.speeds[i]))
+            if hit is not None:
+                hits[i] = True
+                self._hit_tile(game, i, hit[0], hit[1])
+        return hits
+
+    def _get_tile_sums(self, game_map: Map) -> np.ndarray:
+        """
+        Returns a summed area table of the collidable cells with a leading row and column of zeros.
+        The table is rebuilt only when the map changes.
+        """
+        key = (id(game_map.map), game_map.version)
+        if self._tile_sums_key != key:
+            collidable = game_map.collidable
+            sums = np.zeros((collidable.shape[0] + 1, collidable.shape[1] + 1), dtype=int)
+            sums[1:, 1:] = collidable.cumsum(0).cumsum(1)
+            self._tile_sums = sums
+            self._tile_sums_key = key
+        return self._tile_sums
+
+    def _hit_tile(self, game: Game, i: int, tiles: list, hit_point: tuple) -> None:
+        """
+        Resolves a hit of map tiles.
+        :param tiles: Collidable tiles that were hit, the first one is the closest to the projectile center.
+        :param hit_point: World coordinates of the hit.
+        """
+        target = tiles[0]
+        if isinstance(target, Wall):
+            wall_center = utils.get_center_of_rect(target.rect)
+            wall_hit_quadrant = utils.determine_point_quadrant(hit_point, wall_center)
+            target.projectile_hit(wall_hit_quadrant, tuple(self.directions[i].tolist()), game)
+        else:
+            target.damage(game, other_entity=self.projectiles[i])
+
+        self._explode(game, hit_point)
+        game.entity_manager.remove_entity(self.projectiles[i])
+
+    def _hit_entities(self, game: Game, count: int, targets: List, resolved: np.ndarray) -> None:
+        """
+        Resolves hits of tanks and other projectiles.
+        Bounding boxes of all projectiles and targets are swept along the x axis at once, only the pairs found by
+        the sweep are tested. A projectile that overlaps both a target and another projectile prefers the target.
+        :param resolved: Projectiles that already hit a tile this tick, they are skipped.
+        """
+        pos = self.positions[:self.count]
+        size = self.sizes[:self.count]
+
+        # Boxes as (min_x, min_y, max_x, max_y), targets first
+        boxes = np.concatenate((pos, pos + size), axis=1)
+        target_count = len(targets)
+        if targets:
+            target_boxes = np.array([(t.rect.x, t.rect.y, t.rect.x + t.rect.width, t.rect.y + t.rect.height)
+                                     for t in targets])
+            boxes = np.concatenate((target_boxes, boxes))
+
+        first, second = _overlapping_pairs(boxes)
+        hitters = np.concatenate((first, second)) - target_count
+        others = np.concatenate((second, first))
+        hitting = (hitters >= 0) & (hitters < count)
+        hitters = hitters[hitting]
+        others = others[hitting]
+
+        # Projectiles don't hit their owners
+        hit_target = others < target_count
+        if hit_target.any():
+            target_array = np.empty(target_count, dtype=object)
+            target_array[:] = targets
+            hit_target[hit_target] = self.owners[hitters[hit_target]] == target_array[others[hit_target]]
+            hitters = hitters[~hit_target]
+            others = others[~hit_target]
+        valid = ~resolved[hitters]
+        hitters = hitters[valid]
+        others = others[valid]
+
+        # Every projectile hits the first box it overlaps, targets come before projectiles
+        order = np.lexsort((others, hitters))
+        hitters = hitters[order]
+        others = others[order]
+        first_hits = np.flatnonzero(np.diff(hitters, prepend=-1) != 0)
+
+        for i, j in zip(hitters[first_hits].tolist(), others[first_hits].tolist()):
+            projectile = self.projectiles[i]
+            if j < target_count:
+                target = targets[j]
+            else:
+                target = self.projectiles[j - target_count]
+
+            if not target.damage(game, other_entity=projectile):
+                if not isinstance(target, Projectile):
+                    self._explode(game, (int(pos[i, 0] + size[i, 0] // 2), int(pos[i, 1] + size[i, 1])))
+                game.entity_manager.remove_entity(projectile)
+
+    def _explode(self, game: Game, point: tuple) -> None:
+        exp = Explosion(x=point[0] - constants.EXPLOSION_SIZE // 2,
+                        y=point[1] - constants.EXPLOSION_SIZE // 2,
+                        batch=game.foreground_batch)
+        game.entity_manager.add_entity(exp)
+
+    def _compact(self) -> None:
+        """
+        Drops removed projectiles from the arrays, keeping the order of the remaining ones.
+        """
+        count = self.count
+        removed = self.removed[:count]
+        if not removed.any():
+            return
+
+        for projectile in self.projectiles[:count][removed]:
+            projectile.to_remove = True
+            projectile.system_index = -1
+            projectile.entity_manager = None
+            projectile.delete()
+
+        keep = ~removed
+        new_count = int(keep.sum())
+        for array in [self.positions, self.previous_positions, self.directions, self.sizes, self.anchors,
+                      self.speeds, self.lifespans, self.owners, self.projectiles]:
+            array[:new_count] = array[:count][keep]
+        self.owners[new_count:count] = None
+        self.projectiles[new_count:count] = None
+        self.removed[:count] = False
+        self.count = new_count
+
+        for i in range(new_count):
+            self.projectiles[i].system_index = i
+
+    def _sync_handles(self) -> None:
+        """
+        Copies the simulated positions to the projectile objects and their bounding boxes.
+        """
+        count = self.count
+        rect_positions = self.positions[:count].tolist()
+        positions = (self.positions[:count] + self.anchors[:count]).tolist()
+        for projectile, (x, y), (rect_x, rect_y) in zip(self.projectiles[:count].tolist(), positions, rect_positions):
+            projectile.set_simulated_position(x, y, rect_x, rect_y)
+
+    def sync_sprites(self, alpha: float = 1.0) -> None:
+        """
+        Copies the simulated positions to the projectile sprites.
+        :param alpha: Sprites are placed this fraction of the way from the positions before the last update
+        to the current ones.
+        """
+        count = self.count
+        interpolated_positions = None
+        if alpha < 1:
+            positions = self.positions[:count] + self.anchors[:count]
+            previous = self.previous_positions[:count] + self.anchors[:count]
+            interpolated_positions = (previous + (positions - previous) * alpha).tolist()
+        for i in range(count):
+            projectile = self.projectiles[i]
+            if projectile.sprite is not None:
+                if interpolated_positions is None:
+                    projectile.sync_sprite()
+                else:
+                    projectile.sprite.position = tuple(interpolated_positions[i])
+
+    def get_rects(self) -> list:
+        """
+        Returns bounding boxes of all simulated projectiles.
+        """
+        return [utils.Rect(*self.positions[i], *self.sizes[i]) for i in range(self.count)]
+
+    def detach_all(self) -> list:
+        """
+        Stops simulating all projectiles without disposing of them.
+        :return: The projectiles in the array order.
+        """
+        projectiles = self.projectiles[:self.count].tolist()
+        for projectile in projectiles:
+            projectile.system_index = -1
+            projectile.entity_manager = None
+        self.owners[:self.count] = None
+        self.projectiles[:self.count] = None
+        self.removed[:] = False
+        self.count = 0
+        return projectiles
+
+    def clear(self) -> None:
+        for projectile in self.detach_all():
+            projectile.delete()
@@ -0,0 +1,113 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core.game import Game
+
+import struct
+
+from core.game_state import GameState
+
+REPLAY_MAGIC = b"BTRP"
+REPLAY_VERSION = 1
+_HEADER = struct.Struct("<4sHIHII")  # Magic, version, seed, stage index, ticks, number of recorded inputs
+_RUN = struct.Struct("<HB")  # Run length, input bits
+
+
+class Replay:
+    """
+    A recording of a match that can be re-simulated.
+
+    The game is deterministic given the seed of its random number generator, so a match is fully described by
+    the seed and stage it started with and the player input of every tick. The input is a single byte per tick
+    (constants.INPUT_* bits), which is run length encoded when saved as it rarely changes between ticks.
+
+    A replay is attached to a game as game.replay. The player records its input into it, or reads the input
+    from it instead of the keyboard when the replay is playing.
+    """
+
+    def __init__(self, seed: int, stage_index: int, ticks: int = 0, inputs: bytes = b""):
+        """
+        :param seed: Seed of the game random number generator at the start of the stage.
+        :param stage_index: Index of the stage the match started on.
+        :param ticks: Number of simulated ticks the recording spans.
+        :param inputs: Recorded player input, a byte per player update.
+        """
+        self.seed = seed
+        self.stage_index = stage_index
+        self.ticks = ticks
+        self.inputs = bytearray(inputs)
+        self.playing = False
+        self.position = 0  # Playback position in the inputs
+
+    def record(self, inputs: int) -> None:
+        self.inputs.append(inputs)
+
+    def next_input(self) -> int:
+        """
+        Returns the next recorded input. Once the recording runs out the player gets no input.
+        """
+        if self.position >= len(self.inputs):
+            return 0
+        inputs = self.inputs[self.position]
+        self.position += 1
+        return inputs
+
+    def to_bytes(self) -> bytes:
+        runs = []
+        inputs = self.inputs
+        i = 0
+        while i < len(inputs):
+            value = inputs[i]
+            start = i
+            while i < len(inputs) and inputs[i] == value and i - start < 0xFFFF:
+                i += 1
+            runs.append(_RUN.pack(i - start, value))
+        return _HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, self.stage_index, self.ticks,
+                            len(inputs)) + b"".join(runs)
+
+    @staticmethod
+    def from_bytes(data: bytes) -> Replay:
+        magic, version, seed, stage_index, ticks, count = _HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError("Not a supported replay file")
+
+        inputs = bytearray()
+        for length, value in _RUN.iter_unpack(data[_HEADER.size:]):
+            inputs += bytes((value,)) * length
+        if len(inputs) != count:
+            raise ValueError(f"Replay is corrupted, expected {count} inputs, got {len(inputs)}")
+        return Replay(seed, stage_index, ticks, inputs)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @staticmethod
+    def load(path: str) -> Replay:
+        with open(path, "rb") as f:
+            return Replay.from_bytes(f.read())
+
+
+def play(replay: Replay, working_dir: str) -> Game:
+    """
+    Re-simulates a replay in a headless game as fast as possible.
+    :param replay: Replay to play.
+    :param working_dir: Directory containing the res and stages directories.
+    :return: The game in the state at the end of the replay.
+    """
+    from core.game import Game
+
+    game = Game(working_dir, headless=True)
+    game.start_stage(replay.stage_index, replay.seed)
+    replay.position = 0
+    replay.playing = True
+    game.replay = replay
+
+    for i in range(replay.ticks):
+        if game.game_state not in [GameState.GAME, GameState.GAME_OVER]:
+            break
+        game.update(0)
+
+    replay.playing = False
+    return game
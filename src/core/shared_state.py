@@ -0,0 +1,213 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from core.game import Game
+
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from core import constants
+from core.entities.tank.player import Player
+
+ENTITY_PLAYER = 1
+ENTITY_ENEMY = 2
+ENTITY_PROJECTILE = 3
+
+HEADER_DTYPE = np.dtype([
+    ("sequence", "<u8"),  # Odd while the state is being written
+    ("tick", "<u4"),
+    ("game_state", "<u2"),
+    ("stage_index", "<u2"),
+    ("width", "<u2"),  # Map size in tiles
+    ("height", "<u2"),
+    ("entity_count", "<u2"),
+    ("active_tanks", "<i2"),  # Enemy tanks left to spawn
+    ("spawned_tanks", "<u2"),  # Enemy tanks alive or spawning
+    ("player_lives", "<i2"),
+    ("flag_destroyed", "<u1"),
+])
+ENTITY_DTYPE = np.dtype([
+    ("type", "<u1"),  # ENTITY_*
+    ("direction_x", "<i1"),  # Facing direction of tanks, movement direction of projectiles
+    ("direction_y", "<i1"),
+    ("health", "<i1"),
+    ("x", "<i4"),  # Bounding box position
+    ("y", "<i4"),
+])
+_MAX_CELLS = constants.SHARED_STATE_MAX_MAP_SIZE ** 2
+_TILES_OFFSET = HEADER_DTYPE.itemsize
+_ENTITIES_OFFSET = _TILES_OFFSET + _MAX_CELLS + (-_MAX_CELLS % 8)
+STATE_SIZE = _ENTITIES_OFFSET + ENTITY_DTYPE.itemsize * constants.SHARED_STATE_MAX_ENTITIES
+
+_published_names = set()  # Blocks created by publishers of this process
+
+
+class _StateViews:
+    """
+    Numpy views of the state layout over a shared memory buffer.
+    """
+
+    def __init__(self, buffer):
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buffer)
+        self.tiles = np.ndarray(_MAX_CELLS, dtype=np.uint8, buffer=buffer, offset=_TILES_OFFSET)
+        self.entities = np.ndarray(constants.SHARED_STATE_MAX_ENTITIES, dtype=ENTITY_DTYPE, buffer=buffer,
+                                   offset=_ENTITIES_OFFSET)
+
+
+class SharedStatePublisher:
+    """
+    Publishes the world state of a game into a named shared memory block that other local processes can read
+    with SharedStateReader.
+
+    The block has a fixed layout: a header (HEADER_DTYPE) with the tick, game state and director counters,
+    the tile types of the map (constants.TILE_TYPE_*, in the map array layout flattened) and an array of entity
+    records (ENTITY_DTYPE) for tanks and projectiles. Everything is written through numpy views, projectiles in
+    a single vectorized copy from the projectile system arrays.
+
+    The header sequence number works as a seqlock. It is incremented before writing, making it odd, and again
+    after writing. Readers retry when they see an odd number or when the number changed while they were copying.
+    """
+
+    def __init__(self, game: Game, name: str = None):
+        """
+        :param game: Game to publish.
+        :param name: Name of the shared memory block, a random name is generated if None.
+        """
+        self.game = game
+        self.memory = shared_memory.SharedMemory(name=name, create=True, size=STATE_SIZE)
+        self.views = _StateViews(self.memory.buf)
+        self.views.header["sequence"] = 0
+        self._map_version = None  # Map version and shape of the published tiles
+        self._map_shape = None
+        _published_names.add(self.memory.name)
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def publish(self) -> None:
+        """
+        Writes the current state. Called after every tick.
+        """
+        game = self.game
+        views = self.views
+        header = views.header
+        sequence = int(header["sequence"])
+        header["sequence"] = sequence + 1
+
+        header["tick"] = game.tick
+        header["game_state"] = game.game_state.value
+        director = game.game_director
+        stage = director.stage
+        game_map = game.game_map
+        if game_map.tile_types is None:
+            header["width"] = header["height"] = 0
+            self._map_version = None
+        elif game_map.version != self._map_version or game_map.tile_types.shape != self._map_shape:
+            # Tiles only change when walls get destroyed or a stage is loaded
+            self._map_version = game_map.version
+            self._map_shape = game_map.tile_types.shape
+            header["width"], header["height"] = self._map_shape
+            views.tiles[:game_map.tile_types.size] = game_map.tile_types.ravel()
+        header["stage_index"] = stage.index
+        header["active_tanks"] = stage.active_tanks
+        header["spawned_tanks"] = len(director.spawned_tanks) + len(director.spawned_blings)
+        header["player_lives"] = stage.active_player_lives
+        header["flag_destroyed"] = director.flag is not None and director.flag.destroyed
+
+        # Tank records are gathered into rows first, numpy writes whole records faster than single fields
+        entities = views.entities
+        capacity = len(entities)
+        tanks = game.entity_manager.tanks[:capacity]
+        count = len(tanks)
+        if count > 0:
+            entities[:count] = [(ENTITY_PLAYER if isinstance(tank, Player) else ENTITY_ENEMY,
+                                 tank.facing_direction[0], tank.facing_direction[1], tank.health,
+                                 tank.rect.x, tank.rect.y) for tank in tanks]
+
+        system = game.entity_manager.projectile_system
+        projectile_count = min(system.count, capacity - count)
+        if projectile_count > 0:
+            records = entities[count:count + projectile_count]
+            records["type"] = ENTITY_PROJECTILE
+            records["direction_x"] = system.directions[:projectile_count, 0]
+            records["direction_y"] = system.directions[:projectile_count, 1]
+            records["health"] = 0
+            records["x"] = system.positions[:projectile_count, 0]
+            records["y"] = system.positions[:projectile_count, 1]
+            count += projectile_count
+        header["entity_count"] = count
+
+        header["sequence"] = sequence + 2
+
+    def close(self) -> None:
+        """
+        Releases and removes the shared memory block.
+        """
+        _published_names.discard(self.memory.name)
+        self.views = None
+        self.memory.close()
+        self.memory.unlink()
+
+
+class SharedState:
+    """
+    A consistent copy of a published state.
+    """
+
+    def __init__(self, header: np.ndarray, tiles: np.ndarray, entities: np.ndarray):
+        self.header = header  # Structured scalar of HEADER_DTYPE
+        self.tiles = tiles  # Tile types of shape (width, height)
+        self.entities = entities  # Structured array of ENTITY_DTYPE
+
+
+class SharedStateReader:
+    """
+    Reads the state published by a SharedStatePublisher, possibly from another process.
+    """
+
+    def __init__(self, name: str):
+        """
+        :param name: Name of the shared memory block of the publisher.
+        """
+        self.memory = shared_memory.SharedMemory(name=name)
+        if os.name == "posix" and name not in _published_names:
+            # Attaching registers the block with the resource tracker, which would remove it when this process exits
+            resource_tracker.unregister(self.memory._name, "shared_memory")
+        self.views = _StateViews(self.memory.buf)
+
+    @property
+    def sequence(self) -> int:
+        """
+        Sequence number of the state, it changes by two with every published tick.
+        """
+        return int(self.views.header["sequence"])
+
+    def read(self, retries: int = 1000) -> Union[SharedState, None]:
+        """
+        Copies the current state.
+        :param retries: How many times to retry when the state gets written while it is being copied.
+        :return: The state, or None if no consistent copy could be made.
+        """
+        views = self.views
+        for i in range(retries + 1):
+            sequence = int(views.header["sequence"])
+            if sequence % 2 == 1:
+                time.sleep(0)  # Let the publisher finish
+                continue
+            header = views.header.copy()
+            width = int(header["width"])
+            height = int(header["height"])
+            tiles = views.tiles[:width * height].reshape((width, height)).copy()
+            entities = views.entities[:int(header["entity_count"])].copy()
+            if int(views.header["sequence"]) == sequence:
+                return SharedState(header, tiles, entities)
+        return None
+
+    def close(self) -> None:
+        self.views = None
+        self.memory.close()
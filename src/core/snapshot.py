@@ -0,0 +1,344 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, List, Union
+
+if TYPE_CHECKING:
+    from core.game import Game
+    from core.entities.entity import Entity
+
+import struct
+
+import numpy as np
+
+from core import constants
+from core.entities.map.collider import Collider
+from core.entities.particles.bling import Bling
+from core.entities.particles.explosion import Explosion
+from core.entities.particles.projectile import Projectile
+from core.entities.tank.computer import Computer
+from core.entities.tank.player import Player
+from core.game_state import GameState
+from core.texture_manager import TextureManager
+
+SNAPSHOT_MAGIC = b"BTSS"
+SNAPSHOT_VERSION = 2
+
+ENTITY_TYPES = [Collider, Player, Computer, Explosion, Bling, Projectile]  # Index in the list is the type code
+FACING_NAMES = {(-1, 0): "L", (1, 0): "R", (0, 1): "U", (0, -1): "D"}
+
+REF_NONE = -1  # Entity references are indexes into the snapshot entity list, -2 - type code for removed entities
+
+_HEADER = struct.Struct("<4sHBHIi?I")  # Magic, version, game state, stage index, tick, timer, has seed, stage seed
+_RNG = struct.Struct("<625I?d")  # Mersenne twister state, has gauss, gauss
+# Spawn cooldown, tanks, flag lives, player lives, has player spawn point, player spawn point, player, player bling,
+# flag destroyed
+_DIRECTOR = struct.Struct("<dhhh?hhii?")
+_MAP = struct.Struct("<HH")  # Width, height, followed by the tile types and the health of every destructible wall
+_COUNTS = struct.Struct("<IIII")  # Entities, projectiles, spawned tanks, spawned blings
+_TYPE = struct.Struct("<B")
+_COLLIDER = struct.Struct("<iiii")  # Rectangle
+# Position, move direction, facing direction, last move, health, fire cooldown, flags, last fired bullet
+_TANK = struct.Struct("<iibbbbhhbhBi")
+_PLAYER = struct.Struct("<bb?")  # Raw movement direction, shoot now
+_COMPUTER = struct.Struct("<hd")  # Logic cooldown, shoot cooldown
+_PARTICLE = struct.Struct("<iii?")  # Position, lifespan, dead
+_PROJECTILE = struct.Struct("<iibbhii?")  # Sprite position, direction, speed, lifespan, owner, player owned
+
+_TANK_TRACK_ANIM = 1
+_TANK_SECOND_TEXTURE = 2
+
+
+def take_snapshot(game: Game) -> bytes:
+    """
+    Serializes the state of a running stage into a compact binary buffer.
+
+    The snapshot holds the game state and tick, the random number generator state, the director counters,
+    the tile types with the health of destructible walls, and the state of every entity (including projectiles)
+    in the entity manager order. References between entities (projectile owners, the last fired bullet of tanks,
+    the tanks and blings tracked by the director) are stored as indexes into the entity list.
+    :param game: Game with a loaded stage.
+    :return: The snapshot.
+    """
+    director = game.game_director
+    manager = game.entity_manager
+    system = manager.projectile_system
+    entities = manager.entities
+    projectiles = system.projectiles[:system.count].tolist()
+    indexes = {entity: i for i, entity in enumerate(entities + projectiles)}
+
+    def ref(entity: Union[Entity, None]) -> int:
+        if entity is None:
+            return REF_NONE
+        index = indexes.get(entity)
+        if index is None:
+            return -2 - _type_code(entity)
+        return index
+
+    parts = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, game.game_state.value, director.stage.index, game.tick,
+                          game.timer, game.stage_seed is not None, game.stage_seed or 0)]
+
+    version, state, gauss = game.rng.getstate()
+    parts.append(_RNG.pack(*state, gauss is not None, gauss or 0.0))
+
+    stage = director.stage
+    spawn_point = director.player_spawn_point
+    parts.append(_DIRECTOR.pack(director.spawn_cooldown, stage.active_tanks, stage.active_flag_lives,
+                                stage.active_player_lives, spawn_point is not None, *(spawn_point or (0, 0)),
+                                ref(director.player), ref(director.player_bling),
+                                director.flag is not None and director.flag.destroyed))
+
+    game_map = game.game_map
+    parts.append(_MAP.pack(*game_map.tile_types.shape))
+    parts.append(game_map.tile_types.tobytes())
+    walls = np.argwhere(game_map.tile_types == constants.TILE_TYPE_DESTRUCTIBLE_WALL).tolist()
+    parts.append(bytes(game_map.map[x, y].health for x, y in walls))
+
+    parts.append(_COUNTS.pack(len(entities), len(projectiles), len(director.spawned_tanks),
+                              len(director.spawned_blings)))
+    for entity in entities:
+        code = _type_code(entity)
+        parts.append(_TYPE.pack(code))
+        if isinstance(entity, Collider):
+            rect = entity.rect
+            parts.append(_COLLIDER.pack(rect.x, rect.y, rect.width, rect.height))
+        elif isinstance(entity, (Player, Computer)):
+            flags = ((_TANK_TRACK_ANIM if entity.track_anim else 0)
+                     | (_TANK_SECOND_TEXTURE if entity.image is entity.texture2 else 0))
+            parts.append(_TANK.pack(entity.x, entity.y, *entity.move_dir, *entity.facing_direction,
+                                    *entity.last_move, entity.health, entity.fire_cooldown, flags,
+                                    ref(entity.last_fired_bullet)))
+            if isinstance(entity, Player):
+                parts.append(_PLAYER.pack(*entity.raw_movement_direction, entity.shoot_now))
+            else:
+                parts.append(_COMPUTER.pack(entity.logic_cooldown, entity.shoot_cooldown))
+        else:
+            parts.append(_PARTICLE.pack(entity.x, entity.y, entity.lifespan, entity.dead))
+
+    sprite_positions = (system.positions[:system.count] + system.anchors[:system.count]).tolist()
+    directions = system.directions[:system.count].tolist()
+    for i, projectile in enumerate(projectiles):
+        parts.append(_PROJECTILE.pack(*sprite_positions[i], *directions[i], int(system.speeds[i]),
+                                      int(system.lifespans[i]), ref(system.owners[i]), projectile.player_owned))
+
+    refs = [ref(tank) for tank in director.spawned_tanks] + [ref(bling) for bling in director.spawned_blings]
+    parts.append(struct.pack(f"<{len(refs)}i", *refs))
+    return b"".join(parts)
+
+
+def restore_snapshot(game: Game, data: bytes) -> None:
+    """
+    Restores the game to the state of a snapshot.
+
+    Existing tiles and entities are reused wherever possible so that their sprites don't have to be recreated:
+    tiles are only recreated in the cells whose tile type differs from the snapshot and entities are taken over
+    by snapshot entities of the same type. The stage is never reparsed, when the game has a different stage loaded
+    the tiles are created directly from the snapshot tile types.
+    Animation frames of sprites are advanced by the pyglet clock and aren't part of the snapshot, animations
+    (explosions, blings) of restored entities restart from their first frame.
+    :param game: Game to restore, its director has to have the stages loaded.
+    :param data: Snapshot created by take_snapshot().
+    """
+    reader = _Reader(data)
+    magic, version, game_state, stage_index, tick, timer, has_seed, stage_seed = reader.read(_HEADER)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError("Not a supported snapshot")
+    rng_state = reader.read(_RNG)
+    (spawn_cooldown, active_tanks, active_flag_lives, active_player_lives, has_spawn_point, spawn_x, spawn_y,
+     player_ref, player_bling_ref, flag_destroyed) = reader.read(_DIRECTOR)
+
+    director = game.game_director
+    stage = director.stages[stage_index]
+    stage_changed = director.stage is not stage or game.game_map.map_data is not stage.map_data
+
+    # Tiles
+    width, height = reader.read(_MAP)
+    tile_types = np.frombuffer(reader.read_bytes(width * height), dtype=np.uint8).reshape((width, height))
+    game_map = game.game_map
+    game_map.restore_tiles(stage.map_data, tile_types, game)
+    walls = np.argwhere(tile_types == constants.TILE_TYPE_DESTRUCTIBLE_WALL).tolist()
+    for (x, y), health in zip(walls, reader.read_bytes(len(walls))):
+        wall = game_map.map[x, y]
+        if wall.health != health:
+            wall.set_health(health)
+
+    flag_cells = np.argwhere(tile_types == constants.TILE_TYPE_FLAG)
+    director.flag = game_map.map[tuple(flag_cells[0])] if len(flag_cells) else None
+    if director.flag is not None and director.flag.destroyed != flag_destroyed:
+        director.flag.destroyed = flag_destroyed
+        director.flag.image = TextureManager.flag_damaged if flag_destroyed else TextureManager.flag
+
+    # Entities
+    entity_count, projectile_count, spawned_tank_count, spawned_bling_count = reader.read(_COUNTS)
+    manager = game.entity_manager
+    pool = _EntityPool(game, manager.detach_all())
+    restored = []
+    bullet_refs = []
+    for i in range(entity_count):
+        cls = ENTITY_TYPES[reader.read(_TYPE)[0]]
+        if cls is Collider:
+            entity = Collider(*reader.read(_COLLIDER))
+        elif cls is Player or cls is Computer:
+            (x, y, move_x, move_y, facing_x, facing_y, last_move_x, last_move_y, health, fire_cooldown, flags,
+             bullet_ref) = reader.read(_TANK)
+            entity = pool.take(cls, x, y)
+            entity.move_dir = np.array((move_x, move_y))
+            entity.face(FACING_NAMES[(facing_x, facing_y)])
+            entity.last_move = (last_move_x, last_move_y)
+            entity.health = health
+            entity.fire_cooldown = fire_cooldown
+            entity.track_anim = bool(flags & _TANK_TRACK_ANIM)
+            image = entity.texture2 if flags & _TANK_SECOND_TEXTURE else entity.texture1
+            if entity.image is not image:
+                entity.image = image
+            bullet_refs.append((entity, bullet_ref))
+            if cls is Player:
+                raw_x, raw_y, entity.shoot_now = reader.read(_PLAYER)
+                entity.raw_movement_direction[:] = (raw_x, raw_y)
+            else:
+                entity.logic_cooldown, entity.shoot_cooldown = reader.read(_COMPUTER)
+        else:
+            x, y, lifespan, dead = reader.read(_PARTICLE)
+            entity = pool.take(cls, x, y)
+            entity.lifespan = lifespan
+            entity.dead = dead
+            if entity.sprite is not None:
+                entity.image = entity.image  # Restarts the animation of a reused sprite
+        restored.append(entity)
+        manager.add_entity(entity)
+
+    resolve = _References(restored)
+    for i in range(projectile_count):
+        x, y, direction_x, direction_y, speed, lifespan, owner_ref, player_owned = reader.read(_PROJECTILE)
+        projectile = pool.take(Projectile, x, y)
+        projectile.owner = resolve(owner_ref)
+        projectile.move_dir = (direction_x, direction_y)
+        projectile.resolve_rotation_4_axis()
+        projectile.speed = speed
+        projectile.lifespan = lifespan
+        projectile.player_owned = player_owned
+        restored.append(projectile)
+        manager.add_entity(projectile)
+
+    for tank, bullet_ref in bullet_refs:
+        tank.last_fired_bullet = resolve(bullet_ref)
+    pool.dispose()
+    for entity in restored:
+        entity.store_position()
+
+    # Director
+    refs = reader.read(struct.Struct(f"<{spawned_tank_count + spawned_bling_count}i"))
+    director.spawned_tanks = [resolve(ref) for ref in refs[:spawned_tank_count]]
+    director.spawned_blings = [resolve(ref) for ref in refs[spawned_tank_count:]]
+    director.player = resolve(player_ref)
+    director.player_bling = resolve(player_bling_ref)
+    director.player_spawn_point = (spawn_x, spawn_y) if has_spawn_point else None
+    director.spawn_cooldown = spawn_cooldown
+    director.stage = stage
+    stage.active_tanks = active_tanks
+    stage.active_flag_lives = active_flag_lives
+    stage.active_player_lives = active_player_lives
+    if stage_changed and not game.headless and not game.test_only:
+        director.adjust_game_window(stage, game)
+
+    # Game
+    game.game_state = GameState(game_state)
+    game.tick = tick
+    game.timer = timer
+    game.stage_seed = stage_seed if has_seed else None
+    game.rng.setstate((3, tuple(rng_state[:625]), rng_state[626] if rng_state[625] else None))
+
+
+def _type_code(entity: Entity) -> int:
+    try:
+        return ENTITY_TYPES.index(type(entity))
+    except ValueError:
+        raise ValueError(f"Entities of type {type(entity).__name__} can't be snapshotted") from None
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def read(self, record: struct.Struct) -> tuple:
+        values = record.unpack_from(self.data, self.offset)
+        self.offset += record.size
+        return values
+
+    def read_bytes(self, count: int) -> bytes:
+        values = self.data[self.offset:self.offset + count]
+        self.offset += count
+        return values
+
+
+class _EntityPool:
+    """
+    Entities detached from the entity manager, handed out again to restored entities of the same type.
+    """
+
+    def __init__(self, game: Game, entities: List[Entity]):
+        self.game = game
+        self.free = {}  # Type -> entities in reverse order, so that they are taken in their original order
+        for entity in reversed(entities):
+            self.free.setdefault(type(entity), []).append(entity)
+
+    def take(self, cls: type, x: int, y: int) -> Entity:
+        """
+        Returns an entity of the type placed at the position, a free one or a newly created one.
+        """
+        free = self.free.get(cls)
+        if free:
+            entity = free.pop()
+            entity.position = (x, y)
+            entity.to_remove = False
+            return entity
+
+        game = self.game
+        if cls is Player:
+            return game.register_player(Player(x=x, y=y, batch=game.batch))
+        if cls is Computer:
+            return Computer(x=x, y=y, batch=game.batch)
+        if cls is Projectile:
+            return Projectile(None, x=x, y=y, batch=game.batch)
+        return cls(x=x, y=y, batch=game.foreground_batch)
+
+    def dispose(self) -> None:
+        """
+        Disposes of the entities that were not taken.
+        """
+        for entities in self.free.values():
+            for entity in entities:
+                entity.delete()
+        self.free.clear()
+
+
+class _References:
+    """
+    Resolves entity references of a snapshot. References to entities that were already removed from the game
+    when the snapshot was taken resolve to a detached entity of the same type marked as removed.
+    """
+
+    def __init__(self, entities: List[Entity]):
+        self.entities = entities
+        self.removed = {}  # Type code -> placeholder entity
+
+    def __call__(self, ref: int) -> Union[Entity, None]:
+        if ref >= 0:
+            return self.entities[ref]
+        if ref == REF_NONE:
+            return None
+
+        code = -2 - ref
+        placeholder = self.removed.get(code)
+        if placeholder is None:
+            cls = ENTITY_TYPES[code]
+            if cls is Collider:
+                placeholder = Collider(0, 0, 0, 0)
+            elif cls is Projectile:
+                placeholder = Projectile(None)
+            else:
+                placeholder = cls()
+            placeholder.to_remove = True
+            if hasattr(placeholder, "dead"):
+                placeholder.dead = True
+            self.removed[code] = placeholder
+        return placeholder
@@ -0,0 +1,97 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    from core.entities.entity import Entity
+
+from core import constants
+
+
+class SpatialHash:
+    """
+    A uniform grid that buckets entities by the cells their bounding box overlaps.
+    Used to only look at entities that are near a certain area instead of all of them.
+
+    Query results are returned in the order the entities were inserted into the hash (same as iterating
+    the entity list would), so collision detection results do not depend on object ids or cell layout.
+    """
+
+    def __init__(self, cell_size: int = constants.SPATIAL_HASH_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # Cell coordinates -> dict of entities in the cell
+        self.entity_cells = {}  # Entity -> range of cells it currently occupies (min_x, min_y, max_x, max_y)
+        self.insertion_order = {}  # Entity -> insertion serial number
+        self._serial = 0
+
+    def _cell_range(self, rect) -> tuple:
+        """
+        Returns the range of cells a rectangle overlaps as (min_x, min_y, max_x, max_y), inclusive.
+        """
+        return (int(rect.x // self.cell_size),
+                int(rect.y // self.cell_size),
+                int((rect.x + rect.width) // self.cell_size),
+                int((rect.y + rect.height) // self.cell_size))
+
+    def insert(self, entity: Entity) -> None:
+        if entity not in self.insertion_order:
+            self.insertion_order[entity] = self._serial
+            self._serial += 1
+        self._insert_cells(entity)
+
+    def _insert_cells(self, entity: Entity) -> None:
+        cell_range = self._cell_range(entity.rect)
+        self.entity_cells[entity] = cell_range
+        for x in range(cell_range[0], cell_range[2] + 1):
+            for y in range(cell_range[1], cell_range[3] + 1):
+                cell = self.cells.get((x, y))
+                if cell is None:
+                    cell = self.cells[(x, y)] = {}
+                cell[entity] = None
+
+    def remove(self, entity: Entity) -> None:
+        self.insertion_order.pop(entity, None)
+        self._remove_cells(entity)
+
+    def _remove_cells(self, entity: Entity) -> None:
+        cell_range = self.entity_cells.pop(entity, None)
+        if cell_range is None:
+            return
+        for x in range(cell_range[0], cell_range[2] + 1):
+            for y in range(cell_range[1], cell_range[3] + 1):
+                cell = self.cells.get((x, y))
+                if cell is not None:
+                    cell.pop(entity, None)
+                    if not cell:
+                        del self.cells[(x, y)]
+
+    def update(self, entity: Entity) -> None:
+        """
+        Moves the entity into the cells matching its current bounding box.
+        Does nothing if the entity is not in the hash or still occupies the same cells.
+        """
+        old_range = self.entity_cells.get(entity)
+        if old_range is None:
+            return
+        if old_range == self._cell_range(entity.rect):
+            return
+        self._remove_cells(entity)
+        self._insert_cells(entity)
+
+    def query(self, rect) -> List[Entity]:
+        """
+        Returns entities whose cells overlap the cells of the given rectangle.
+        The result is a superset of the entities actually intersecting the rectangle.
+        """
+        min_x, min_y, max_x, max_y = self._cell_range(rect)
+        found = {}
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                cell = self.cells.get((x, y))
+                if cell is not None:
+                    found.update(cell)
+        return sorted(found, key=self.insertion_order.__getitem__)
+
+    def clear(self) -> None:
+        self.cells.clear()
+        self.entity_cells.clear()
+        self.insertion_order.clear()
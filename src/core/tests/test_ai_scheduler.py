@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+
+from core import constants
+from core.ai_scheduler import AIScheduler
+from core.entities.tank.computer import Computer
+from core.game import Game
+
+working_dir = os.path.dirname(os.path.realpath(__file__)) + os.sep + os.pardir + os.sep + os.pardir
+
+
+def spawn_computers(game, count):
+    director = game.game_director
+    cells = np.argwhere(game.game_map.walkable).tolist()
+    for x, y in cells[::len(cells) // count][:count]:
+        computer = Computer(x=x * constants.TILE_SIZE + constants.TANK_SIZE // 2,
+                            y=y * constants.TILE_SIZE + constants.TANK_SIZE // 2, batch=None)
+        game.entity_manager.add_entity(computer)
+        director.spawned_tanks.append(computer)
+
+
+def test_decision_budget():
+    game = Game(working_dir, headless=True, seed=4)
+    game.start_stage(0)
+    game.game_director.stage.active_tanks = 0
+    spawn_computers(game, 12)
+    scheduler = game.game_director.ai_scheduler
+
+    decided = {}
+    original = Computer.ai_update
+    try:
+        Computer.ai_update = lambda tank, g: decided.setdefault(tank, []).append(g.tick) or original(tank, g)
+        for i in range(200):
+            game.update(0)
+            assert scheduler.decisions <= constants.AI_DECISIONS_PER_TICK
+    finally:
+        Computer.ai_update = original
+
+    # Nobody starves and the decisions got spread over different ticks
+    alive = [tank for tank in game.game_director.spawned_tanks if tank.health > 0]
+    assert all(len(decided.get(tank, [])) >= 5 for tank in alive)
+    first_ticks = [decided[tank][0] for tank in alive]
+    assert len(set(first_ticks)) >= len(alive) // constants.AI_DECISIONS_PER_TICK
+
+
+def test_decision_interval():
+    game = Game(working_dir, test_only=True, headless=True)
+    tank = Computer(x=constants.TANK_SIZE // 2, y=constants.TANK_SIZE // 2, batch=None)
+    assert AIScheduler.decision_interval(tank) == constants.AI_LOGIC_TIME_STEP  # Standing still
+
+    tank.move_dir = np.array([1, 0])
+    tank.last_move = (-2, 0)
+    assert AIScheduler.decision_interval(tank) == constants.AI_LOGIC_TIME_STEP  # Aligned with the tiles
+    tank.move(6, 0)
+    # Reaches the next aligned position after 16 pixels
+    assert AIScheduler.decision_interval(tank) == 16 // tank.speed - 1
+    tank.move(0, 10)
+    assert AIScheduler.decision_interval(tank) == constants.AI_MAX_DECISION_INTERVAL
+
+
+def play_vectorized(seed, ticks):
+    game = Game(working_dir, headless=True, seed=seed)
+    game.game_director.ai_scheduler.vectorized = True
+    game.start_stage(0)
+    game.game_director.stage.active_tanks = 0
+    spawn_computers(game, 40)
+    bullets = set()
+    for i in range(ticks):
+        game.update(0)
+        bullets.update(tank.last_fired_bullet for tank in game.game_director.spawned_tanks
+                       if tank.last_fired_bullet is not None)
+    return game, len(bullets)
+
+
+def test_vectorized_decisions():
+    game, shots = play_vectorized(7, 300)
+    tanks = game.game_director.spawned_tanks
+    assert shots > 0
+    assert any(tank.is_moving() for tank in tanks if tank.health > 0)
+    assert len({tuple(tank.move_dir) for tank in tanks}) == 4
+
+    # Reproducible from the seed
+    other, other_shots = play_vectorized(7, 300)
+    assert other_shots == shots
+    assert [(tank.rect.x, tank.rect.y) for tank in other.game_director.spawned_tanks] == \
+           [(tank.rect.x, tank.rect.y) for tank in tanks]
@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+
+from core import constants
+from core.batch import _WallCounter, run_match
+from core.game import Game
+
+working_dir = os.path.dirname(os.path.realpath(__file__)) + os.sep + os.pardir + os.sep + os.pardir
+
+
+def test_run_match():
+    result = run_match(working_dir, 0, 1, 50)
+    assert result.outcome == "timeout" and result.ticks == 50
+    assert result.tanks_killed == 0
+
+    result = run_match(working_dir, 0, 1, 10000)
+    assert result.outcome == "loss" and result.ticks < 10000
+    assert result.walls_destroyed > 0
+    assert run_match(working_dir, 0, 1, 10000).to_row() == result.to_row()
+
+
+def test_run_match_restores_overrides():
+    cooldown = constants.NEW_TANK_SPAWN_MAX_COOLDOWN
+    run_match(working_dir, 0, 1, 10, {"NEW_TANK_SPAWN_MAX_COOLDOWN": cooldown + 1})
+    assert constants.NEW_TANK_SPAWN_MAX_COOLDOWN == cooldown
+
+
+def test_wall_counter():
+    game = Game(working_dir, headless=True)
+    game.start_stage(0)
+    counter = _WallCounter(game)
+    game.game_map.tile_listeners.append(counter)
+    walls = np.argwhere(game.game_map.tile_types == constants.TILE_TYPE_DESTRUCTIBLE_WALL).tolist()
+    game.game_map.remove_tile(game.game_map.map[tuple(walls[0])])
+    assert counter.count == len(walls) - 1
+
+    # Destroyed walls stay counted once the next stage gets loaded in the same tick
+    game.start_stage(1)
+    assert counter.count == len(walls) - 1
@@ -1,5 +1,6 @@
 import os
-from pyglet.shapes import Rectangle
+
+import pytest
 
 from core import collision, constants
 from core import utils
@@ -10,6 +11,7 @@ from core.game import Game
 from core.entities import map
 from core.stage import Stage
 from core.tests import t_utils
+from core.utils import Rect
 
 test1 = """    #
  $  #
@@ -18,58 +20,65 @@ test1 = """    #
   F #"""
 
 working_dir = os.path.dirname(os.path.realpath(__file__)) + os.sep + os.pardir + os.sep + os.pardir
-game = Game(working_dir, True)
 
-map_data = Stage.generate_map_data(test1.splitlines())
-game.game_map.generate_map_from_map_data(map_data, game)
+
+def create_game(map_lines):
+    game = Game(working_dir, True, headless=True)
+    game.game_map.generate_map_from_map_data(Stage.generate_map_data(map_lines), game)
+    return game
+
+
+@pytest.fixture
+def game():
+    return create_game(test1.splitlines())
 
 
 def test_aabb():
-    assert collision.aabb(Rectangle(0, 0, 10, 10), Rectangle(10, 0, 10, 20)) is False
-    assert collision.aabb(Rectangle(-20, -10, 10, 10), Rectangle(40, -5, 10, 20)) is False
-    assert collision.aabb(Rectangle(40, -5, 10, 20), Rectangle(-20, -10, 10, 10)) is False
+    assert collision.aabb(Rect(0, 0, 10, 10), Rect(10, 0, 10, 20)) is False
+    assert collision.aabb(Rect(-20, -10, 10, 10), Rect(40, -5, 10, 20)) is False
+    assert collision.aabb(Rect(40, -5, 10, 20), Rect(-20, -10, 10, 10)) is False
 
-    assert collision.aabb(Rectangle(10, 20, 25, 25), Rectangle(-30, 0, 40, 20)) is False
-    assert collision.aabb(Rectangle(9, 20, 25, 25), Rectangle(-30, 0, 40, 20)) is False
-    assert collision.aabb(Rectangle(9, 20, 25, 25), Rectangle(-30, 0, 40, 21)) is True
-    assert collision.aabb(Rectangle(9, 20, 25, 25), Rectangle(-30, 0, 40, 26)) is True
+    assert collision.aabb(Rect(10, 20, 25, 25), Rect(-30, 0, 40, 20)) is False
+    assert collision.aabb(Rect(9, 20, 25, 25), Rect(-30, 0, 40, 20)) is False
+    assert collision.aabb(Rect(9, 20, 25, 25), Rect(-30, 0, 40, 21)) is True
+    assert collision.aabb(Rect(9, 20, 25, 25), Rect(-30, 0, 40, 26)) is True
 
-    assert collision.aabb(Rectangle(50, 50, 50, 50), Rectangle(49, 50, 50, 50)) is True
-    assert collision.aabb(Rectangle(0, 50, 50, 50), Rectangle(49, 50, 50, 50)) is True
-    assert collision.aabb(Rectangle(20, 30, 15, 20), Rectangle(30, 35, 10, 20)) is True
+    assert collision.aabb(Rect(50, 50, 50, 50), Rect(49, 50, 50, 50)) is True
+    assert collision.aabb(Rect(0, 50, 50, 50), Rect(49, 50, 50, 50)) is True
+    assert collision.aabb(Rect(20, 30, 15, 20), Rect(30, 35, 10, 20)) is True
 
 
 def test_aabb_with_result():
-    result = Rectangle(0, 0, 0, 0)
+    result = Rect(0, 0, 0, 0)
 
-    assert utils.rect_equal(Rectangle(1, 2, 30, 30), Rectangle(1, 2, 30, 30)) is True
-    assert utils.rect_equal(Rectangle(1, 2, 30, 31), Rectangle(1, 2, 30, 30)) is False
+    assert utils.rect_equal(Rect(1, 2, 30, 30), Rect(1, 2, 30, 30)) is True
+    assert utils.rect_equal(Rect(1, 2, 30, 31), Rect(1, 2, 30, 30)) is False
 
-    assert collision.aabb_with_result(Rectangle(0, 0, 10, 10), Rectangle(10, 0, 10, 20), result) is False
+    assert collision.aabb_with_result(Rect(0, 0, 10, 10), Rect(10, 0, 10, 20), result) is False
     assert utils.rect_empty(result) is True
 
-    assert collision.aabb_with_result(Rectangle(-20, -10, 10, 10), Rectangle(40, -5, 10, 20), result) is False
-    assert collision.aabb_with_result(Rectangle(40, -5, 10, 20), Rectangle(-20, -10, 10, 10), result) is False
+    assert collision.aabb_with_result(Rect(-20, -10, 10, 10), Rect(40, -5, 10, 20), result) is False
+    assert collision.aabb_with_result(Rect(40, -5, 10, 20), Rect(-20, -10, 10, 10), result) is False
 
-    assert collision.aabb_with_result(Rectangle(10, 20, 25, 25), Rectangle(-30, 0, 40, 20), result) is False
-    assert collision.aabb_with_result(Rectangle(9, 20, 25, 25), Rectangle(-30, 0, 40, 20), result) is False
-    assert collision.aabb_with_result(Rectangle(9, 20, 25, 25), Rectangle(-30, 0, 40, 21), result) is True
-    assert utils.rect_equal(result, Rectangle(9, 20, 1, 1)) is True
+    assert collision.aabb_with_result(Rect(10, 20, 25, 25), Rect(-30, 0, 40, 20), result) is False
+    assert collision.aabb_with_result(Rect(9, 20, 25, 25), Rect(-30, 0, 40, 20), result) is False
+    assert collision.aabb_with_result(Rect(9, 20, 25, 25), Rect(-30, 0, 40, 21), result) is True
+    assert utils.rect_equal(result, Rect(9, 20, 1, 1)) is True
 
-    assert collision.aabb_with_result(Rectangle(9, 20, 25, 25), Rectangle(-30, 0, 40, 26), result) is True
-    assert utils.rect_equal(result, Rectangle(9, 20, 1, 6)) is True
+    assert collision.aabb_with_result(Rect(9, 20, 25, 25), Rect(-30, 0, 40, 26), result) is True
+    assert utils.rect_equal(result, Rect(9, 20, 1, 6)) is True
 
-    assert collision.aabb_with_result(Rectangle(50, 50, 50, 50), Rectangle(49, 50, 50, 50), result) is True
-    assert utils.rect_equal(result, Rectangle(50, 50, 49, 50)) is True
+    assert collision.aabb_with_result(Rect(50, 50, 50, 50), Rect(49, 50, 50, 50), result) is True
+    assert utils.rect_equal(result, Rect(50, 50, 49, 50)) is True
 
-    assert collision.aabb_with_result(Rectangle(0, 50, 50, 50), Rectangle(49, 50, 50, 50), result) is True
-    assert utils.rect_equal(result, Rectangle(49, 50, 1, 50)) is True
+    assert collision.aabb_with_result(Rect(0, 50, 50, 50), Rect(49, 50, 50, 50), result) is True
+    assert utils.rect_equal(result, Rect(49, 50, 1, 50)) is True
 
-    assert collision.aabb_with_result(Rectangle(20, 30, 15, 20), Rectangle(30, 35, 10, 20), result) is True
-    assert utils.rect_equal(result, Rectangle(30, 35, 5, 15)) is True
+    assert collision.aabb_with_result(Rect(20, 30, 15, 20), Rect(30, 35, 10, 20), result) is True
+    assert utils.rect_equal(result, Rect(30, 35, 5, 15)) is True
 
 
-def test_check_collision():
+def test_check_collision(game):
     colliding_entities = []
     test_entity = Tank(x=1 * constants.TANK_SIZE + constants.TANK_SIZE // 2,
                        y=1 * constants.TANK_SIZE,
@@ -110,3 +119,59 @@ def test_check_collision():
                                      game.entity_manager, game.game_map)
     assert len(colliding_entities) == 1
     t_utils.check_list_contains_objects_of_type(colliding_entities, 1, Wall)
+
+
+def test_sweep(game):
+    wall = game.game_map.get_tile_at_indexes(1, 1)  # Rect 24, 24, 24, 24
+
+    assert collision.sweep(Rect(60, 30, 10, 10), 0, -1, 20, [wall]) == (12, [wall])
+    assert collision.sweep(Rect(60, 30, 10, 10), 0, -1, 5, [wall]) == (5, [])
+    assert collision.sweep(Rect(60, 30, 10, 10), 0, 1, 20, [wall]) == (20, [])
+    assert collision.sweep(Rect(60, 48, 10, 10), 0, -1, 20, [wall]) == (20, [])
+    assert collision.sweep(Rect(30, 0, 10, 10), 1, 1, 20, [wall]) == (14, [wall])
+    assert collision.sweep(Rect(30, 30, 10, 10), 1, 1, 20, [wall]) == (0, [wall])
+    assert collision.sweep(Rect(30, 30, 10, 10), 1, 1, 20, [wall], [wall]) == (20, [])
+
+
+def test_resolve_collision_wall_slide():
+    slide_map = """......
+......
+...$..
+......
+......"""
+    game = create_game(slide_map.splitlines())
+
+    # Hits the bottom left corner of the wall, slides to the left around it and moves up with the remaining speed
+    test_entity = Tank(x=30 + constants.TANK_SIZE // 2, y=constants.TANK_SIZE // 2, batch=None)
+    game.entity_manager.add_entity(test_entity)
+    test_entity.speed = 10
+    test_entity.move_dir[1] = 1
+    test_entity.resolve_collision(game, 0)
+    assert (test_entity.rect.x, test_entity.rect.y) == (24, 4)
+
+    # Hits the wall in the middle and stops
+    test_entity.move(24, -4)
+    test_entity.resolve_collision(game, 0)
+    assert (test_entity.rect.x, test_entity.rect.y) == (48, 0)
+
+
+def test_collision_layers():
+    game = create_game(["......"] * 5)
+    colliding_entities = []
+    test_entity = Tank(x=constants.TANK_SIZE * 2, y=constants.TANK_SIZE * 2, batch=None)
+    other_entity = Tank(x=constants.TANK_SIZE * 2, y=constants.TANK_SIZE * 2, batch=None)
+    game.entity_manager.add_entity(test_entity)
+    game.entity_manager.add_entity(other_entity)
+
+    assert collision.check_collision(test_entity, test_entity.rect, None, colliding_entities,
+                                     game.entity_manager, game.game_map)
+    assert colliding_entities == [other_entity]
+
+    other_entity.collision_layer = constants.COLLISION_LAYER_PROJECTILE
+    assert not collision.check_collision(test_entity, test_entity.rect, None, colliding_entities,
+                                         game.entity_manager, game.game_map)
+
+    other_entity.collision_layer = constants.COLLISION_LAYER_TANK
+    test_entity.owner = other_entity
+    assert not collision.check_collision(test_entity, test_entity.rect, None, colliding_entities,
+                                         game.entity_manager, game.game_map)
@@ -1,12 +1,20 @@
 import os
 
+import numpy as np
+
+from core import constants
 from core.entities.entity import Entity
+from core.entities.particles.explosion import Explosion
+from core.entities.particles.projectile import Projectile
+from core.entities.tank.tank import Tank
 from core.entity_manager import EntityManager
 from core.game import Game
+from core.projectile_system import _overlapping_pairs
+from core.stage import Stage
 from core.texture_manager import TextureManager
 
 working_dir = os.path.dirname(os.path.realpath(__file__)) + os.sep + os.pardir + os.sep + os.pardir
-game = Game(working_dir, True)
+game = Game(working_dir, True, headless=True)
 
 
 class ExampleEntity(Entity):
@@ -71,3 +79,178 @@ def cumulative_test():
     assert len(game.entity_manager.entities) == 1
     game.entity_manager.update_entities(game, 5)
     assert len(game.entity_manager.entities) == 0 and test_entity.update_count == 6
+
+
+def test_spatial_hash_query():
+    game.entity_manager = EntityManager()
+    near_entity = ExampleEntity()
+    far_entity = ExampleEntity()
+    game.entity_manager.add_entity(near_entity)
+    game.entity_manager.add_entity(far_entity)
+    far_entity.move(500, 500)
+
+    near = game.entity_manager.get_entities_near(near_entity.rect)
+    assert near_entity in near and far_entity not in near
+    near = game.entity_manager.get_entities_near(far_entity.rect)
+    assert far_entity in near and near_entity not in near
+
+    far_entity.move(-500, -500)
+    assert game.entity_manager.get_entities_near(near_entity.rect) == [near_entity, far_entity]
+
+    game.entity_manager.remove_entity(near_entity)
+    game.entity_manager.update_entities(game, 0)
+    assert game.entity_manager.get_entities_near(far_entity.rect) == [far_entity]
+
+
+def test_broadphase_candidates():
+    game.entity_manager = EntityManager()
+    entity = ExampleEntity()
+    near_entity = ExampleEntity()
+    far_entity = ExampleEntity()
+    for ent in (entity, near_entity, far_entity):
+        game.entity_manager.add_entity(ent)
+    near_entity.move(entity.rect.width, 0)
+    far_entity.move(500, 500)
+
+    game.entity_manager.broadphase.update(game.entity_manager.entities)
+    assert game.entity_manager.get_collision_candidates(entity, entity.rect) == []
+
+    entity.speed = 1  # Entities that can move are paired with ones within their reach
+    game.entity_manager.broadphase.update(game.entity_manager.entities)
+    assert game.entity_manager.get_collision_candidates(entity, entity.rect) == [near_entity]
+    assert game.entity_manager.get_collision_candidates(near_entity, near_entity.rect) == [entity]
+    assert game.entity_manager.get_collision_candidates(far_entity, far_entity.rect) == []
+
+    late_entity = ExampleEntity()
+    game.entity_manager.add_entity(late_entity)
+    assert game.entity_manager.get_collision_candidates(entity, entity.rect) == [near_entity, late_entity]
+
+    game.entity_manager.broadphase.invalidate()
+    assert far_entity in game.entity_manager.get_collision_candidates(far_entity, far_entity.rect)
+
+
+def test_projectile_system():
+    game.entity_manager = EntityManager()
+    empty_map = "\n".join(["." * 12] * 12)
+    game.game_map.generate_map_from_map_data(Stage.generate_map_data(empty_map.splitlines()), game)
+    owner = Tank(x=100, y=100, batch=None)
+    target = Tank(x=200, y=100, batch=None)
+    game.entity_manager.add_entity(owner)
+    game.entity_manager.add_entity(target)
+
+    projectile = Projectile(owner, x=owner.center_x(), y=owner.center_y(), batch=None)
+    projectile.move_dir = (1, 0)
+    game.entity_manager.add_entity(projectile)
+    assert projectile not in game.entity_manager.entities
+    assert game.entity_manager.projectile_system.count == 1
+
+    start_x = projectile.rect.x
+    game.entity_manager.update_entities(game, 0)
+    assert game.entity_manager.projectile_system.positions[0, 0] == start_x + projectile.speed
+    assert projectile.rect.x == start_x + projectile.speed  # Handles follow the arrays without rendering
+    assert owner.health == constants.TANK_HEALTH  # Owner is ignored
+
+    for tick in range(1, 100):
+        game.entity_manager.update_entities(game, tick)
+        if projectile.to_remove:
+            break
+
+    assert projectile.to_remove
+    assert target.health == constants.TANK_HEALTH - 1
+    assert game.entity_manager.projectile_system.count == 0
+    assert any(isinstance(entity, Explosion) for entity in game.entity_manager.entities)
+
+
+def test_projectile_overlapping_pairs():
+    rng = np.random.default_rng(1)
+    for count in (0, 1, 50):
+        positions = rng.integers(0, 100, (count, 2))
+        boxes = np.concatenate((positions, positions + rng.integers(0, 15, (count, 2))), axis=1)
+        first, second = _overlapping_pairs(boxes)
+        found = set(zip(first.tolist(), second.tolist()))
+        assert len(found) == len(first)
+        for i in range(count):
+            for j in range(count):
+                overlap = (i != j and boxes[i, 0] < boxes[j, 2] and boxes[i, 2] > boxes[j, 0] and
+                           boxes[i, 1] < boxes[j, 3] and boxes[i, 3] > boxes[j, 1])
+                assert overlap == ((i, j) in found or (j, i) in found)
+                assert not ((i, j) in found and (j, i) in found)
+
+
+def test_projectile_rotation():
+    game.entity_manager = EntityManager()
+    empty_map = "\n".join(["." * 12] * 12)
+    game.game_map.generate_map_from_map_data(Stage.generate_map_data(empty_map.splitlines()), game)
+    tank = Tank(x=100, y=100, batch=None)
+    game.entity_manager.add_entity(tank)
+
+    # The bullet image points up, bullets fired to the sides are turned like the tank
+    tank.face("R")
+    tank.shoot(game)
+    projectile = tank.last_fired_bullet
+    assert projectile.facing_direction == (1, 0)
+    assert projectile.rotation == tank.rotation == 90
+    assert (projectile.scale_x, projectile.scale_y) == (tank.scale_x, tank.scale_y)
+    assert projectile not in game.entity_manager.get_entities_near(projectile.rect)
+
+
+def test_projectile_leaves_map():
+    game.entity_manager = EntityManager()
+    empty_map = "\n".join(["." * 12] * 12)
+    game.game_map.generate_map_from_map_data(Stage.generate_map_data(empty_map.splitlines()), game)
+    owner = Tank(x=100, y=100, batch=None)
+    game.entity_manager.add_entity(owner)
+
+    # Stopped by the boundary colliders, and by the map size once they are gone
+    for colliders in (True, False):
+        if not colliders:
+            for collider in game.entity_manager.colliders:
+                game.entity_manager.remove_entity(collider)
+            game.entity_manager.update_entities(game, 0)
+            assert game.entity_manager.colliders == []
+
+        projectile = Projectile(owner, x=owner.center_x(), y=owner.center_y(), batch=None)
+        projectile.move_dir = (-1, 0)
+        game.entity_manager.add_entity(projectile)
+        start_x = projectile.rect.x
+        for tick in range(constants.BULLET_LIFESPAN):
+            game.entity_manager.update_entities(game, tick)
+            if projectile.to_remove:
+                break
+            assert projectile.rect.x >= 0
+
+        assert projectile.to_remove
+        assert tick == start_x // projectile.speed  # Removed by the move that crosses the edge
+        assert game.entity_manager.projectile_system.count == 0
+
+
+def test_entity_buckets():
+    game.entity_manager = EntityManager()
+    empty_map = "\n".join(["." * 12] * 12)
+    game.game_map.generate_map_from_map_data(Stage.generate_map_data(empty_map.splitlines()), game)
+    entity = ExampleEntity()
+    tank = Tank(x=100, y=100, batch=None)
+    explosion = Explosion(x=100, y=100, batch=None)
+    for ent in (entity, tank, explosion):
+        game.entity_manager.add_entity(ent)
+
+    assert len(game.entity_manager.colliders) == 4
+    assert game.entity_manager.others == [entity]
+    assert game.entity_manager.tanks == [tank]
+    assert game.entity_manager.particles == [explosion]
+    assert game.entity_manager.projectile_targets == game.entity_manager.colliders + [tank]
+    assert len(game.entity_manager.entities) == 7
+
+    # Visual particles never take part in collision detection
+    assert explosion not in game.entity_manager.get_entities_near(explosion.rect)
+    game.entity_manager.broadphase.update(game.entity_manager.collision_entities)
+    assert explosion not in game.entity_manager.get_collision_candidates(tank, tank.rect)
+    game.entity_manager.broadphase.invalidate()
+
+    game.entity_manager.remove_entity(explosion)
+    game.entity_manager.remove_entity(tank)
+    game.entity_manager.update_entities(game, 0)
+    assert entity.update_count == 1
+    assert game.entity_manager.tanks == [] and game.entity_manager.particles == []
+    assert game.entity_manager.projectile_targets == game.entity_manager.colliders
+    assert len(game.entity_manager.entities) == 5
@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+
+from core import constants
+from core.env import BattleCityEnv, VectorEnv, OBS_CHANNELS, OBS_PLAYER, OBS_TILES
+
+working_dir = os.path.dirname(os.path.realpath(__file__)) + os.sep + os.pardir + os.sep + os.pardir
+
+
+def test_env_episode():
+    env = BattleCityEnv(working_dir, max_steps=20)
+    observation = env.reset(1)
+    assert observation.shape == env.observation_shape == (OBS_CHANNELS, 26, 26)
+    assert np.array_equal(observation[OBS_TILES], env.game.game_map.tile_types)
+    assert observation[OBS_PLAYER].sum() == 4  # The tank covers 2x2 tiles
+
+    done = False
+    steps = 0
+    while not done:
+        observation, reward, done, info = env.step(constants.INPUT_UP | constants.INPUT_SHOOT)
+        steps += 1
+    assert steps == 20 and info["outcome"] == "timeout"
+    assert env.game.tick == 20 * constants.ENV_TICKS_PER_STEP
+
+
+def test_vector_env_lockstep():
+    runs = []
+    for i in range(2):
+        envs = VectorEnv(working_dir, 3, max_steps=40)
+        observations = envs.reset(5).copy()
+        rewards = []
+        actions = np.random.default_rng(0).integers(0, 32, (60, 3))
+        for step_actions in actions:
+            observations, step_rewards, dones, infos = envs.step(step_actions)
+            rewards.append(step_rewards.copy())
+        runs.append((observations.copy(), np.array(rewards)))
+        assert observations.shape == (3, OBS_CHANNELS, 26, 26)
+
+    assert np.array_equal(runs[0][0], runs[1][0])
+    assert np.array_equal(runs[0][1], runs[1][1])
+    # Environments share the parsed stages but not their state
+    assert envs.envs[0].game.game_director.stage is not envs.envs[1].game.game_director.stage
+    assert envs.envs[0].game.game_director.stage.map_data is envs.envs[1].game.game_director.stage.map_data
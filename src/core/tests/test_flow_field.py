@@ -0,0 +1,47 @@
+import os
+import random
+
+import numpy as np
+
+from core import constants
+from core.flow_field import FlowField, UNREACHABLE
+from core.game import Game
+
+working_dir = os.path.dirname(os.path.realpath(__file__)) + os.sep + os.pardir + os.sep + os.pardir
+
+
+def test_flow_field():
+    game = Game(working_dir, headless=True, seed=1)
+    game.start_stage(0)
+    game_map = game.game_map
+    field = game.game_director.flow_field
+    distances = field.distances
+    flag = game.game_director.flag
+    flag_x, flag_y = flag.rect.x // constants.TILE_SIZE, flag.rect.y // constants.TILE_SIZE
+
+    # Blocks next to the flag cost only entering them, blocks overlapping the flag are never entered
+    assert field.distance(flag_x, flag_y) == UNREACHABLE
+    assert field.distance(flag_x - 2, flag_y) == field.costs[flag_x - 2, flag_y]
+    assert field.distance(-1, 0) == UNREACHABLE
+    spawn = game.game_director.player_spawn_point
+    assert field.distance(*spawn) < UNREACHABLE
+
+    # Destroying walls updates the field in place to the same distances a full pass computes
+    rng = random.Random(5)
+    walls = np.argwhere(game_map.tile_types == constants.TILE_TYPE_DESTRUCTIBLE_WALL).tolist()
+    for x, y in rng.sample(walls, 40):
+        before = field.distances.copy()
+        game_map.remove_tile(game_map.map[x, y])
+        assert field.distances is distances
+        assert (field.distances <= before).all()
+        incremental = field.distances.copy()
+        field.rebuild()
+        assert np.array_equal(incremental, field.distances)
+        distances = field.distances
+
+
+def test_flow_field_without_map():
+    game = Game(working_dir, test_only=True, headless=True)
+    field = FlowField(game.game_map)
+    assert field.distances is None
+    assert field.distance(0, 0) == UNREACHABLE
@@ -0,0 +1,73 @@
+import inspect
+import os
+import time
+
+import pyglet
+
+from core.frame_pacer import FramePacer
+from core.game import Game
+
+working_dir = os.path.dirname(os.path.realpath(__file__)) + os.sep + os.pardir + os.sep + os.pardir
+
+
+def test_frame_pacer():
+    pacer = FramePacer(frame_time=0.005, history=100)
+    assert pacer.jitter_percentiles() == {}
+
+    start = time.perf_counter()
+    pacer.wait()
+    for i in range(20):
+        pacer.wait()
+    assert time.perf_counter() - start >= 20 * 0.005
+
+    stats = pacer.jitter_percentiles((50, 99))
+    assert set(stats) == {"wake_error", "frame_jitter"}
+    assert all(ms >= 0 for ms in stats["wake_error"].values())
+    assert len(pacer.wake_errors) == 21
+    assert 0 <= pacer.spin_margin <= pacer.frame_time
+
+
+def test_frame_pacer_skips_missed_frames():
+    pacer = FramePacer(frame_time=0.005)
+    pacer.wait()
+    time.sleep(0.05)
+
+    # Falling behind doesn't make the following frames rush to catch up
+    start = time.perf_counter()
+    pacer.wait()
+    pacer.wait()
+    assert time.perf_counter() - start >= 0.005 - 1e-6
+
+
+def test_game_run_loops(monkeypatch):
+    game = Game(working_dir, headless=True)
+    game.start_stage(0)
+    app_runs = []
+    real_signature = inspect.signature(pyglet.app.run)
+
+    def app_run(*args):
+        real_signature.bind(*args)  # Raises TypeError for arguments the real pyglet.app.run doesn't take
+        app_runs.append(args)
+
+    monkeypatch.setattr(pyglet.app, "run", app_run)
+
+    # Without a pacer the pyglet event loop runs the frames
+    try:
+        game.run()
+    finally:
+        pyglet.clock.unschedule(game.run_frame)
+    assert app_runs == [()]
+
+    # With a pacer the game runs its own loop until it is shut down
+    pacer = FramePacer(frame_time=0.001)
+    wait = pacer.wait
+
+    def wait_and_stop():
+        if game.tick >= 10:
+            game.shutdown()
+        return wait()
+
+    pacer.wait = wait_and_stop
+    game.run(pacer)
+    assert app_runs == [()]
+    assert game.tick >= 10
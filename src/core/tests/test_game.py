@@ -0,0 +1,99 @@
+import inspect
+import os
+from types import SimpleNamespace
+
+import pyglet
+
+from core import constants
+from core.entities.entity import Entity
+from core.game import Game
+from core.texture_manager import TextureManager
+from core.game_state import GameState
+
+working_dir = os.path.dirname(os.path.realpath(__file__)) + os.sep + os.pardir + os.sep + os.pardir
+
+
+def test_headless_stage():
+    game = Game(working_dir, headless=True)
+    assert game.batch is None and game.ui is None
+
+    game.start_stage(0)
+    assert game.game_state == GameState.GAME
+    for i in range(200):
+        game.update(0)
+
+    assert game.tick == 200
+    assert game.game_director.player is not None
+    assert all(entity.sprite is None for entity in game.entity_manager.entities)
+    assert all(tile.sprite is None for tile in game.game_map.map.ravel() if tile is not None)
+
+
+def test_turbo_frames():
+    game = Game(working_dir, headless=True)
+    game.start_stage(0)
+
+    assert game.run_frame(constants.TICK_TIME) == 1 and game.tick == 1
+    game.ticks_per_frame = 5
+    assert game.run_frame(0) == 5 and game.tick == 6
+    game.toggle_turbo()
+    assert game.ticks_per_frame == 1
+
+    game.frame_time_budget = 0.01
+    ticks = game.run_frame(0)
+    assert ticks >= 1 and game.tick == 6 + ticks
+
+    game.frame_time_budget = None
+    game.game_state = GameState.MAIN_MENU
+    game.ticks_per_frame = 5
+    assert game.run_frame(0) == 1
+
+
+def test_fixed_timestep():
+    game = Game(working_dir, headless=True)
+    game.start_stage(0)
+    tick_time = constants.TICK_TIME
+
+    assert game.run_frame(tick_time * 0.5) == 0
+    assert game.render_alpha == 0.5
+    assert game.run_frame(tick_time * 0.75) == 1 and game.tick == 1
+    assert game.render_alpha == 0.25
+    assert game.run_frame(tick_time * 2) == 2 and game.tick == 3
+
+    # A long stall only catches up a limited number of ticks
+    assert game.run_frame(1.0) == constants.MAX_CATCH_UP_TICKS
+    assert game.accumulator < tick_time
+
+
+def test_sprite_interpolation():
+    Game(working_dir, True, headless=True)
+    entity = Entity(TextureManager.error, x=10, y=20)
+    entity.sprite = SimpleNamespace(position=(10, 20))
+    entity.store_position()
+    entity.position = (14, 20)
+
+    entity.sync_sprite(0.25)
+    assert entity.sprite.position == (11, 20)
+    entity.sync_sprite(0.5)
+    assert entity.sprite.position == (12, 20)
+    entity.sync_sprite()
+    assert entity.sprite.position == (14, 20)
+
+
+def test_run_with_pyglet_loop(monkeypatch):
+    game = Game(working_dir, headless=True)
+    game.start_stage(0)
+    calls = []
+    real_signature = inspect.signature(pyglet.app.run)
+
+    def app_run(*args):
+        # The real pyglet.app.run has to accept the call as well
+        real_signature.bind(*args)
+        calls.append(args)
+        pyglet.clock.tick()
+
+    monkeypatch.setattr(pyglet.app, "run", app_run)
+    try:
+        game.run()
+    finally:
+        pyglet.clock.unschedule(game.run_frame)
+    assert calls == [()]
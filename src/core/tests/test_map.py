@@ -1,8 +1,10 @@
 import os
 
+import numpy as np
 import pytest
 
 from core import constants
+from core import utils
 from core.entities.map.bush import Bush
 from core.entities.map.destructible_wall import DestructibleWall
 from core.entities.map.flag import Flag
@@ -54,7 +56,7 @@ P ##  ##############  ## X
 ############F ############"""
 
 working_dir = os.path.dirname(os.path.realpath(__file__)) + os.sep + os.pardir + os.sep + os.pardir
-game = Game(working_dir, True)
+game = Game(working_dir, True, headless=True)
 
 
 @pytest.fixture
@@ -264,3 +266,129 @@ def test_get_tile_relative_to_entity_full_tile(map1):
     returned_tiles = game.game_map.get_tile_next_to_entity(entity, (-1, 0), True)
     assert len(returned_tiles) == 2
     t_utils.check_list_contains_objects_of_type(returned_tiles, 2, None)
+
+
+def test_raycast(map1):
+    bullet_size = 12
+    rect = utils.Rect(12 * constants.TILE_SIZE + 6, 20 * constants.TILE_SIZE + 6, bullet_size, bullet_size)
+
+    tiles, hit_point = game.game_map.raycast(rect, (-1, 0), 100)
+    assert tiles == [game.game_map.map[8, 20]]
+    assert hit_point == (9 * constants.TILE_SIZE, rect.y + bullet_size // 2)
+
+    tiles, hit_point = game.game_map.raycast(rect, (1, 0), 100)
+    assert len(tiles) == 1 and type(tiles[0]) is DestructibleWall
+    assert hit_point == (16 * constants.TILE_SIZE, rect.y + bullet_size // 2)
+
+    assert game.game_map.raycast(rect, (1, 0), 10) is None
+    assert game.game_map.raycast(rect, (0, -1), 100) is None
+
+    # Cells covered by the oversized flag are hit as well
+    rect = utils.Rect(16 * constants.TILE_SIZE + 6, constants.TILE_SIZE + 6, bullet_size, bullet_size)
+    tiles, hit_point = game.game_map.raycast(rect, (0, -1), 10)
+    assert tiles == [game.game_map.map[15, 0]]
+    assert hit_point == (rect.x + bullet_size // 2, rect.y)
+
+
+def test_compact_arrays(map1):
+    game_map = game.game_map
+    assert game_map.tile_types[0, 0] == constants.TILE_TYPE_DESTRUCTIBLE_WALL
+    assert game_map.tile_types[4, 20] == constants.TILE_TYPE_WALL
+    assert game_map.tile_types[22, 5] == constants.TILE_TYPE_BUSH
+    assert game_map.tile_types[15, 0] == constants.TILE_TYPE_FLAG
+    assert game_map.tile_types[14, 15] == constants.TILE_TYPE_EMPTY
+    assert game_map.collidable[0, 0] and not game_map.collidable[22, 5] and not game_map.collidable[14, 15]
+    assert game_map.collidable[16, 1]  # Covered by the flag
+
+    assert game_map.area_free(14, 14, 2, 2)
+    assert not game_map.area_free(14, 15, 2, 2)
+    assert game_map.area_free(-2, -2, 2, 2)
+
+    area = (12 * constants.TILE_SIZE, 15 * constants.TILE_SIZE, 4 * constants.TILE_SIZE, 3 * constants.TILE_SIZE)
+    tiles = [tile for tile in game_map.get_tiles_in_area(*area).ravel() if tile is not None and tile.collidable]
+    assert len(tiles) > 0 and list(game_map.get_collidable_tiles_in_area(*area)) == tiles
+
+    tile = Tank(x=7 * constants.TILE_SIZE + constants.TANK_SIZE // 2,
+                y=20 * constants.TILE_SIZE + constants.TANK_SIZE // 2,
+                batch=None)
+    assert not game_map.collidable_next_to_entity(tile, (0, 1), True)
+    assert game_map.collidable_next_to_entity(tile, (1, 0), True)
+
+    wall = game_map.map[14, 16]
+    game_map.remove_tile(wall)
+    assert game_map.tile_types[14, 16] == constants.TILE_TYPE_EMPTY
+    assert not game_map.collidable[14, 16]
+
+
+def walkable_brute_force(game_map):
+    width, height = game_map.collidable.shape
+    walkable = np.zeros((width, height), dtype=bool)
+    for x in range(width - 1):
+        for y in range(height - 1):
+            walkable[x, y] = not game_map.collidable[x:x + 2, y:y + 2].any()
+    return walkable
+
+
+def test_walkable(map1):
+    game_map = game.game_map
+    assert np.array_equal(game_map.walkable, walkable_brute_force(game_map))
+    assert game_map.walkable[14, 14] and not game_map.walkable[14, 15]
+
+    for tile in [game_map.map[14, 16], game_map.map[4, 20], game_map.map[0, 0], game_map.map[15, 0]]:
+        game_map.remove_tile(tile)
+        assert np.array_equal(game_map.walkable, walkable_brute_force(game_map))
+
+    # Same answers as the tile queries for every tank position not overlapping collidable tiles
+    for x, y in np.argwhere(game_map.walkable).tolist():
+        tank = Tank(x=x * constants.TILE_SIZE + constants.TANK_SIZE // 2,
+                    y=y * constants.TILE_SIZE + constants.TANK_SIZE // 2, batch=None)
+        for direction in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            try:
+                free = not game_map.collidable_next_to_entity(tank, direction, True, True)
+            except IndexError:
+                free = False
+            assert game_map.walkable_next_to_indexes((x, y), direction) == free
+    assert not game_map.walkable_next_to_indexes(None, (1, 0))
+
+
+def flag_visible_by_ray(game_map, pos, direction):
+    ray_types = game_map.get_tile_ray(pos, direction, constants.AI_VISION_TILE_RANGE, True,
+                                      array=game_map.tile_types)
+    walls = ray_types == constants.TILE_TYPE_WALL
+    walls_before = np.cumsum(walls, axis=1) - walls
+    return bool(np.any((ray_types == constants.TILE_TYPE_FLAG) & (walls_before == 0)))
+
+
+def assert_flag_visibility_matches_rays(game_map):
+    width, height = game_map.tile_types.shape
+    for x in range(width - 1):
+        for y in range(height - 1):
+            for direction in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                assert game_map.flag_visible_from((x, y), direction) == \
+                       flag_visible_by_ray(game_map, (x, y), direction), (x, y, direction)
+
+
+@pytest.fixture
+def map3():
+    lines = ["+        +",
+             "+   $    +",
+             "+        +",
+             "+  $F $  +",
+             "+  $$    +",
+             "+        +"]
+    game.game_map.generate_map_from_map_data(Stage.generate_map_data(lines), game)
+
+
+@pytest.mark.parametrize("map_name", ["map1", "map2", "map3"])
+def test_flag_visibility(map_name, request):
+    request.getfixturevalue(map_name)
+    game_map = game.game_map
+    assert game_map.flag_visible.any()
+    assert not game_map.flag_visible_from(None, (1, 0))
+    assert_flag_visibility_matches_rays(game_map)
+
+    flag_x, flag_y = np.argwhere(game_map.tile_types == constants.TILE_TYPE_FLAG)[0]
+    for x, y in [(flag_x - 1, flag_y), (flag_x, flag_y - 1), (flag_x - 1, flag_y + 1)]:
+        if 0 <= x and 0 <= y and game_map.map[x, y] is not None:
+            game_map.remove_tile(game_map.map[x, y])
+            assert_flag_visibility_matches_rays(game_map)
@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+
+from core.game import Game
+from core.game_state import GameState
+from core.observation_grid import ObservationGrid, GRID_PLAYER, GRID_ENEMY_TANKS, GRID_FLAG
+from core.snapshot import take_snapshot, restore_snapshot
+
+working_dir = os.path.dirname(os.path.realpath(__file__)) + os.sep + os.pardir + os.sep + os.pardir
+
+
+def rebuilt(game):
+    grid = ObservationGrid(game)
+    grid.detach()
+    return grid.array
+
+
+def test_observation_grid_incremental():
+    game = Game(working_dir, headless=True, seed=2)
+    grid = ObservationGrid(game)
+    assert grid.array is None
+
+    game.start_stage(0)
+    array = grid.array
+    assert array[GRID_PLAYER].sum() == 4
+    assert array[GRID_FLAG].sum() == 4  # The flag covers 2x2 tiles
+    snapshot = None
+    for i in range(1500):
+        if game.game_state != GameState.GAME:
+            break
+        game.update(0)
+        if i % 50 == 0:
+            assert np.array_equal(grid.array, rebuilt(game))
+        if i == 300:
+            snapshot = take_snapshot(game)
+
+    assert grid.array is array  # Updated in place
+    assert np.array_equal(grid.array, rebuilt(game))
+    assert array[GRID_ENEMY_TANKS].sum() > 0
+
+    restore_snapshot(game, snapshot)
+    assert np.array_equal(grid.array, rebuilt(game))
@@ -0,0 +1,66 @@
+import os
+
+from core import constants
+from core.game import Game
+from core.game_state import GameState
+from core.replay import Replay, play
+
+working_dir = os.path.dirname(os.path.realpath(__file__)) + os.sep + os.pardir + os.sep + os.pardir
+
+
+def state_signature(game):
+    return sorted((type(entity).__name__, int(entity.rect.x), int(entity.rect.y))
+                  for entity in game.entity_manager.entities)
+
+
+def scripted_input(tick):
+    inputs = [constants.INPUT_UP, constants.INPUT_LEFT, constants.INPUT_UP | constants.INPUT_RIGHT,
+              constants.INPUT_DOWN][(tick // 40) % 4]
+    if tick % 25 == 0:
+        inputs |= constants.INPUT_SHOOT
+    return inputs
+
+
+def test_seeded_games_match():
+    games = [Game(working_dir, headless=True, seed=7) for i in range(2)]
+    for game in games:
+        game.start_stage(0)
+        for i in range(400):
+            game.update(0)
+
+    assert games[0].stage_seed == games[1].stage_seed
+    assert state_signature(games[0]) == state_signature(games[1])
+
+
+def test_replay_round_trip():
+    game = Game(working_dir, headless=True, seed=3)
+    game.record_replays = True
+    game.start_stage(0)
+    for i in range(600):
+        if game.game_state != GameState.GAME:
+            break
+        game.game_director.player.scripted_input = scripted_input(game.tick)
+        game.update(0)
+
+    replay = Replay.from_bytes(game.replay.to_bytes())
+    assert replay.ticks == game.replay.ticks
+    assert replay.inputs == game.replay.inputs
+    assert len(replay.to_bytes()) < len(replay.inputs)
+
+    replayed = play(replay, working_dir)
+    assert replayed.tick == game.tick
+    assert state_signature(replayed) == state_signature(game)
+
+
+def test_out_of_range_seeds():
+    for seed in (-1, 2 ** 32 + 5):
+        game = Game(working_dir, headless=True)
+        game.record_replays = True
+        game.start_stage(0, seed)
+        for i in range(50):
+            game.update(0)
+
+        assert 0 <= game.stage_seed < 2 ** 32
+        replay = Replay.from_bytes(game.replay.to_bytes())
+        assert replay.seed == game.stage_seed
+        assert state_signature(play(replay, working_dir)) == state_signature(game)
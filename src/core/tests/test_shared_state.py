@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+
+from core.game import Game
+from core.shared_state import SharedStatePublisher, SharedStateReader, ENTITY_PLAYER, ENTITY_ENEMY, \
+    ENTITY_PROJECTILE
+
+working_dir = os.path.dirname(os.path.realpath(__file__)) + os.sep + os.pardir + os.sep + os.pardir
+
+
+def test_shared_state():
+    game = Game(working_dir, headless=True, seed=3)
+    game.start_stage(0)
+    publisher = SharedStatePublisher(game)
+    game.state_publisher = publisher
+    reader = SharedStateReader(publisher.name)
+    try:
+        assert reader.sequence == 0
+        for i in range(600):
+            game.update(0)
+        assert reader.sequence == 1200
+
+        state = reader.read()
+        assert state.header["tick"] == game.tick - 1
+        assert state.header["active_tanks"] == game.game_director.stage.active_tanks
+        assert np.array_equal(state.tiles, game.game_map.tile_types)
+
+        tanks = game.entity_manager.tanks
+        types = state.entities["type"].tolist()
+        assert types.count(ENTITY_PLAYER) == 1
+        assert types.count(ENTITY_ENEMY) == len(tanks) - 1
+        assert types.count(ENTITY_PROJECTILE) == game.entity_manager.projectile_system.count
+        assert (state.entities["x"][0], state.entities["y"][0]) == (tanks[0].rect.x, tanks[0].rect.y)
+
+        # A write in progress (odd sequence) is never returned
+        publisher.views.header["sequence"] += 1
+        assert reader.read(retries=3) is None
+        publisher.views.header["sequence"] += 1
+        assert reader.read() is not None
+    finally:
+        reader.close()
+        publisher.close()
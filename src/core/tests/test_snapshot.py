@@ -0,0 +1,85 @@
+import os
+
+from core.entities.particles.projectile import Projectile
+from core.game import Game
+from core.game_state import GameState
+from core.snapshot import take_snapshot, restore_snapshot
+
+working_dir = os.path.dirname(os.path.realpath(__file__)) + os.sep + os.pardir + os.sep + os.pardir
+
+
+def run_ticks(game, ticks):
+    for i in range(ticks):
+        if game.game_state != GameState.GAME:
+            break
+        game.update(0)
+
+
+def test_snapshot_rollback():
+    game = Game(working_dir, headless=True, seed=3)
+    game.start_stage(0)
+    run_ticks(game, 500)
+    snapshot = take_snapshot(game)
+    tiles = set(tile for tile in game.game_map.map.ravel() if tile is not None)
+
+    run_ticks(game, 300)
+    end = take_snapshot(game)
+    end_tick = game.tick
+
+    restore_snapshot(game, snapshot)
+    assert take_snapshot(game) == snapshot
+    assert game.tick == end_tick - 300
+    # Tiles that weren't destroyed in between are kept
+    assert tiles & set(tile for tile in game.game_map.map.ravel() if tile is not None)
+
+    run_ticks(game, 300)
+    assert take_snapshot(game) == end
+
+
+def test_snapshot_restore_other_stage():
+    game = Game(working_dir, headless=True, seed=5)
+    game.start_stage(0)
+    run_ticks(game, 400)
+    snapshot = take_snapshot(game)
+    run_ticks(game, 200)
+
+    other = Game(working_dir, headless=True)
+    other.start_stage(1)
+    restore_snapshot(other, snapshot)
+    assert other.game_director.stage is other.game_director.stages[0]
+    assert take_snapshot(other) == snapshot
+
+    run_ticks(other, 200)
+    assert take_snapshot(other) == take_snapshot(game)
+
+
+def test_snapshot_restores_projectile_rotation():
+    game = Game(working_dir, headless=True, seed=2)
+    game.start_stage(0)
+    player = game.game_director.player
+    player.face("L")
+    player.shoot(game)
+    snapshot = take_snapshot(game)
+
+    other = Game(working_dir, headless=True)
+    other.start_stage(0)
+    restore_snapshot(other, snapshot)
+    system = other.entity_manager.projectile_system
+    projectile = next(projectile for projectile in system.projectiles[:system.count] if
+                      projectile.owner is other.game_director.player)
+    assert isinstance(projectile, Projectile)
+    assert projectile.facing_direction == (-1, 0)
+    assert (projectile.rotation, projectile.scale_x, projectile.scale_y) == (90, 1, -1)
+
+
+def test_snapshot_without_player_spawn_point():
+    game = Game(working_dir, headless=True, seed=4)
+    game.start_stage(0)
+    game.game_director.player_spawn_point = None
+    snapshot = take_snapshot(game)
+
+    other = Game(working_dir, headless=True)
+    other.start_stage(0)
+    restore_snapshot(other, snapshot)
+    assert other.game_director.player_spawn_point is None
+    assert take_snapshot(other) == snapshot
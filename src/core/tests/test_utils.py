@@ -1,39 +1,39 @@
 import pytest
-from pyglet.shapes import Rectangle
 from core import utils
+from core.utils import Rect
 
 
 def test_rect_functions():
-    rect = Rectangle(20, -10, 20, 5)
+    rect = Rect(20, -10, 20, 5)
     utils.add_vector_to_rect(rect, (6, 8))
     assert rect.x == 26 and rect.y == -2 and rect.width == 20 and rect.height == 5
-    rect = Rectangle(20, -10, 20, 5)
+    rect = Rect(20, -10, 20, 5)
     utils.add_vector_to_rect(rect, (-5, -13))
     assert rect.x == 15 and rect.y == -23 and rect.width == 20 and rect.height == 5
-    rect = Rectangle(20, -10, 20, 5)
+    rect = Rect(20, -10, 20, 5)
     utils.add_vector_to_rect(rect, (45, 100))
     assert rect.x == 65 and rect.y == 90 and rect.width == 20 and rect.height == 5
 
-    rect = Rectangle(10, 20, 50, 50)
-    rect2 = Rectangle(0, 0, 30, 30)
+    rect = Rect(10, 20, 50, 50)
+    rect2 = Rect(0, 0, 30, 30)
     utils.center_rect_in_rect(rect2, rect)
     assert rect2.x == 20 and rect2.y == 30 and rect2.width == 30 and rect2.height == 30
     assert rect.x == 10 and rect.y == 20 and rect.width == 50 and rect.height == 50
 
-    rect = Rectangle(10, 20, 50, 50)
-    rect2 = Rectangle(0, 0, 30, 30)
+    rect = Rect(10, 20, 50, 50)
+    rect2 = Rect(0, 0, 30, 30)
     utils.center_rect_in_rect(rect, rect2)
     assert rect.x == -10 and rect.y == -10 and rect.width == 50 and rect.height == 50
     assert rect2.x == 0 and rect2.y == 0 and rect2.width == 30 and rect2.height == 30
 
-    rect = Rectangle(10, 20, 50, 50)
-    rect2 = Rectangle(0, 0, 30, 30)
+    rect = Rect(10, 20, 50, 50)
+    rect2 = Rect(0, 0, 30, 30)
     assert not utils.rect_empty(rect) and not utils.rect_empty(rect2)
-    assert utils.rect_empty(Rectangle(10, 10, 1, 0))
-    assert utils.rect_empty(Rectangle(10, 10, -0, 5))
-    assert utils.rect_empty(Rectangle(10, 10, 43, -2))
-    assert utils.rect_empty(Rectangle(10, 10, 0, 0))
-    assert not utils.rect_empty(Rectangle(10, 10, 1, 1))
+    assert utils.rect_empty(Rect(10, 10, 1, 0))
+    assert utils.rect_empty(Rect(10, 10, -0, 5))
+    assert utils.rect_empty(Rect(10, 10, 43, -2))
+    assert utils.rect_empty(Rect(10, 10, 0, 0))
+    assert not utils.rect_empty(Rect(10, 10, 1, 1))
 
     assert not utils.rect_equal(rect, rect2)
     rect2.x = rect.x
@@ -55,7 +55,7 @@ def test_rect_functions():
     assert utils.point_in_rect((rect.x + rect.width, rect.y), rect)
     assert not utils.point_in_rect((rect.x + rect.width + 1, 25), rect)
 
-    rect = Rectangle(0, 0, 10, 10)
+    rect = Rect(0, 0, 10, 10)
     utils.set_rect(rect, 4, -2, 22, 6)
     assert rect.x == 4 and rect.y == -2 and rect.width == 22 and rect.height == 6
 
@@ -84,3 +84,24 @@ def test_sum_tuples_elements():
         assert utils.sum_tuples_elements((0, 0), None)
     with pytest.raises(ValueError):
         assert utils.sum_tuples_elements((3, 1), (-4, -5, 1))
+
+
+def test_rect():
+    rect = Rect(1, 2, 3, 4)
+    assert rect.x == 1 and rect.y == 2 and rect.width == 3 and rect.height == 4
+    assert utils.rect_equal(Rect(), Rect(0, 0, 0, 0))
+
+    with pytest.raises(AttributeError):
+        rect.color = (0, 0, 0)
+
+
+def test_compact_list():
+    items = [1, 2, 3, 4, 5, 6]
+    removed = utils.compact_list(items, lambda item: item % 2 == 0)
+    assert items == [1, 3, 5]
+    assert removed == [2, 4, 6]
+
+    assert utils.compact_list(items, lambda item: False) == []
+    assert items == [1, 3, 5]
+    assert utils.compact_list(items, lambda item: True) == [1, 3, 5]
+    assert items == []
@@ -1,13 +1,31 @@
-import pyglet
-from pyglet.gl import *
 import os
+import struct
+
+import pyglet
+
+
+class TextureInfo:
+    """
+    Dimensions and anchor point of a texture. Used in place of pyglet images in headless mode.
+    """
+    __slots__ = ("width", "height", "anchor_x", "anchor_y")
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.anchor_x = 0
+        self.anchor_y = 0
 
 
 class TextureManager:
     """
     Static manager object for texture loading
+
+    In headless mode only the dimensions of the textures are read (no pyglet images and no OpenGL involved).
+    Animations are then represented by their first frame.
     """
     resources_path = None
+    headless = None  # Whether the currently loaded textures are headless, None if nothing is loaded
 
     error = None
     bullet = None
@@ -56,19 +74,51 @@ class TextureManager:
         """
         :param path: Path to the resource relative to the resource directory
         """
+        if TextureManager.headless:
+            return TextureManager.load_texture_info(path)
         image = pyglet.image.load(TextureManager.resources_path + os.sep + path)
         return image
 
+    @staticmethod
+    def load_texture_info(path: str) -> TextureInfo:
+        """
+        Reads the dimensions of a PNG texture from its header.
+        :param path: Path to the resource relative to the resource directory
+        """
+        with open(TextureManager.resources_path + os.sep + path, "rb") as file:
+            header = file.read(24)
+        if header[:8] != b"\x89PNG\r\n\x1a\n" or header[12:16] != b"IHDR":
+            raise ValueError(f"{path} is not a PNG image!")
+        width, height = struct.unpack(">II", header[16:24])
+        return TextureInfo(width, height)
+
+    @staticmethod
+    def load_animation(images: list, duration: float, loop: bool):
+        if TextureManager.headless:
+            return images[0]
+        return pyglet.image.Animation.from_image_sequence(images, duration=duration, loop=loop)
+
+    @staticmethod
+    def load_image_grid(image, rows: int, columns: int) -> list:
+        if TextureManager.headless:
+            return [TextureInfo(image.width // columns, image.height // rows) for _ in range(rows * columns)]
+        return list(pyglet.image.ImageGrid(image, rows, columns))
+
     @staticmethod
     def set_center_anchor(image):
         image.anchor_x = image.width // 2
         image.anchor_y = image.height // 2
 
     @staticmethod
-    def load():
+    def load(headless: bool = False):
         """
         Loads all necessary game textures. Needs to be called before creating any entities.
+        :param headless: Only load texture dimensions. Does nothing if full textures are already loaded.
         """
+        if headless and TextureManager.headless is False:
+            return
+        TextureManager.headless = headless
+
         TextureManager.tank_player_1 = TextureManager.load_texture("tank_player_1.png")
         TextureManager.tank_player_2 = TextureManager.load_texture("tank_player_2.png")
         TextureManager.tank_standard_1 = TextureManager.load_texture("tank_standard_1_w.png")
@@ -104,15 +154,11 @@ class TextureManager:
         exp6 = TextureManager.load_texture("explosion/exp6_48.png")
 
         explosion_anim_images = [exp1, exp2, exp3, exp4, exp5, exp6]
-        TextureManager.exp_anim = pyglet.image.Animation.from_image_sequence(explosion_anim_images,
-                                                                             duration=0.07,
-                                                                             loop=False)
+        TextureManager.exp_anim = TextureManager.load_animation(explosion_anim_images, duration=0.07, loop=False)
 
         bling = TextureManager.load_texture("bling.png")
-        bling_images = pyglet.image.ImageGrid(bling, 1, 10)
-        TextureManager.bling_seq = pyglet.image.Animation.from_image_sequence(bling_images,
-                                                                              duration=0.035,
-                                                                              loop=True)
+        bling_images = TextureManager.load_image_grid(bling, 1, 10)
+        TextureManager.bling_seq = TextureManager.load_animation(bling_images, duration=0.035, loop=True)
 
         TextureManager.bullet = TextureManager.load_texture("bullet12.png")
         TextureManager.set_center_anchor(TextureManager.bullet)
@@ -1,6 +1,23 @@
 import math
 
-from pyglet.shapes import Rectangle
+
+class Rect:
+    """
+    A plain axis aligned rectangle. Used for entity bounding boxes and other collision detection calculations.
+
+    Pyglet shapes also carry vertex and drawing state which makes creating and updating them expensive,
+    this class only holds the position and dimensions.
+    """
+    __slots__ = ("x", "y", "width", "height")
+
+    def __init__(self, x=0, y=0, width=0, height=0):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def __repr__(self):
+        return f"Rect({self.x}, {self.y}, {self.width}, {self.height})"
 
 
 def add_vector_to_rect(rectangle, vector):
@@ -11,7 +28,7 @@ def add_vector_to_rect(rectangle, vector):
     rectangle.y += vector[1]
 
 
-def center_rect_in_rect(center_rect: Rectangle, outer_rect: Rectangle):
+def center_rect_in_rect(center_rect: Rect, outer_rect: Rect):
     """
     Aligns a rectangle in center of another rectangle.
     """
@@ -19,18 +36,18 @@ def center_rect_in_rect(center_rect: Rectangle, outer_rect: Rectangle):
     center_rect.y = (outer_rect.y + outer_rect.height // 2) - center_rect.height // 2
 
 
-def rect_empty(rect: Rectangle) -> bool:
+def rect_empty(rect: Rect) -> bool:
     """
     Check for <= zero height or width of a rectangle.
     """
     return rect.width <= 0 or rect.height <= 0
 
 
-def rect_equal(rect1: Rectangle, rect2: Rectangle):
+def rect_equal(rect1: Rect, rect2: Rect):
     return rect1.x == rect2.x and rect1.y == rect2.y and rect1.width == rect2.width and rect1.height == rect2.height
 
 
-def rect_in_rect(rect1: Rectangle, rect2: Rectangle) -> bool:
+def rect_in_rect(rect1: Rect, rect2: Rect) -> bool:
     """
     Checks whether a rectangle rect1 is fully contained within a rectangle rect2.
     """
@@ -39,7 +56,7 @@ def rect_in_rect(rect1: Rectangle, rect2: Rectangle) -> bool:
     return point_in_rect(bottomLeft, rect2) and point_in_rect(topRight, rect2)
 
 
-def point_in_rect(point: tuple, rect: Rectangle) -> bool:
+def point_in_rect(point: tuple, rect: Rect) -> bool:
     """
     Checks if a point is located within a rectangle.
     :param point: tuple with 2 elements (x and y)
@@ -56,7 +73,7 @@ def point_in_rect(point: tuple, rect: Rectangle) -> bool:
     return True
 
 
-def set_rect(rect: Rectangle, x, y, w, h):
+def set_rect(rect: Rect, x, y, w, h):
     """
     Sets the rectangle dimensions to different ones.
     """
@@ -66,7 +83,7 @@ def set_rect(rect: Rectangle, x, y, w, h):
     rect.height = h
 
 
-def get_center_of_rect(rect: Rectangle) -> tuple:
+def get_center_of_rect(rect: Rect) -> tuple:
     return rect.x + rect.width // 2, rect.y + rect.height // 2
 
 
@@ -108,3 +125,23 @@ def distance(p1: tuple, p2: tuple) -> float:
 
 def manhattan_distance(p1: tuple, p2: tuple) -> float:
     return abs(p1[0] - p2[0]) + abs(p1[1] - p2[1])
+
+
+def compact_list(items: list, remove) -> list:
+    """
+    Removes all items matching a predicate from a list in a single pass.
+    The list is compacted in place and the order of the kept items is preserved.
+    :param items: The list to compact.
+    :param remove: Callable returning True for items that should be removed.
+    :return: List of the removed items in their original order.
+    """
+    removed = []
+    write = 0
+    for item in items:
+        if remove(item):
+            removed.append(item)
+        else:
+            items[write] = item
+            write += 1
+    del items[write:]
+    return removed
@@ -0,0 +1,153 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    from core.game import Game
+    from core.entities.tank.computer import Computer
+
+import numpy as np
+
+from core import constants
+from core.flow_field import NEIGHBOURS, UNREACHABLE
+from core.map import FLAG_VISIBILITY_DIRECTIONS
+
+DIRECTION_OFFSETS = np.array(NEIGHBOURS)  # U, L, D, R like Computer directions and FLAG_VISIBILITY_DIRECTIONS
+
+
+def _choose(weights: np.ndarray, uniform: np.ndarray) -> np.ndarray:
+    """
+    Picks an index of every row of weights with probability proportional to the weights.
+    :param uniform: A uniform random number in [0, 1) for every row.
+    """
+    cumulative = np.cumsum(weights, axis=1)
+    targets = uniform * cumulative[:, -1]
+    return np.minimum((cumulative <= targets[:, None]).sum(axis=1), weights.shape[1] - 1)
+
+
+class VectorizedAI:
+    """
+    Makes the decisions of many AI tanks at once with numpy, used by the AIScheduler when constants.AI_VECTORIZED
+    is set.
+
+    The state of the tanks is gathered into arrays and the same rules as in Computer.ai_update and
+    Computer._shoot_logic are evaluated for all of them together: flag visibility and free directions come from
+    the map lookup arrays, direction weights from the flow field. Instead of drawing random directions until a free one
+    comes up, a direction is drawn once from the weights of the free directions. A junction turn that the tank would
+    try up to 5 times succeeds with the probability all 5 tries would have together.
+
+    Random numbers come from a numpy generator seeded from the game random number generator every tick, so matches
+    stay reproducible from their seed. They differ from the matches played with the per tank AI though.
+    """
+
+    def __init__(self):
+        self._generator = None
+
+    def begin_tick(self, game: Game) -> None:
+        self._generator = np.random.default_rng(game.rng.getrandbits(64))
+
+    def decide(self, game: Game, tanks: List[Computer]) -> np.ndarray:
+        """
+        Runs the decisions of the given tanks and writes their new movement directions.
+        :return: The number of ticks every tank can wait before its next decision (see AIScheduler.decision_interval).
+        """
+        game_map = game.game_map
+        count = len(tanks)
+        positions = np.array([(tank.rect.x, tank.rect.y) for tank in tanks])
+        centers = np.array([(tank.center_x(), tank.center_y()) for tank in tanks])
+        move = np.array([tuple(tank.move_dir) for tank in tanks])
+        moving = np.array([tank.is_moving() for tank in tanks])
+        facing = np.array([FLAG_VISIBILITY_DIRECTIONS[tuple(tank.facing_direction)] for tank in tanks])
+        speeds = np.array([tank.speed for tank in tanks])
+        uniform = self._generator.random((count, 3))
+
+        on_map = ((positions >= 0).all(axis=1) & (positions[:, 0] < game_map.map_data["pixel_width"]) &
+                  (positions[:, 1] < game_map.map_data["pixel_height"]))
+        cells = np.where(on_map[:, None], positions // constants.TILE_SIZE, 0)
+        flag_detected = on_map & game_map.flag_visible[facing, cells[:, 0], cells[:, 1]]
+
+        # Free directions and their distances to the flag
+        width, height = game_map.walkable.shape
+        neighbours_x = cells[:, 0, None] + DIRECTION_OFFSETS[:, 0]
+        neighbours_y = cells[:, 1, None] + DIRECTION_OFFSETS[:, 1]
+        inside = on_map[:, None] & (neighbours_x >= 0) & (neighbours_y >= 0) & (neighbours_x < width) & \
+            (neighbours_y < height)
+        neighbours_x = np.clip(neighbours_x, 0, width - 1)
+        neighbours_y = np.clip(neighbours_y, 0, height - 1)
+        free = inside & game_map.walkable[neighbours_x, neighbours_y]
+
+        # Direction weights, the flow field is followed to the closest free neighbour (see Computer)
+        weights = np.ones((count, 4))
+        flow_field = game.game_director.flow_field
+        if flow_field.distances is not None:
+            distances = np.where(free, flow_field.distances[neighbours_x, neighbours_y], UNREACHABLE)
+            best = distances.min(axis=1)
+            weights[distances == best[:, None]] = constants.AI_FLAG_DIRECTION_BIAS
+            fallback = best >= UNREACHABLE
+        else:
+            fallback = np.ones(count, dtype=bool)
+        if fallback.any():
+            flag = game.game_director.flag
+            right = flag.center_x() > centers[:, 0]
+            up = flag.center_y() > centers[:, 1]
+            bias = constants.AI_FLAG_DIRECTION_BIAS
+            weights[fallback] = np.stack([np.where(up, bias, 1.), np.where(right, 1., bias),
+                                          np.where(up, 1., bias), np.where(right, bias, 1.)], axis=1)[fallback]
+
+        free_weights = np.where(free, weights, 0.)
+        blocked = free_weights.sum(axis=1) == 0
+        free_weights[blocked] = weights[blocked]  # Like after running out of tries, any direction may come up
+        new_dirs = _choose(free_weights, uniform[:, 0])
+        choose = ~flag_detected & ~moving
+
+        # Junction turns to the sides
+        alignment = constants.AI_JUNCTION_ALIGNMENT
+        offsets = positions % constants.TILE_SIZE
+        aligned = ((offsets <= alignment) | (offsets >= constants.TILE_SIZE - alignment)).all(axis=1)
+        turning = (~flag_detected & moving & aligned & (free.sum(axis=1) > 2) &
+                   (uniform[:, 1] < constants.AI_JUNCTION_TURN_CHANCE))
+        if turning.any():
+            sides = ((DIRECTION_OFFSETS[None, :, 0] != move[:, 0, None]) &
+                     (DIRECTION_OFFSETS[None, :, 1] != move[:, 1, None]))
+            side_weights = free_weights * sides
+            side_chance = side_weights.sum(axis=1) / free_weights.sum(axis=1)
+            turning &= uniform[:, 2] < 1 - (1 - side_chance) ** 5
+            side_weights[~turning] = 1.
+            new_dirs = np.where(turning, _choose(side_weights, uniform[:, 0]), new_dirs)
+            choose |= turning
+
+        for i in np.flatnonzero(choose).tolist():
+            tanks[i].move_dir = NEIGHBOURS[new_dirs[i]]
+            move[i] = NEIGHBOURS[new_dirs[i]]
+
+        return self._intervals(positions, move, moving, speeds)
+
+    @staticmethod
+    def _intervals(positions: np.ndarray, move: np.ndarray, moving: np.ndarray, speeds: np.ndarray) -> np.ndarray:
+        """
+        AIScheduler.decision_interval for arrays of tanks.
+        """
+        rows = np.arange(len(positions))
+        axis = np.where(move[:, 0] != 0, 0, 1)
+        along = positions[rows, axis] % constants.TILE_SIZE
+        across = positions[rows, 1 - axis] % constants.TILE_SIZE
+        window = constants.AI_JUNCTION_ALIGNMENT
+        distance = np.where(move[rows, axis] > 0, constants.TILE_SIZE - window - along, along - window)
+        intervals = np.clip(distance // speeds - 1, constants.AI_LOGIC_TIME_STEP, constants.AI_MAX_DECISION_INTERVAL)
+        intervals[(along <= window) | (along >= constants.TILE_SIZE - window)] = constants.AI_LOGIC_TIME_STEP
+        intervals[(window < across) & (across < constants.TILE_SIZE - window)] = constants.AI_MAX_DECISION_INTERVAL
+        intervals[~moving] = constants.AI_LOGIC_TIME_STEP
+        return intervals
+
+    def shoot(self, game: Game, tanks: List[Computer]) -> None:
+        """
+        Runs the shooting logic of the given tanks.
+        """
+        cooldowns = np.array([tank.shoot_cooldown for tank in tanks], dtype=float)
+        can_shoot = np.array([tank.can_shoot() for tank in tanks])
+        fire = can_shoot & (cooldowns <= 0)
+        periods = self._generator.random(len(tanks)) * constants.AI_SHOOT_PERIOD * (constants.AI_LOGIC_TIME_STEP + 1)
+        cooldowns = np.where(fire, periods, cooldowns - 1)
+        for tank, fires, cooldown in zip(tanks, fire.tolist(), cooldowns.tolist()):
+            if fires:
+                tank.shoot(game)
+            tank.shoot_cooldown = cooldown
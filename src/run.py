@@ -1,9 +1,56 @@
+import argparse
 import os
-import pyglet as pyg
+from core.frame_pacer import FramePacer
 from core.game import Game
+from core.replay import Replay, play
+from core.shared_state import SharedStatePublisher
 
 # Application entry point
 
+parser = argparse.ArgumentParser(description="Battle City clone")
+parser.add_argument("--turbo", type=int, default=1, metavar="TICKS",
+                    help="number of game ticks ran per rendered frame (F4 toggles turbo mode in game)")
+parser.add_argument("--turbo-budget", type=float, default=None, metavar="MS",
+                    help="run as many game ticks per frame as fit into the given number of milliseconds")
+parser.add_argument("--pacer", action="store_true",
+                    help="pace frames with a sleep/spin frame pacer instead of the pyglet clock, "
+                         "frame jitter statistics are printed on exit")
+parser.add_argument("--seed", type=int, default=None, help="seed of the game random number generator")
+parser.add_argument("--record", default=None, metavar="PATH", help="record the last played match into a replay file")
+parser.add_argument("--replay", default=None, metavar="PATH",
+                    help="re-simulate a recorded replay without a window and print its outcome")
+parser.add_argument("--publish", default=None, metavar="NAME",
+                    help="publish the world state every tick into a shared memory block of the given name")
+args = parser.parse_args()
+
 working_dir = os.path.dirname(os.path.realpath(__file__))
-game = Game(working_dir)
-pyg.app.run()
+
+if args.replay is not None:
+    replayed = play(Replay.load(args.replay), working_dir)
+    print(f"Replayed {replayed.tick} ticks, game state: {replayed.game_state.name}")
+    raise SystemExit
+
+game = Game(working_dir, seed=args.seed)
+game.record_replays = args.record is not None
+game.ticks_per_frame = max(1, args.turbo)
+if args.turbo_budget is not None:
+    game.frame_time_budget = args.turbo_budget / 1000
+if args.publish is not None:
+    game.state_publisher = SharedStatePublisher(game, args.publish)
+
+pacer = None
+if args.pacer:
+    pacer = FramePacer()
+    pacer.calibrate()
+try:
+    game.run(pacer)
+finally:
+    if game.state_publisher is not None:
+        game.state_publisher.close()
+
+if args.record is not None and game.replay is not None:
+    game.replay.save(args.record)
+
+if pacer is not None:
+    for name, percentiles in pacer.jitter_percentiles().items():
+        print(name.ljust(15) + "  ".join(f"p{p}: {ms:.3f} ms" for p, ms in percentiles.items()))